@@ -0,0 +1,83 @@
+// Loading of paged lists, see dashboard/components/list_component.py.
+//
+// A list renders a window of its pages between two sentinels, which
+// take the height of the pages before and after the window. A sentinel
+// is clicked when it is scrolled within BUFFER of the visible part of
+// the list, which triggers the callback loading the previous or next
+// page. No sentinel of a list is clicked again until the callback has
+// updated the list, so every page is requested once and the window is
+// only changed by one callback at a time.
+
+const BUFFER = "400px";
+const SENTINEL_SELECTOR = ".list-sentinel";
+// Set by Dash on outputs of running callbacks
+const LOADING_ATTRIBUTE = "data-dash-is-loading";
+
+// The observers of each observed list
+const observed = new Map();
+// Lists with a page being loaded
+const pending = new WeakSet();
+
+function loadPage(list, sentinel) {
+    if (pending.has(list) || sentinel.classList.contains("hidden")) {
+        return;
+    }
+    pending.add(list);
+    sentinel.click();
+}
+
+function observeList(list) {
+    const intersectionObserver = new IntersectionObserver(
+        (entries) => {
+            const entry = entries.find((entry) => entry.isIntersecting);
+            if (entry) {
+                loadPage(list, entry.target);
+            }
+        },
+        { root: list, rootMargin: BUFFER },
+    );
+
+    // Observing a sentinel again reports whether it is still visible,
+    // so pages are loaded until the visible part of the list is filled.
+    function observeSentinels() {
+        intersectionObserver.disconnect();
+        for (const sentinel of list.querySelectorAll(`:scope > ${SENTINEL_SELECTOR}`)) {
+            intersectionObserver.observe(sentinel);
+        }
+    }
+
+    // When the callback has updated the list, observe the sentinels
+    // again with their new heights.
+    const listObserver = new MutationObserver(() => {
+        if (list.querySelector(`[${LOADING_ATTRIBUTE}]`)) {
+            return;
+        }
+        pending.delete(list);
+        observeSentinels();
+    });
+
+    observeSentinels();
+    listObserver.observe(list, {
+        childList: true,
+        subtree: true,
+        attributeFilter: ["class", "style", LOADING_ATTRIBUTE],
+    });
+    observed.set(list, [intersectionObserver, listObserver]);
+}
+
+// Observe the lists added to the page. Lists which are already observed
+// are skipped, each list observes its own updates.
+new MutationObserver(() => {
+    for (const [list, observers] of observed) {
+        if (!list.isConnected) {
+            observers.forEach((observer) => observer.disconnect());
+            observed.delete(list);
+        }
+    }
+    for (const sentinel of document.querySelectorAll(SENTINEL_SELECTOR)) {
+        const list = sentinel.parentElement;
+        if (!observed.has(list)) {
+            observeList(list);
+        }
+    }
+}).observe(document.body, { childList: true, subtree: true });
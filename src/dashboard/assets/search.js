@@ -0,0 +1,24 @@
+// Debounced search inputs.
+//
+// Typing in an input with a data-debounce-target attribute copies its
+// value to the Dash input with that id once typing has paused for
+// DEBOUNCE_DELAY milliseconds, so callbacks on the target run once per
+// pause instead of once per key. setInputValue is defined in
+// utilities.js.
+
+const DEBOUNCE_DELAY = 200;
+
+const debounceTimers = new WeakMap();
+
+document.addEventListener("input", (event) => {
+    const targetId = event.target.dataset?.debounceTarget;
+    if (!targetId) {
+        return;
+    }
+
+    clearTimeout(debounceTimers.get(event.target));
+    debounceTimers.set(
+        event.target,
+        setTimeout(() => setInputValue(targetId, event.target.value), DEBOUNCE_DELAY),
+    );
+});
@@ -0,0 +1,54 @@
+// Decoding of typed arrays in figures, see dashboard/typed_arrays.py.
+//
+// Numeric arrays in figures are sent as {dtype, bdata} objects, which
+// plotly.js supports natively from 2.28. Dash bundles an older version,
+// so Plotly.react is wrapped to decode them before plotting. The figure
+// is copied, so that the figure prop of the graph keeps the encoded
+// arrays and is sent back to the server as is.
+
+const TYPED_ARRAY_TYPES = { i4: Int32Array, f8: Float64Array };
+
+function decodeTypedArrays(value) {
+    if (Array.isArray(value)) {
+        return value.map(decodeTypedArrays);
+    }
+    if (value === null || typeof value !== "object" || ArrayBuffer.isView(value)) {
+        return value;
+    }
+    if (typeof value.bdata === "string" && value.dtype in TYPED_ARRAY_TYPES) {
+        const bytes = Uint8Array.from(atob(value.bdata), (c) => c.charCodeAt(0));
+        return new TYPED_ARRAY_TYPES[value.dtype](bytes.buffer);
+    }
+    return Object.fromEntries(
+        Object.entries(value).map(([key, item]) => [key, decodeTypedArrays(item)]),
+    );
+}
+
+function decodingPlotly(plotly) {
+    if (!plotly || plotly.decodesTypedArrays) {
+        return plotly;
+    }
+
+    const react = plotly.react;
+    plotly.react = function (gd, dataOrFigure, ...args) {
+        // Called as react(gd, figure) or react(gd, data, layout, config)
+        const decoded = Array.isArray(dataOrFigure)
+            ? decodeTypedArrays(dataOrFigure)
+            : { ...dataOrFigure, data: decodeTypedArrays(dataOrFigure?.data) };
+        return react.call(this, gd, decoded, ...args);
+    };
+    plotly.decodesTypedArrays = true;
+
+    return plotly;
+}
+
+// Dash loads plotly.js when the first graph is rendered, and assigns it
+// to window.Plotly.
+let decodingPlotlyInstance = decodingPlotly(window.Plotly);
+Object.defineProperty(window, "Plotly", {
+    configurable: true,
+    get: () => decodingPlotlyInstance,
+    set: (plotly) => {
+        decodingPlotlyInstance = decodingPlotly(plotly);
+    },
+});
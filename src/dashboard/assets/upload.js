@@ -0,0 +1,95 @@
+// Chunked upload of data files on the create graph page.
+//
+// Selected files are uploaded in chunks to the /upload endpoints, see
+// dashboard/upload.py. When all files are uploaded, the ids of the
+// created data sets are written to the uploaded_dataset_ids input, which
+// triggers the render_figure callback. The progress and any files which
+// could not be read are shown in the upload_status element.
+// setInputValue is defined in utilities.js.
+
+const CHUNK_SIZE = 4 * 1024 * 1024;
+const MAX_RETRIES = 3;
+
+async function uploadFile(file) {
+    const response = await fetch("/upload/", { method: "POST" });
+    const { upload_id: uploadId } = await response.json();
+    let offset = 0;
+    let retries = 0;
+
+    while (offset < file.size) {
+        try {
+            const chunk = file.slice(offset, offset + CHUNK_SIZE);
+            const chunkResponse = await fetch(`/upload/${uploadId}?offset=${offset}`, {
+                method: "PUT",
+                body: chunk,
+            });
+            if (!chunkResponse.ok && chunkResponse.status !== 409) {
+                throw new Error(`Upload failed with status ${chunkResponse.status}`);
+            }
+            // On 409 the server returns the offset to resume from.
+            offset = (await chunkResponse.json()).offset;
+            retries = 0;
+        } catch (error) {
+            if (++retries > MAX_RETRIES) {
+                throw error;
+            }
+            const offsetResponse = await fetch(`/upload/${uploadId}`);
+            offset = (await offsetResponse.json()).offset;
+        }
+    }
+
+    return uploadId;
+}
+
+async function completeUploads(uploadIds) {
+    const response = await fetch("/upload/complete", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ upload_ids: uploadIds }),
+    });
+    return response.json();
+}
+
+// Show messages in the upload_status element, one per line.
+function setUploadStatus(...messages) {
+    const status = document.getElementById("upload_status");
+    if (status) {
+        status.replaceChildren(
+            ...messages.map((message) => {
+                const line = document.createElement("div");
+                line.textContent = message;
+                return line;
+            })
+        );
+    }
+}
+
+document.addEventListener("click", (event) => {
+    if (event.target.closest("#upload_button")) {
+        document.getElementById("uploaded_data").click();
+    }
+});
+
+document.addEventListener("change", async (event) => {
+    if (event.target.id !== "uploaded_data" || event.target.files.length === 0) {
+        return;
+    }
+
+    const files = Array.from(event.target.files);
+    event.target.value = "";
+    const uploading = files.length === 1 ? files[0].name : `${files.length} files`;
+    setUploadStatus(`Uploading ${uploading}...`);
+
+    try {
+        const uploadIds = await Promise.all(files.map(uploadFile));
+        const result = await completeUploads(uploadIds);
+        const errors = result.errors.map(({ upload_id: uploadId, error }) => {
+            const file = files[uploadIds.indexOf(uploadId)];
+            return `Could not read ${file.name}: ${error}`;
+        });
+        setUploadStatus(...errors);
+        setInputValue("uploaded_dataset_ids", JSON.stringify(result.dataset_ids));
+    } catch (error) {
+        setUploadStatus(`Upload failed: ${error.message}`);
+    }
+});
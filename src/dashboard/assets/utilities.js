@@ -0,0 +1,9 @@
+// Utility functions shared by the other scripts in this directory.
+
+// Set the value of a Dash input so that Dash registers the change.
+function setInputValue(id, value) {
+    const input = document.getElementById(id);
+    const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, "value").set;
+    setter.call(input, value);
+    input.dispatchEvent(new Event("input", { bubbles: true }));
+}
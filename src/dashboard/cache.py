@@ -0,0 +1,88 @@
+"""Module with in-process caches.
+
+Caches in this module are per process. When running with gunicorn,
+every worker has its own caches.
+"""
+from collections import OrderedDict
+import threading
+import time
+from typing import Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Thread safe least recently used cache.
+
+    The cache holds at most ``maxsize`` entries. When full, the least
+    recently used entry is evicted. If ``ttl`` is set, entries expire
+    ``ttl`` seconds after they were set.
+
+    Attributes:
+        maxsize (int): the maximum number of entries.
+        ttl (float | None): the time to live of entries in seconds, or
+            None if entries never expire.
+        hits (int): the number of lookups which found an entry.
+        misses (int): the number of lookups which found no entry.
+
+    Examples:
+        Caching a value:
+
+        >>> cache: LRUCache[str, int] = LRUCache(maxsize=2)
+        >>> cache.set("a", 1)
+        >>> cache.get("a")
+        1
+        >>> cache.get("b") is None
+        True
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float | None = None) -> None:
+        """Initialize an empty cache."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        """Return the value of a key, or None if it is not cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: K, value: V) -> None:
+        """Set the value of a key, evicting old entries if needed."""
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        """Remove a key from the cache if it is cached."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the hit and miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached entries, including expired."""
+        return len(self._entries)
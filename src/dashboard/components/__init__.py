@@ -6,7 +6,7 @@ from dashboard.components.icon import icon
 from dashboard.components.multiline_input import multiline_input
 from dashboard.components.navbar_component import navbar_component
 from dashboard.components.text_input import text_input
-from dashboard.components.trace import trace
+from dashboard.components.trace import trace, trace_dict
 
 __all__ = [
     "button",
@@ -18,4 +18,5 @@ __all__ = [
     "text_input",
     "multiline_input",
     "trace",
+    "trace_dict",
 ]
@@ -30,14 +30,19 @@ def generate_list_row_contents(time: datetime, dashboard: Dashboard) -> list[str
     ]
 
 
-def dashboards_list_component(dashboards: list[Dashboard], _id: str) -> Component:
+def dashboards_list_component(
+    dashboards: list[Dashboard], _id: str, has_more: bool = False
+) -> Component:
     """Create a dashboards list component.
 
+    Rows are indexed by dashboard id.
+
     Args:
-        titles_names (List[str]): The titles to display at the top of
-        the list.
-        list_rows (List[List[str]]): The rows that make up the list
-        contents.
+        dashboards (list[Dashboard]): The dashboards of the first page
+        of the list.
+        _id (str): The id of the list.
+        has_more (bool): True if more dashboards can be loaded, see
+        ``list_component``.
 
     Raises:
         IndexError: If the amount of titles does not match the amount
@@ -52,4 +57,6 @@ def dashboards_list_component(dashboards: list[Dashboard], _id: str) -> Componen
         ["Title", "Last edited at", "Created at"],
         [generate_list_row_contents(now, dashboard) for dashboard in dashboards],
         _id,
+        row_ids=[str(dashboard.id) for dashboard in dashboards],
+        has_more=has_more,
     )
@@ -1,8 +1,39 @@
-"""List component."""
+"""List component.
 
-from dash import dcc, html
+Lists can be loaded in pages, of which at most ``MAX_RENDERED_PAGES``
+are rendered at a time. The rows of the first page are passed to
+``list_component``, which adds a sentinel element before and after the
+rows. The sentinels are clicked by ``assets/list.js`` when they are
+scrolled into view, so a callback on their ``n_clicks`` can load the
+previous or the next page of rows, see ``add_page``.
+
+Rows have a fixed height, so the sentinels take the height of the pages
+which are not rendered, and the list scrolls as if all loaded rows were
+rendered. The state of a list is a window, see ``list_window``, which
+is kept in a ``dcc.Store`` by the page of the list.
+"""
+from collections.abc import Sequence
+from typing import Any
+
+from dash import Patch, dcc, html
 
 from dashboard.components.icon import icon
+from dashboard.utilities import set_classname
+
+SENTINEL_CLASSNAME = "list-sentinel"
+PAGE_CLASSNAME = "list-page"
+
+# The number of pages rendered at a time. The rendered pages must be
+# higher than a list and the buffers of ``assets/list.js``, otherwise
+# both sentinels are in view and pages are loaded back and forth.
+MAX_RENDERED_PAGES = 3
+
+# The height of a row, set by the h-10 class of the rows
+ROW_HEIGHT_REM = 2.5
+
+# The minimum height of the sentinel after the rows, so it can be
+# scrolled into view while the next page is unknown
+MIN_SENTINEL_HEIGHT_REM = 2
 
 
 def generate_row_item(content: str) -> html.Span:
@@ -23,11 +54,12 @@ def generate_row_item(content: str) -> html.Span:
     )
 
 
-def generate_list_row(index: int, list_row_contents: list[str]) -> dcc.Link:
+def generate_list_row(index: int | str, list_row_contents: list[str]) -> dcc.Link:
     """Generate a list row.
 
     Args:
-        index (int): The index of the row.
+        index (int | str): The index of the row, which must be unique
+        within the list.
         list_row_data (list[str]): The contents
         of the row.
 
@@ -38,7 +70,7 @@ def generate_list_row(index: int, list_row_contents: list[str]) -> dcc.Link:
         id={"type": "list-row", "index": index},
         href="/",
         className=(
-            "flex pl-2 justify-start items-center border-b-2 border-gray-400"
+            "flex h-10 pl-2 justify-start items-center border-b-2 border-gray-400"
             " text-base cursor-pointer hover:bg-gray-100"
         ),
         children=[
@@ -60,26 +92,229 @@ def generate_list_titles(list_titles: list[str]) -> list[html.Span]:
     return [generate_row_item(title) for title in list_titles]
 
 
-def generate_list_rows(list_rows: list[list[str]]) -> list[dcc.Link]:
+def generate_list_rows(
+    list_rows: list[list[str]], row_ids: Sequence[int | str] | None = None
+) -> list[dcc.Link]:
     """Generate list row elements.
 
     Args:
         list_rows (list[list[str]]): A list of rows.
+        row_ids (Sequence[int | str] | None): The unique index of each
+        row. Defaults to the position of the row.
 
     Returns:
         list[dcc.Link]: A list of row elements.
     """
-    return [generate_list_row(index, row) for index, row in enumerate(list_rows)]
+    if row_ids is None:
+        row_ids = range(len(list_rows))
+
+    return [generate_list_row(index, row) for index, row in zip(row_ids, list_rows)]
+
+
+def list_page(rows: list[dcc.Link]) -> html.Div:
+    """Create the element holding the rows of a page.
+
+    Args:
+        rows (list[dcc.Link]): The rows of the page.
+
+    Returns:
+        html.Div: The page.
+    """
+    return html.Div(className=PAGE_CLASSNAME, children=rows)
+
+
+def list_window(row_count: int, next_cursor: str | None) -> dict[str, Any]:
+    """Return the window of a list showing its first page.
+
+    A window holds the cursor and the row count of the loaded pages,
+    and which pages are rendered.
+
+    Args:
+        row_count (int): The number of rows of the first page.
+        next_cursor (str | None): The cursor of the next page, or None
+        if there are no more rows.
+
+    Returns:
+        dict[str, Any]: The window, with the start cursor of every
+        known page in ``cursors``, the row count of every loaded page
+        in ``counts`` and the first and last rendered page in
+        ``first`` and ``last``.
+    """
+    cursors: list[str | None] = [None] if next_cursor is None else [None, next_cursor]
+    return {"cursors": cursors, "counts": [row_count], "first": 0, "last": 0}
+
+
+def page_to_load(window: dict[str, Any], forward: bool) -> tuple[int, str | None] | None:
+    """Find the page to load when a sentinel is scrolled into view.
+
+    Args:
+        window (dict[str, Any]): The window of the list.
+        forward (bool): True to find the page after the rendered pages,
+        False to find the page before them.
+
+    Returns:
+        tuple[int, str | None] | None: The index and the start cursor
+        of the page, or None if there is no such page.
+    """
+    index = window["last"] + 1 if forward else window["first"] - 1
+    if not 0 <= index < len(window["cursors"]):
+        return None
+
+    return index, window["cursors"][index]
+
+
+def add_page(
+    window: dict[str, Any], index: int, rows: list[dcc.Link], next_cursor: str | None
+) -> tuple[Patch, dict[str, Any]]:
+    """Render a loaded page next to the rendered pages.
+
+    If more than ``MAX_RENDERED_PAGES`` pages are rendered, the page at
+    the other end is removed, and its height is taken by the sentinel
+    on that side.
+
+    Args:
+        window (dict[str, Any]): The window of the list.
+        index (int): The index of the page, see ``page_to_load``.
+        rows (list[dcc.Link]): The rows of the page.
+        next_cursor (str | None): The cursor of the page after it.
+
+    Returns:
+        tuple[Patch, dict[str, Any]]: A patch of the children of the
+        list rows, and the new window.
+    """
+    cursors: list[str | None] = list(window["cursors"])
+    counts: list[int] = list(window["counts"])
+    first: int = window["first"]
+    last: int = window["last"]
+    forward = index > last
+
+    if index < len(counts):
+        counts[index] = len(rows)
+    else:
+        counts.append(len(rows))
+
+    children_patch = Patch()
+    if forward:
+        following = index + 1
+        if next_cursor is None:
+            del cursors[following:], counts[following:]
+        elif following < len(cursors):
+            cursors[following] = next_cursor
+        else:
+            cursors.append(next_cursor)
 
+        children_patch.append(list_page(rows))
+        last = index
+        if last - first >= MAX_RENDERED_PAGES:
+            del children_patch[0]
+            first += 1
+    else:
+        children_patch.prepend(list_page(rows))
+        first = index
+        if last - first >= MAX_RENDERED_PAGES:
+            del children_patch[last - first]
+            last -= 1
 
-def list_component(list_titles: list[str], list_rows: list[list[str]], _id: str) -> html.Div:
+    return children_patch, {"cursors": cursors, "counts": counts, "first": first, "last": last}
+
+
+def prepend_row(window: dict[str, Any], row: dcc.Link) -> tuple[Patch, dict[str, Any]] | None:
+    """Add a row at the start of the first page.
+
+    Args:
+        window (dict[str, Any]): The window of the list.
+        row (dcc.Link): The row.
+
+    Returns:
+        tuple[Patch, dict[str, Any]] | None: A patch of the children of
+        the list rows and the new window, or None if the first page is
+        not rendered. The row is then shown when the first page is
+        loaded again.
+    """
+    if window["first"] != 0:
+        return None
+
+    children_patch = Patch()
+    children_patch[0]["props"]["children"].prepend(row)
+    counts = [window["counts"][0] + 1, *window["counts"][1:]]
+
+    return children_patch, {**window, "counts": counts}
+
+
+def sentinel_classname(has_more: bool) -> str:
+    """Return the classname of a list sentinel.
+
+    Args:
+        has_more (bool): True if there are more rows to load.
+
+    Returns:
+        str: The classname, hiding the sentinel if there are no more
+        rows.
+    """
+    return set_classname(SENTINEL_CLASSNAME, "hidden", not has_more)
+
+
+def sentinel_style(row_count: int, min_height: float = 0) -> dict[str, str]:
+    """Return the style of a sentinel taking the height of rows.
+
+    Args:
+        row_count (int): The number of rows which are not rendered.
+        min_height (float): The minimum height in rem.
+
+    Returns:
+        dict[str, str]: The style.
+    """
+    return {"height": f"{max(row_count * ROW_HEIGHT_REM, min_height)}rem"}
+
+
+def window_sentinels(window: dict[str, Any]) -> tuple[str, dict[str, str], str, dict[str, str]]:
+    """Return the classnames and styles of the sentinels of a window.
+
+    Args:
+        window (dict[str, Any]): The window of the list.
+
+    Returns:
+        tuple[str, dict[str, str], str, dict[str, str]]: The classname
+        and style of the sentinel before the rows, and of the sentinel
+        after the rows.
+    """
+    first: int = window["first"]
+    following: int = window["last"] + 1
+    counts: list[int] = window["counts"]
+
+    return (
+        sentinel_classname(first > 0),
+        sentinel_style(sum(counts[:first])),
+        sentinel_classname(following < len(window["cursors"])),
+        sentinel_style(sum(counts[following:]), MIN_SENTINEL_HEIGHT_REM),
+    )
+
+
+def list_component(
+    list_titles: list[str],
+    list_rows: list[list[str]],
+    _id: str,
+    row_ids: Sequence[int | str] | None = None,
+    has_more: bool = False,
+) -> html.Div:
     """Create a list component.
 
+    The rows are preceded by a sentinel with the id
+    ``{"parent": _id, "child": "load-previous"}`` and followed by a
+    sentinel with the id ``{"parent": _id, "child": "load-more"}``,
+    whose ``n_clicks`` are incremented when they are scrolled into
+    view. The rows are the first page of the list, see
+    ``list_window``.
+
     Args:
         titles_names (list[str]): The titles to display at the top of
         the list.
         list_rows (list[list[str]]): The rows that make up the list
         contents.
+        row_ids (Sequence[int | str] | None): The unique index of each
+        row. Defaults to the position of the row.
+        has_more (bool): True if more rows can be loaded, which shows
+        the sentinel after the rows.
 
     Raises:
         IndexError: If the amount of titles does not match the amount
@@ -96,6 +331,9 @@ def list_component(list_titles: list[str], list_rows: list[list[str]], _id: str)
     return html.Div(
         id=_id,
         className="bg-white overflow-auto grow drop-shadow-sm rounded",
+        # Pages are added and removed while the sentinels keep their
+        # height, so the browser should not adjust the scroll position
+        style={"overflowAnchor": "none"},
         children=[
             html.Div(
                 className=(
@@ -104,10 +342,22 @@ def list_component(list_titles: list[str], list_rows: list[list[str]], _id: str)
                 ),
                 children=generate_list_titles(list_titles),
             ),
+            html.Div(
+                id={"parent": _id, "child": "load-previous"},
+                n_clicks=0,
+                className=sentinel_classname(False),
+                style=sentinel_style(0),
+            ),
             html.Div(
                 id={"parent": _id, "child": "list-rows"},
                 className="w-full",
-                children=generate_list_rows(list_rows),
+                children=[list_page(generate_list_rows(list_rows, row_ids))],
+            ),
+            html.Div(
+                id={"parent": _id, "child": "load-more"},
+                n_clicks=0,
+                className=sentinel_classname(has_more),
+                style=sentinel_style(0, MIN_SENTINEL_HEIGHT_REM),
             ),
         ],
     )
@@ -1,10 +1,18 @@
 """Trace component."""
 
 from enum import Enum
+from typing import Any
 
+import numpy.typing as npt
 import plotly.graph_objs as go
 import polars as pl
 
+from dashboard.downsampling import DownsampleMethod, downsample
+
+# Traces with more points are not validated by ``trace_dict``, since
+# plotly validates and copies every point, which is slow.
+VALIDATED_TRACE_MAX_POINTS = 10_000
+
 
 class TraceType(Enum):
     """Contains the available trace types."""
@@ -19,6 +27,9 @@ def trace(
     trace_type: TraceType,
     trace_color: str,
     name: str,
+    downsample_method: DownsampleMethod = DownsampleMethod.NONE,
+    n_out: int | None = None,
+    keep: npt.ArrayLike | None = None,
 ) -> go.Scatter | go.Bar:
     """Creates a trace based on a trace type.
 
@@ -26,6 +37,9 @@ def trace(
     and must first be embedded into a dcc.Graph
     component. See example.
 
+    Large data frames can be downsampled before the
+    trace is created, see ``dashboard.downsampling``.
+
     Example::
 
         tr = trace(...)
@@ -37,14 +51,22 @@ def trace(
         trace_type (TraceType): The type of trace to create.
         trace_color (str): The color of the trace.
         name (str): The name of the trace.
+        downsample_method (DownsampleMethod): The downsampling method
+        to use. Defaults to no downsampling.
+        n_out (int | None): The number of points to keep when
+        downsampling. See ``downsampling.target_points``.
+        keep (npt.ArrayLike | None): Indices of rows which must be
+        kept when downsampling, e.g. rows with markers.
 
     Returns:
         go.Scatter | go.Bar: The created trace.
     """
-    cols = df.columns
     if df is None:
         return go.Scatter()
 
+    df = downsample(df, downsample_method, n_out, keep)
+    cols = df.columns
+
     if trace_type == TraceType.LINE:
         return go.Scatter(
             x=df[cols[0]],
@@ -72,3 +94,64 @@ def trace(
         )
 
     return go.Scatter()
+
+
+def trace_dict(
+    df: pl.DataFrame,
+    trace_type: TraceType,
+    trace_color: str,
+    name: str,
+    downsample_method: DownsampleMethod = DownsampleMethod.NONE,
+    n_out: int | None = None,
+    keep: npt.ArrayLike | None = None,
+    validate: bool | None = None,
+) -> dict[str, Any]:
+    """Creates a trace as a figure dictionary.
+
+    Unlike ``trace``, large traces are not validated by plotly. Their
+    columns are taken from the data frame as numpy arrays, without
+    copying numeric columns. The dictionary can be used as a trace in
+    the ``data`` of a figure dictionary.
+
+    Args:
+        df (pl.DataFrame): The dataframe to create the trace from.
+        trace_type (TraceType): The type of trace to create.
+        trace_color (str): The color of the trace.
+        name (str): The name of the trace.
+        downsample_method (DownsampleMethod): The downsampling method
+        to use. Defaults to no downsampling.
+        n_out (int | None): The number of points to keep when
+        downsampling. See ``downsampling.target_points``.
+        keep (npt.ArrayLike | None): Indices of rows which must be
+        kept when downsampling, e.g. rows with markers.
+        validate (bool | None): Whether to validate the trace with
+        plotly. Defaults to validating traces of at most
+        ``VALIDATED_TRACE_MAX_POINTS`` points.
+
+    Returns:
+        dict[str, Any]: The created trace.
+    """
+    df = downsample(df, downsample_method, n_out, keep)
+
+    if validate is None:
+        validate = df.height <= VALIDATED_TRACE_MAX_POINTS
+
+    if validate:
+        validated: dict[str, Any] = trace(df, trace_type, trace_color, name).to_plotly_json()
+        return validated
+
+    cols = df.columns
+    created: dict[str, Any] = {
+        "marker": {"color": trace_color},
+        "name": name,
+        "x": df[cols[0]].to_numpy(),
+        "y": df[cols[1]].to_numpy(),
+    }
+
+    if trace_type == TraceType.BAR:
+        created["type"] = "bar"
+    else:
+        created["type"] = "scatter"
+        created["mode"] = trace_type.value
+
+    return created
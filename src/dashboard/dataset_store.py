@@ -0,0 +1,149 @@
+"""Module for storing data sets on the server.
+
+Data sets uploaded or loaded by a user are kept on the server, so that
+callbacks only need to exchange data set ids with the browser instead
+of the data itself.
+
+Data sets are written as Arrow IPC files to a directory shared by all
+workers, since with gunicorn consecutive callbacks may be handled by
+different workers. Recently used data sets are also kept in memory by
+each worker.
+
+The directory is read from the ``DATASET_STORE_DIR`` environment
+variable, and defaults to a directory in the system temp directory.
+"""
+import os
+from pathlib import Path
+import re
+import tempfile
+import time
+import uuid
+
+from dotenv import load_dotenv
+import polars as pl
+
+from dashboard.cache import LRUCache
+
+load_dotenv()
+
+DATASET_STORE_DIR_ENV_NAME = "DATASET_STORE_DIR"
+DATASET_STORE_MEMORY_SIZE = 16
+DATASET_MAX_AGE = 24 * 60 * 60
+CLEANUP_INTERVAL = 60 * 60
+
+_DATASET_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+class DatasetStore:
+    """Store of data frames keyed by opaque data set ids.
+
+    Data sets older than ``DATASET_MAX_AGE`` are removed when new data
+    sets are stored, at most once every ``CLEANUP_INTERVAL`` seconds.
+
+    Attributes:
+        directory (Path): the directory data sets are written to.
+        memory_cache (LRUCache[str, pl.DataFrame]): the data sets kept
+            in memory by this worker.
+    """
+
+    def __init__(self, directory: Path, memory_size: int = DATASET_STORE_MEMORY_SIZE) -> None:
+        """Initialize a store using a directory."""
+        self.directory = directory
+        self.memory_cache: LRUCache[str, pl.DataFrame] = LRUCache(maxsize=memory_size)
+        self._last_cleanup = 0.0
+
+    def _path(self, dataset_id: str) -> Path:
+        """Return the path of a data set file.
+
+        Raises:
+            ValueError: the id is not a valid data set id.
+        """
+        if not _DATASET_ID_PATTERN.fullmatch(dataset_id):
+            raise ValueError(f"Invalid data set id: {dataset_id!r}")
+
+        return self.directory / f"{dataset_id}.arrow"
+
+    def put(self, df: pl.DataFrame) -> str:
+        """Store a data frame.
+
+        Args:
+            df (pl.DataFrame): the data frame to store.
+
+        Returns:
+            str: The id of the stored data set.
+        """
+        dataset_id = uuid.uuid4().hex
+        path = self._path(dataset_id)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first, so that other workers never
+        # read a partially written file.
+        tmp_path = path.with_suffix(".tmp")
+        df.write_ipc(tmp_path)
+        os.replace(tmp_path, path)
+
+        self.memory_cache.set(dataset_id, df)
+
+        if time.monotonic() - self._last_cleanup > CLEANUP_INTERVAL:
+            self._last_cleanup = time.monotonic()
+            self.remove_expired()
+
+        return dataset_id
+
+    def get(self, dataset_id: str) -> pl.DataFrame | None:
+        """Load a data frame.
+
+        Data sets not in memory are memory mapped from disk.
+
+        Args:
+            dataset_id (str): the id of the data set.
+
+        Returns:
+            pl.DataFrame | None: The data frame, or None if there is no
+            data set with the id.
+        """
+        if (df := self.memory_cache.get(dataset_id)) is not None:
+            return df
+
+        try:
+            df = pl.read_ipc(self._path(dataset_id), memory_map=True)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        self.memory_cache.set(dataset_id, df)
+
+        return df
+
+    def delete(self, dataset_id: str) -> None:
+        """Delete a data set if it exists."""
+        self.memory_cache.invalidate(dataset_id)
+        self._path(dataset_id).unlink(missing_ok=True)
+
+    def remove_expired(self, max_age: float = DATASET_MAX_AGE) -> None:
+        """Delete data set files older than ``max_age`` seconds."""
+        if not self.directory.exists():
+            return
+
+        oldest = time.time() - max_age
+        for path in self.directory.iterdir():
+            try:
+                expired = path.stat().st_mtime < oldest
+            except FileNotFoundError:
+                # Removed by another worker
+                continue
+
+            if expired:
+                self.memory_cache.invalidate(path.stem)
+                path.unlink(missing_ok=True)
+
+
+def _store_dir() -> Path:
+    """Find the data set directory from the environment."""
+    directory = os.getenv(DATASET_STORE_DIR_ENV_NAME)
+    if directory:
+        return Path(directory)
+
+    return Path(tempfile.gettempdir()) / "graphit-datasets"
+
+
+dataset_store = DatasetStore(_store_dir())
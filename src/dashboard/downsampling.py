@@ -0,0 +1,184 @@
+"""Module with functions for downsampling large traces.
+
+Plotting every point of a large data set is slow, both when sending the
+figure to the browser and when rendering it. Since a graph can not show
+more points than it has pixels, most points can be dropped without
+visibly changing the graph.
+
+Two methods are available. Largest-Triangle-Three-Buckets (LTTB) keeps
+the shape of the curve and is well suited for line and scatter plots.
+Min-max keeps the smallest and largest value of every bucket, which
+preserves peaks and is well suited for bar plots.
+"""
+from enum import Enum
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+import polars as pl
+
+# Default width of a graph in pixels, used when the width is unknown.
+DEFAULT_GRAPH_WIDTH = 1200
+
+# The number of points to keep for every horizontal pixel.
+POINTS_PER_PIXEL = 2
+
+IndexArray = npt.NDArray[np.int64]
+
+
+class DownsampleMethod(Enum):
+    """Contains the available downsampling methods."""
+
+    NONE = "none"
+    LTTB = "lttb"
+    MIN_MAX = "min_max"
+
+
+def target_points(width: int | None = None) -> int:
+    """Return the number of points to keep for a graph.
+
+    Args:
+        width (int | None): the width of the graph in pixels. Defaults
+        to ``DEFAULT_GRAPH_WIDTH``.
+
+    Returns:
+        int: The number of points to keep.
+    """
+    return (width or DEFAULT_GRAPH_WIDTH) * POINTS_PER_PIXEL
+
+
+def lttb_indices(x: npt.NDArray[Any], y: npt.NDArray[Any], n_out: int) -> IndexArray:
+    """Select points using Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The remaining points are
+    split into ``n_out - 2`` buckets and from each bucket the point
+    forming the largest triangle with the previously selected point and
+    the average of the next bucket is kept.
+
+    Args:
+        x (npt.NDArray[Any]): the x values, sorted in ascending order.
+        y (npt.NDArray[Any]): the y values.
+        n_out (int): the number of points to keep.
+
+    Returns:
+        IndexArray: The sorted indices of the kept points.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n, dtype=np.int64)
+
+    x = x.astype(np.float64, copy=False)
+    y = y.astype(np.float64, copy=False)
+    if np.isnan(y).any():
+        # Only the selected indices are returned, so missing values can
+        # be replaced by any value when selecting points.
+        y = np.where(np.isnan(y), np.nanmean(y), y)
+
+    # Bucket i contains the points edges[i] until edges[i + 1].
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    next_x = np.append(np.add.reduceat(x[: n - 1], edges[:-1])[1:] / counts[1:], x[-1])
+    next_y = np.append(np.add.reduceat(y[: n - 1], edges[:-1])[1:] / counts[1:], y[-1])
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    selected = 0
+
+    for i, (start, end) in enumerate(zip(edges[:-1].tolist(), edges[1:].tolist())):
+        ax, ay = x[selected], y[selected]
+        dx, dy = ax - next_x[i], next_y[i] - ay
+        # Twice the triangle area, up to a constant within the bucket.
+        area = np.abs(dx * y[start:end] + dy * x[start:end] - (dx * ay + dy * ax))
+        selected = start + int(area.argmax())
+        indices[i + 1] = selected
+
+    return indices
+
+
+def min_max_indices(y: npt.NDArray[Any], n_out: int) -> IndexArray:
+    """Select the smallest and largest point of equally sized buckets.
+
+    The points are split into at most ``n_out // 2`` buckets, keeping
+    two points from each bucket. The first and last points are always
+    kept.
+
+    Args:
+        y (npt.NDArray[Any]): the y values.
+        n_out (int): the number of points to keep.
+
+    Returns:
+        IndexArray: The sorted indices of the kept points.
+    """
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n, dtype=np.int64)
+
+    # Pad the values to fill a buckets x bucket size matrix. Padding and
+    # missing values are never selected as min or max.
+    bucket_size = -(-n // n_buckets)
+    padded = np.full(n_buckets * bucket_size, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, bucket_size)
+    missing = np.isnan(buckets)
+    offsets = np.arange(n_buckets, dtype=np.int64) * bucket_size
+
+    mins = offsets + np.argmin(np.where(missing, np.inf, buckets), axis=1)
+    maxs = offsets + np.argmax(np.where(missing, -np.inf, buckets), axis=1)
+    candidates = np.concatenate([mins, maxs, [0, n - 1]])
+
+    indices: IndexArray = np.unique(candidates[candidates < n])
+    return indices
+
+
+def downsample(
+    df: pl.DataFrame,
+    method: DownsampleMethod,
+    n_out: int | None = None,
+    keep: npt.ArrayLike | None = None,
+) -> pl.DataFrame:
+    """Downsample a data frame with an x and a y column.
+
+    The first column of the data frame is used as x values and the
+    second as y values. If the x values are not numeric, the row index
+    is used as x value instead. The smallest and largest y values are
+    always kept.
+
+    Args:
+        df (pl.DataFrame): the data frame to downsample.
+        method (DownsampleMethod): the downsampling method to use.
+        n_out (int | None): the number of points to keep. Defaults to
+        ``target_points()``.
+        keep (npt.ArrayLike | None): indices of rows which must be
+        kept, e.g. rows with markers.
+
+    Returns:
+        pl.DataFrame: The downsampled data frame. The data frame is
+        returned as is if it is small enough or if the y values are not
+        numeric.
+    """
+    n_out = n_out or target_points()
+    if method == DownsampleMethod.NONE or df.height <= n_out or df.width < 2:
+        return df
+
+    x_col, y_col = df[df.columns[0]], df[df.columns[1]]
+    if not y_col.is_numeric():
+        return df
+
+    y = y_col.cast(pl.Float64).to_numpy()
+    if np.isnan(y).all():
+        return df
+
+    if method == DownsampleMethod.LTTB:
+        x = x_col.to_numpy() if x_col.is_numeric() else np.arange(df.height)
+        indices = lttb_indices(x, y, n_out)
+    else:
+        indices = min_max_indices(y, n_out)
+
+    peaks = [np.nanargmin(y), np.nanargmax(y)]
+    indices = np.union1d(indices, peaks)
+    if keep is not None:
+        indices = np.union1d(indices, np.asarray(keep, dtype=np.int64))
+
+    return df[indices]
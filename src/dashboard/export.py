@@ -0,0 +1,491 @@
+"""Module for exporting figures to files.
+
+Exporting a figure as an image renders it in a headless browser started
+by kaleido, which takes seconds when the browser is started. Images are
+therefore exported by the processes of ``export_pool``, which start
+the browser once and keep it running, so that later exports are fast.
+
+Exports run as Dash background callbacks, in processes started by
+``background_callback_manager``, so that they do not block the web
+server workers. The background jobs add the images to export to
+``export_queue``, and the export pool of any worker takes them from it
+and stores the files in ``figure_cache``, see ``export_image``.
+
+Job state, the queue and results are kept in a diskcache directory
+shared by all workers, which is read from the ``EXPORT_CACHE_DIR``
+environment variable and defaults to a directory in the system temp
+directory. At most ``EXPORT_WORKERS`` images are exported at the same
+time by all workers together, see ``export_slot``.
+
+Exported files are cached in ``figure_cache``, keyed by the contents
+of the figure, see ``export_key``. The cache is stored in the
+``figures`` subdirectory of the export cache directory, and holds at
+most ``FIGURE_CACHE_SIZE`` bytes. The least recently used files are
+evicted when it is full.
+
+Html files normally include all of plotly.js and the figure data as
+JSON lists. Slim html files instead load plotly.js from the server,
+see ``blueprint``, and contain numeric arrays as base64 typed arrays,
+see ``dashboard.typed_arrays``.
+"""
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from enum import Enum
+from functools import partial
+import gzip
+import hashlib
+import html
+import json
+import os
+from pathlib import Path
+from string import Template
+import tempfile
+import threading
+import time
+from typing import Any
+from urllib.parse import urljoin
+
+from dash import DiskcacheManager
+import diskcache
+from dotenv import load_dotenv
+from flask import Blueprint, send_file
+from flask.typing import ResponseReturnValue
+import plotly
+import plotly.graph_objs as go
+from plotly.io.json import to_json_plotly
+
+from dashboard.typed_arrays import decode_typed_arrays, encode_typed_arrays
+
+load_dotenv()
+
+EXPORT_CACHE_DIR_ENV_NAME = "EXPORT_CACHE_DIR"
+EXPORT_WORKERS_ENV_NAME = "EXPORT_WORKERS"
+FIGURE_CACHE_SIZE_ENV_NAME = "FIGURE_CACHE_SIZE"
+PLOTLYJS_URL_ENV_NAME = "PLOTLYJS_URL"
+DEFAULT_EXPORT_WORKERS = 2
+DEFAULT_FIGURE_CACHE_SIZE = 512 * 1024 * 1024
+
+# Seconds after which a slot held by a crashed job is released
+EXPORT_TIMEOUT = 5 * 60
+
+# Seconds a finished job result is kept if it is never fetched
+EXPORT_RESULT_MAX_AGE = 60 * 60
+
+# Seconds browsers may cache plotly.js
+PLOTLYJS_MAX_AGE = 24 * 60 * 60
+
+# Seconds between checks of the export queue and of queued exports
+EXPORT_POLL_INTERVAL = 0.1
+
+_EXPORT_SLOTS_KEY = "export-slots"
+_EXPORT_STARTED_KEY = "export-started-{}"
+_EXPORT_ERROR_KEY = "export-error-{}"
+_PLOTLYJS_PATH = Path(plotly.__file__).parent / "package_data" / "plotly.min.js"
+
+# Decodes typed arrays, which plotly.js supports natively from 2.28.
+_SLIM_HTML_TEMPLATE = Template(
+    """<html>
+<head>
+<meta charset="utf-8" />
+<script src="$plotlyjs_url"></script>
+</head>
+<body>
+<div id="figure" style="height: 100vh"></div>
+<script>
+const TYPED_ARRAYS = {i4: Int32Array, f8: Float64Array};
+function decode(value) {
+    if (Array.isArray(value)) {
+        return value.map(decode);
+    }
+    if (value && typeof value === "object") {
+        if (typeof value.bdata === "string" && value.dtype in TYPED_ARRAYS) {
+            const bytes = Uint8Array.from(atob(value.bdata), (c) => c.charCodeAt(0));
+            return new TYPED_ARRAYS[value.dtype](bytes.buffer);
+        }
+        for (const key in value) {
+            value[key] = decode(value[key]);
+        }
+    }
+    return value;
+}
+const figure = decode($figure);
+Plotly.newPlot("figure", figure.data, figure.layout, {responsive: true});
+</script>
+</body>
+</html>
+"""
+)
+
+blueprint = Blueprint("export", __name__, url_prefix="/export")
+
+
+class ExportFormat(Enum):
+    """Contains the file formats figures can be exported to."""
+
+    PNG = "png"
+    JPEG = "jpeg"
+    PDF = "pdf"
+    HTML = "html"
+
+    @property
+    def is_image(self) -> bool:
+        """Whether the format is rendered by kaleido."""
+        return self != ExportFormat.HTML
+
+
+class HtmlOption(Enum):
+    """Contains the options users can select for html exports."""
+
+    SLIM = "slim"
+    GZIP = "gzip"
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class ExportOptions:
+    """Options of an export.
+
+    Attributes:
+        width (int | None): the width of images in pixels. Defaults to
+            the width of the figure layout.
+        height (int | None): the height of images in pixels. Defaults
+            to the height of the figure layout.
+        plotlyjs_url (str | None): the url html files load plotly.js
+            from, or None to include plotly.js in html files. See
+            ``plotlyjs_url``.
+        compress (bool): whether to gzip html files.
+    """
+
+    width: int | None = None
+    height: int | None = None
+    plotlyjs_url: str | None = None
+    compress: bool = False
+
+
+def _cache_dir() -> Path:
+    """Find the export cache directory from the environment."""
+    directory = os.getenv(EXPORT_CACHE_DIR_ENV_NAME)
+    if directory:
+        return Path(directory)
+
+    return Path(tempfile.gettempdir()) / "graphit-exports"
+
+
+def _max_exports() -> int:
+    """Read the maximum number of concurrent exports.
+
+    Raises:
+        ValueError: the environment variable is not an integer.
+    """
+    value = os.getenv(EXPORT_WORKERS_ENV_NAME)
+    return int(value) if value else DEFAULT_EXPORT_WORKERS
+
+
+def _figure_cache_size() -> int:
+    """Read the size limit of the figure cache in bytes.
+
+    Raises:
+        ValueError: the environment variable is not an integer.
+    """
+    value = os.getenv(FIGURE_CACHE_SIZE_ENV_NAME)
+    return int(value) if value else DEFAULT_FIGURE_CACHE_SIZE
+
+
+export_cache = diskcache.Cache(_cache_dir())
+background_callback_manager = DiskcacheManager(export_cache, expire=EXPORT_RESULT_MAX_AGE)
+figure_cache = diskcache.Cache(
+    _cache_dir() / "figures",
+    size_limit=_figure_cache_size(),
+    eviction_policy="least-recently-used",
+)
+export_queue = diskcache.Deque(directory=str(_cache_dir() / "queue"))
+
+
+def export_slot() -> diskcache.BoundedSemaphore:
+    """Return the semaphore bounding the number of concurrent exports.
+
+    The semaphore is stored in the export cache, so it is shared by
+    all workers and background jobs.
+
+    Examples:
+        Waiting for a free slot before exporting:
+
+        >>> with export_slot():
+        ...     export_figure(figure, ExportFormat.PNG)
+    """
+    return diskcache.BoundedSemaphore(
+        export_cache, _EXPORT_SLOTS_KEY, value=_max_exports(), expire=EXPORT_TIMEOUT
+    )
+
+
+def export_key(
+    fig_dict: dict[str, Any], file_format: ExportFormat, options: ExportOptions | None = None
+) -> str:
+    """Return the figure cache key of an export.
+
+    The key is a hash of the figure with sorted keys, so that equal
+    figures have the same key regardless of the order of their keys.
+
+    Args:
+        fig_dict (dict[str, Any]): the figure as a dictionary.
+        file_format (ExportFormat): the format of the file.
+        options (ExportOptions | None): the options of the export.
+            Defaults to ``ExportOptions()``.
+
+    Returns:
+        str: The cache key.
+    """
+    if options is None:
+        options = ExportOptions()
+    content = json.dumps(
+        [fig_dict, file_format.value, asdict(options)], sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def plotlyjs_url(base_url: str) -> str:
+    """Return the url slim html files load plotly.js from.
+
+    The url is read from the ``PLOTLYJS_URL`` environment variable,
+    e.g. to load plotly.js from a web server or a CDN. Defaults to the
+    copy of plotly.js served by ``blueprint``.
+
+    Args:
+        base_url (str): the url of the app.
+
+    Returns:
+        str: The url of plotly.js.
+    """
+    return os.getenv(PLOTLYJS_URL_ENV_NAME) or urljoin(base_url, "/export/plotly.min.js")
+
+
+@blueprint.get("/plotly.min.js")
+def plotlyjs() -> ResponseReturnValue:
+    """Serve the plotly.js version figures are created for."""
+    return send_file(_PLOTLYJS_PATH, max_age=PLOTLYJS_MAX_AGE)
+
+
+def slim_html(fig_dict: dict[str, Any], plotlyjs_url: str) -> str:
+    """Create a html file which loads plotly.js from a url.
+
+    Args:
+        fig_dict (dict[str, Any]): the figure as a dictionary.
+        plotlyjs_url (str): the url of plotly.js.
+
+    Returns:
+        str: The html file.
+    """
+    figure: str = to_json_plotly(encode_typed_arrays(fig_dict))
+
+    return _SLIM_HTML_TEMPLATE.substitute(
+        plotlyjs_url=html.escape(plotlyjs_url),
+        # Prevent strings in the figure from ending the script
+        figure=figure.replace("</", "<\\/"),
+    )
+
+
+def export_figure(
+    fig_dict: dict[str, Any], file_format: ExportFormat, options: ExportOptions | None = None
+) -> bytes:
+    """Export a figure to a file.
+
+    Args:
+        fig_dict (dict[str, Any]): the figure as a dictionary, which
+            may contain typed arrays.
+        file_format (ExportFormat): the format of the file.
+        options (ExportOptions | None): the options of the export.
+            Defaults to ``ExportOptions()``.
+
+    Raises:
+        ValueError: the dictionary is not a valid figure.
+
+    Returns:
+        bytes: The contents of the file.
+    """
+    if options is None:
+        options = ExportOptions()
+    fig = go.Figure(decode_typed_arrays(fig_dict))
+
+    if file_format.is_image:
+        image: bytes = fig.to_image(
+            format=file_format.value, width=options.width, height=options.height
+        )
+        return image
+
+    content: bytes
+    if options.plotlyjs_url is None:
+        content = fig.to_html().encode()
+    else:
+        content = slim_html(fig.to_plotly_json(), options.plotlyjs_url).encode()
+
+    # mtime=0 keeps the file the same for the same figure
+    return gzip.compress(content, mtime=0) if options.compress else content
+
+
+def _warm_kaleido() -> None:
+    """Start the kaleido browser of an export process.
+
+    Exporting an empty figure starts the browser, which then keeps
+    running until the process exits.
+    """
+    go.Figure().to_image(format=ExportFormat.PNG.value, width=10, height=10)
+
+
+class ExportPool:
+    """Pool of processes exporting the images in ``export_queue``.
+
+    Every process starts a kaleido browser when it is started and
+    reuses it for all of its exports. The processes are started by the
+    first export and keep running until the pool is shut down, or are
+    started again when one of them crashed.
+
+    A thread takes the queued exports and hands them to the processes,
+    holding an ``export_slot`` for each running export. The exported
+    files are stored in ``figure_cache``, and the error messages of
+    failed exports in ``export_cache``.
+
+    Attributes:
+        max_workers (int): the number of export processes. Defaults to
+            ``EXPORT_WORKERS``.
+    """
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        """Initialize a pool whose processes are not started yet."""
+        self.max_workers = max_workers or _max_exports()
+        self._executor: ProcessPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start taking exports from the queue.
+
+        Does nothing if the pool is already running in this process.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._dispatch, name="export-pool", daemon=True)
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        """Stop taking exports from the queue and stop the processes."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _dispatch(self) -> None:
+        """Hand queued exports to the processes until shut down."""
+        while not self._stopped.is_set():
+            if not export_queue:
+                self._stopped.wait(EXPORT_POLL_INTERVAL)
+                continue
+
+            slot = export_slot()
+            slot.acquire()
+            try:
+                key, fig_dict, file_format, options = export_queue.popleft()
+            except IndexError:
+                # Taken by the pool of another worker
+                slot.release()
+                continue
+
+            # The figure may have been exported while it was queued
+            if key in figure_cache:
+                slot.release()
+                continue
+
+            export_cache.set(_EXPORT_STARTED_KEY.format(key), True, expire=EXPORT_TIMEOUT)
+            future = self._submit(fig_dict, file_format, options)
+            future.add_done_callback(partial(self._finish, key, slot))
+
+    def _submit(
+        self, fig_dict: dict[str, Any], file_format: ExportFormat, options: ExportOptions
+    ) -> "Future[bytes]":
+        """Export a figure on a process, restarting crashed ones."""
+        if self._executor is not None:
+            try:
+                return self._executor.submit(export_figure, fig_dict, file_format, options)
+            except BrokenProcessPool:
+                self._executor.shutdown(wait=False)
+
+        self._executor = ProcessPoolExecutor(self.max_workers, initializer=_warm_kaleido)
+        return self._executor.submit(export_figure, fig_dict, file_format, options)
+
+    @staticmethod
+    def _finish(key: str, slot: diskcache.BoundedSemaphore, future: "Future[bytes]") -> None:
+        """Store the result of an export and release its slot."""
+        slot.release()
+        try:
+            figure_cache.set(key, future.result())
+        # Any error is reported to the job waiting for the export
+        except Exception as error:
+            export_cache.set(
+                _EXPORT_ERROR_KEY.format(key),
+                str(error) or type(error).__name__,
+                expire=EXPORT_RESULT_MAX_AGE,
+            )
+
+
+export_pool = ExportPool()
+
+
+def export_image(
+    fig_dict: dict[str, Any],
+    file_format: ExportFormat,
+    options: ExportOptions | None = None,
+    on_start: Callable[[], None] | None = None,
+) -> bytes:
+    """Export a figure to an image on ``export_pool``.
+
+    The export is added to ``export_queue``, and this function waits
+    until a worker has exported it. The exported file is stored in
+    ``figure_cache`` under ``export_key``.
+
+    Args:
+        fig_dict (dict[str, Any]): the figure as a dictionary, which
+            may contain typed arrays.
+        file_format (ExportFormat): the image format of the file.
+        options (ExportOptions | None): the options of the export.
+            Defaults to ``ExportOptions()``.
+        on_start (Callable[[], None] | None): called when a worker
+            starts the export.
+
+    Raises:
+        ValueError: the figure could not be exported.
+        TimeoutError: the figure was not exported within
+            ``EXPORT_TIMEOUT`` seconds.
+
+    Returns:
+        bytes: The contents of the file.
+    """
+    if options is None:
+        options = ExportOptions()
+    key = export_key(fig_dict, file_format, options)
+    started_key = _EXPORT_STARTED_KEY.format(key)
+    error_key = _EXPORT_ERROR_KEY.format(key)
+
+    # Errors of earlier exports of the figure may have been transient
+    export_cache.delete(error_key)
+    export_queue.append((key, fig_dict, file_format, options))
+
+    started = False
+    deadline = time.monotonic() + EXPORT_TIMEOUT
+    while (content := figure_cache.get(key)) is None:
+        if (error := export_cache.get(error_key)) is not None:
+            raise ValueError(error)
+        if not started and started_key in export_cache:
+            started = True
+            if on_start is not None:
+                on_start()
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"The figure was not exported within {EXPORT_TIMEOUT} seconds")
+        time.sleep(EXPORT_POLL_INTERVAL)
+
+    image: bytes = content
+    return image
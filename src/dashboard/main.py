@@ -22,9 +22,14 @@ from dash.dependencies import Component
 from dotenv import load_dotenv
 from flask import Flask
 from flask_login import LoginManager
+import plotly.io as pio
 
 from dashboard.components.navbar_component import navbar_component
-from dashboard.models.user import User
+from dashboard.export import background_callback_manager
+from dashboard.export import blueprint as export_blueprint
+from dashboard.export import export_pool
+from dashboard.models.user import UserPrincipal, load_principal
+from dashboard.upload import blueprint as upload_blueprint
 
 external_stylesheets = [
     {
@@ -39,6 +44,10 @@ external_stylesheets = [
 
 load_dotenv()
 
+# Serialize callback responses with orjson, which is much faster than
+# the json module for figures with large arrays.
+pio.json.config.default_engine = "orjson"
+
 server = Flask(__name__)
 app = Dash(
     __name__,
@@ -46,6 +55,7 @@ app = Dash(
     use_pages=True,
     external_stylesheets=external_stylesheets,
     suppress_callback_exceptions=True,
+    background_callback_manager=background_callback_manager,
 )
 
 server.secret_key = os.environ["SECRET_KEY"]
@@ -53,18 +63,23 @@ login_manager = LoginManager()
 login_manager.init_app(server)
 login_manager.login_view = "/login"
 
+server.register_blueprint(upload_blueprint)
+server.register_blueprint(export_blueprint)
+
+# Export the images queued by background jobs in this worker
+export_pool.start()
+
 
 @login_manager.user_loader
-def load_user(user_id: str) -> User:
+def load_user(user_id: str) -> UserPrincipal | None:
     """Load a user by id.
 
+    Only the principal of the user is loaded, see ``UserPrincipal``.
+
     Required by flask-login. For more information, see
     https://flask-login.readthedocs.io/en/latest/#your-user-class
     """
-    user: User = User.objects(id=user_id).get()
-    user.is_authenticated = True
-
-    return user
+    return load_principal(user_id)
 
 
 PORT = 8000
@@ -0,0 +1,7 @@
+"""Database migrations.
+
+Each module migrates the user database from one layout to the next and
+can be run as a script, e.g.::
+
+    $ python -m dashboard.migrations.embedded_dashboards
+"""
@@ -0,0 +1,57 @@
+"""Add search terms to dashboards stored without them.
+
+Dashboards store the words of their name and description in
+``search_terms``, see ``DashboardQuerySet.search``. This migration
+backfills the search terms of dashboards created before search terms
+were added. Dashboards moved by ``embedded_dashboards`` already get
+their search terms when they are moved.
+
+Examples:
+    Migrating the user database at ``DB_URL``::
+
+        $ python -m dashboard.migrations.dashboard_search_terms
+"""
+from typing import Any
+
+from pymongo import UpdateOne
+from pymongo.database import Database
+
+from dashboard.models.db import USER_DB_NAME, get_client
+from dashboard.models.user import Dashboard, search_terms
+
+BATCH_SIZE = 1000
+
+
+def migrate(db: Database[dict[str, Any]]) -> int:
+    """Add search terms to all dashboards without them.
+
+    Args:
+        db (Database): the user database.
+
+    Returns:
+        int: The number of updated dashboards.
+    """
+    dashboards = db[Dashboard._get_collection_name()]
+    cursor = dashboards.find(
+        {"search_terms": {"$exists": False}}, {"name": True, "description": True}
+    )
+
+    updated = 0
+    batch: list[UpdateOne] = []
+    for dashboard in cursor:
+        terms = search_terms(dashboard.get("name"), dashboard.get("description"))
+        batch.append(UpdateOne({"_id": dashboard["_id"]}, {"$set": {"search_terms": terms}}))
+
+        if len(batch) == BATCH_SIZE:
+            updated += dashboards.bulk_write(batch).modified_count
+            batch = []
+
+    if batch:
+        updated += dashboards.bulk_write(batch).modified_count
+
+    return updated
+
+
+if __name__ == "__main__":
+    updated = migrate(get_client()[USER_DB_NAME])
+    print(f"Added search terms to {updated} dashboards")
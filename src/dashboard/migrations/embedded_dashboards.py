@@ -0,0 +1,85 @@
+"""Move dashboards embedded in users to the dashboards collection.
+
+Dashboards used to be stored in the ``dashboards`` array of the user
+documents. They are now stored in their own collection, with the user
+stored as ``owner``.
+
+The migration can be stopped and run again at any point. Every
+embedded dashboard is first given an id, which is then used to upsert
+it into the dashboards collection, so a dashboard is never copied
+twice. The array is only removed from the user once all of its
+dashboards are copied.
+
+Older dashboards have no ``modified`` time, which is set to their
+``created`` time, since dashboards are paged by modified time.
+
+Examples:
+    Migrating the user database at ``DB_URL``::
+
+        $ python -m dashboard.migrations.embedded_dashboards
+"""
+from typing import Any
+
+from bson.objectid import ObjectId
+from pymongo import ReplaceOne
+from pymongo.database import Database
+
+from dashboard.models.db import USER_DB_NAME, get_client
+from dashboard.models.user import Dashboard, User, search_terms
+
+
+def migrate_user(db: Database[dict[str, Any]], user: dict[str, Any]) -> int:
+    """Move the embedded dashboards of a user to their own collection.
+
+    Args:
+        db (Database): the user database.
+        user (dict[str, Any]): the user document.
+
+    Returns:
+        int: The number of moved dashboards.
+    """
+    users = db[User._get_collection_name()]
+    dashboards = db[Dashboard._get_collection_name()]
+    embedded: list[dict[str, Any]] = user.get("dashboards", [])
+
+    if any("_id" not in dashboard for dashboard in embedded):
+        for dashboard in embedded:
+            dashboard.setdefault("_id", ObjectId())
+        users.update_one({"_id": user["_id"]}, {"$set": {"dashboards": embedded}})
+
+    replacements = []
+    for dashboard in embedded:
+        document = {
+            **dashboard,
+            "owner": user["_id"],
+            "search_terms": search_terms(dashboard.get("name"), dashboard.get("description")),
+        }
+        if not document.get("modified") and document.get("created"):
+            document["modified"] = document["created"]
+        replacements.append(ReplaceOne({"_id": dashboard["_id"]}, document, upsert=True))
+
+    if replacements:
+        dashboards.bulk_write(replacements)
+
+    users.update_one({"_id": user["_id"]}, {"$unset": {"dashboards": ""}})
+
+    return len(embedded)
+
+
+def migrate(db: Database[dict[str, Any]]) -> int:
+    """Move all embedded dashboards to the dashboards collection.
+
+    Args:
+        db (Database): the user database.
+
+    Returns:
+        int: The number of moved dashboards.
+    """
+    users = db[User._get_collection_name()]
+
+    return sum(migrate_user(db, user) for user in users.find({"dashboards": {"$exists": True}}))
+
+
+if __name__ == "__main__":
+    moved = migrate(get_client()[USER_DB_NAME])
+    print(f"Moved {moved} dashboards")
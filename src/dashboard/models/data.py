@@ -1,15 +1,41 @@
 """Models related to measurement data."""
 
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
+from itertools import islice
 from typing import Any, Union
 
+from bson.dbref import DBRef
 from bson.objectid import ObjectId
-from mongoengine import DateTimeField, Document, EnumField, ReferenceField, StringField, signals
-
-
-@dataclass
+from mongoengine import (
+    DateTimeField,
+    Document,
+    DoesNotExist,
+    EnumField,
+    QuerySet,
+    ReferenceField,
+    StringField,
+    signals,
+)
+from mongoengine.connection import get_db
+import numpy as np
+import numpy.typing as npt
+import polars as pl
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+from dashboard.cache import LRUCache
+from dashboard.models.db import project_alias
+
+SETTINGS_CACHE_SIZE = 1024
+SETTINGS_CACHE_TTL = 600
+
+FloatArray = npt.NDArray[np.float64]
+
+
+@dataclass(slots=True)
 class Setting:
     """Setting model.
 
@@ -24,7 +50,166 @@ class Setting:
     unit: str | None = None
 
 
-class Settings(Document):
+class ProjectDocument:
+    """Mixin for documents stored in project dbs.
+
+    Documents are queried in the project db connected to the ``data``
+    alias by default. ``in_project`` queries any other project db.
+
+    Documents loaded by a ``ProjectQuerySet`` are bound to the
+    collection they were loaded from, so ``save``, ``reload``,
+    ``modify`` and ``delete`` use the db the document came from, and
+    references are dereferenced from it, see ``ProjectReferenceField``.
+    """
+
+    _meta: dict[str, Any]
+    _get_collection_name: Callable[[], str]
+    _collection: Collection[dict[str, Any]] | None
+    _get_collection: Callable[[], Collection[dict[str, Any]]]
+    _get_db: Callable[[], Database[dict[str, Any]]]
+
+    def bind_collection(self, collection: Collection[dict[str, Any]]) -> None:
+        """Read and write the document in a collection.
+
+        Like ``Document.switch_db``, but without switching the db of the
+        document class, which would affect concurrent requests.
+
+        Args:
+            collection (Collection[dict[str, Any]]): the collection of
+                the document.
+        """
+        self._collection = collection
+        self._get_collection = lambda: collection
+        self._get_db = lambda: collection.database
+
+    @classmethod
+    def in_project(cls, db_name: str) -> QuerySet:
+        """Return a query set for the documents of a project db.
+
+        The query set is created directly on the collection of the
+        project db. Unlike ``switch_db`` and ``QuerySet.using``, this
+        does not change the document class, even temporarily, so
+        concurrent requests can query different project dbs, and the
+        ``data`` alias does not need to be connected. Documents loaded
+        this way are bound to the project db, see ``bind_collection``.
+
+        Args:
+            db_name (str): the name of the project db.
+
+        Returns:
+            QuerySet: A query set of all documents in the project db.
+
+        Examples:
+            Loading the xy data of a project:
+
+            >>> Data.in_project("rig-7")(type="xy_plot").with_settings()
+            [<Data: Data object>, ...]
+        """
+        collection = get_db(project_alias(db_name))[cls._get_collection_name()]
+        queryset_class: type[QuerySet] = cls._meta.get("queryset_class", ProjectQuerySet)
+
+        return queryset_class(cls, collection)
+
+
+class ProjectQuerySet(QuerySet):
+    """Query set for documents stored in project dbs.
+
+    Loaded documents are bound to the collection of the query set, see
+    ``ProjectDocument.bind_collection``.
+    """
+
+    def _bind(self, value: Any) -> Any:
+        """Bind a loaded document to the collection of the query set."""
+        if isinstance(value, ProjectDocument):
+            value.bind_collection(self._collection)
+
+        return value
+
+    def __next__(self) -> Any:
+        """Return the next document."""
+        return self._bind(super().__next__())
+
+    def __getitem__(self, key: Any) -> Any:
+        """Return a document by index, or a query set by slice."""
+        return self._bind(super().__getitem__(key))
+
+    def modify(self, *args: Any, **kwargs: Any) -> Any:
+        """Update and return a document, see ``QuerySet.modify``."""
+        result = super().modify(*args, **kwargs)
+        if isinstance(result, dict):
+            self._bind(result.get("value"))
+
+        return self._bind(result)
+
+
+class ProjectReferenceField(ReferenceField):
+    """Reference to a document in the same project db.
+
+    ``ReferenceField`` dereferences from the db of the referenced
+    document class. This field instead dereferences from the db of the
+    referencing document, which is bound to the project db it was
+    loaded from, see ``ProjectDocument.bind_collection``.
+    """
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        """Dereference the document from the db of the instance.
+
+        Raises:
+            DoesNotExist: the referenced document does not exist.
+        """
+        if instance is None:
+            return self
+
+        ref = instance._data.get(self.name)
+        if isinstance(ref, DBRef) and instance._fields[self.name]._auto_dereference:
+            collection = instance._get_db()[ref.collection]
+            son = collection.find_one({"_id": ref.id})
+            if son is None:
+                raise DoesNotExist(f"Trying to dereference unknown document {ref}")
+
+            document = self.document_type._from_son(son)
+            document.bind_collection(collection)
+            instance._data[self.name] = document
+
+        return super().__get__(instance, owner)
+
+
+class SettingsQuerySet(ProjectQuerySet):
+    """Query set for Settings documents.
+
+    Documents changed by ``update`` and ``modify`` are removed from
+    ``settings_cache``, like documents changed by ``save``.
+    """
+
+    def _invalidate(self, ids: Iterable[ObjectId]) -> None:
+        """Remove documents of the query set's db from the cache."""
+        db_name = self._collection.database.name
+        for settings_id in ids:
+            settings_cache.invalidate((db_name, settings_id))
+
+    def update(self, *args: Any, **kwargs: Any) -> Any:
+        """Update the matched documents, see ``QuerySet.update``.
+
+        The ids of the matched documents are queried before the update,
+        since the update may change the fields of the query.
+        """
+        ids = [son["_id"] for son in self._collection.find(self._query, {"_id": True})]
+        result = super().update(*args, **kwargs)
+        self._invalidate(ids)
+
+        return result
+
+    def modify(self, *args: Any, **kwargs: Any) -> Any:
+        """Update and return a document, see ``QuerySet.modify``."""
+        result = super().modify(*args, **kwargs)
+        document = result.get("value") if isinstance(result, dict) else result
+        if isinstance(document, Settings):
+            self._invalidate([document.id])
+
+        return result
+
+
+class Settings(ProjectDocument, Document):
     """Settings database model.
 
     The settings document has a fairly dynamic schema. Each settings
@@ -34,7 +219,9 @@ class Settings(Document):
 
     The dynamic schema requires a workaround to make usable. MongoEngine
     does not support unknown keys having values of a known type. The
-    ``post_init`` method is used to initialize these.
+    ``settings`` property parses these on first use. The parsed
+    settings of loaded documents are cached in ``settings_cache`` and
+    invalidated when the document is saved, updated or deleted.
 
     Attributes:
         test_case (str): The name of the test case.
@@ -43,26 +230,81 @@ class Settings(Document):
             test.
     """
 
-    meta = {"strict": False, "db_alias": "data"}
+    # Indexes are created with ``dashboard.models.indexes``, since
+    # project dbs are written by test rigs and can be large.
+    meta = {
+        "strict": False,
+        "db_alias": "data",
+        "queryset_class": SettingsQuerySet,
+        "indexes": [{"fields": ["test_case", "-time"]}, "-time"],
+        "auto_create_index": False,
+    }
 
     test_case: str = StringField(required=True)
     time: datetime = DateTimeField(required=True)
-    settings: dict[str, Setting]
+    _settings: dict[str, Setting] | None = None
 
-    @staticmethod
-    def post_init(sender: type, document: "Settings", **kwargs: Any) -> None:
-        """Initialize dynamic settings."""
-        document.settings = {}
+    def _cache_key(self) -> tuple[str, ObjectId]:
+        """Return the key of the document in ``settings_cache``.
+
+        Project dbs are separate, so documents with the same id in
+        different project dbs are different documents.
+        """
+        return self._get_db().name, self.id
 
-        for name, setting in document._data.items():
+    @property
+    def settings(self) -> dict[str, Setting]:
+        """The settings of the document, parsed on first use.
+
+        Settings of documents loaded from the db are cached by db and
+        id, see ``settings_cache``. Documents are bound to their db when
+        loaded, see ``ProjectDocument.bind_collection``, so the db is
+        known when the settings are first used.
+        """
+        if self._settings is not None:
+            return self._settings
+
+        from_db = not self._created and self.id is not None
+
+        if from_db and (cached := settings_cache.get(self._cache_key())) is not None:
+            # Settings are mutable, so every document gets its own
+            self._settings = {name: Setting(value, unit) for name, value, unit in cached}
+            return self._settings
+
+        self._settings = {}
+
+        for name, setting in self._data.items():
             try:
-                document.settings[name] = Setting(**setting)
+                self._settings[name] = Setting(**setting)
             except TypeError:
                 pass
 
+        if from_db:
+            settings_cache.set(
+                self._cache_key(),
+                tuple(
+                    (name, setting.value, setting.unit) for name, setting in self._settings.items()
+                ),
+            )
+
+        return self._settings
 
-# Enable the post_init callback for Settings objects
-signals.post_init.connect(Settings.post_init, sender=Settings)
+    @staticmethod
+    def invalidate_cache(sender: type, document: "Settings", **kwargs: Any) -> None:
+        """Remove a changed or deleted document from the cache."""
+        settings_cache.invalidate(document._cache_key())
+        document._settings = None
+
+
+# Parsed settings as (name, value, unit) tuples, keyed by project db
+# name and settings document id. Many data documents share a settings
+# document, so the same settings are loaded often.
+settings_cache: LRUCache[
+    tuple[str, ObjectId], tuple[tuple[str, str | float, str | None], ...]
+] = LRUCache(maxsize=SETTINGS_CACHE_SIZE, ttl=SETTINGS_CACHE_TTL)
+
+signals.post_save.connect(Settings.invalidate_cache, sender=Settings)
+signals.post_delete.connect(Settings.invalidate_cache, sender=Settings)
 
 
 class DataType(Enum):
@@ -73,8 +315,54 @@ class DataType(Enum):
     ARRAY = "array"
 
 
-# TODO: to polars df
-class Data(Document):
+class DataQuerySet(ProjectQuerySet):
+    """Query set for Data documents.
+
+    Adds batched dereferencing of the settings documents referenced by
+    the data documents.
+    """
+
+    def with_settings(self) -> list["Data"]:
+        """Evaluate the query and load all referenced settings at once.
+
+        Accessing ``Data.settings`` normally issues one query per data
+        document. This method instead loads the settings of all data
+        documents with a single ``$in`` query. Data documents which
+        share a settings document share the same ``Settings`` instance,
+        so its settings are only parsed once.
+
+        Returns:
+            A list of the Data documents matched by the query set.
+
+        Examples:
+            Loading all xy data together with its settings:
+
+            >>> Data.objects(type="xy_plot").with_settings()
+            [<Data: Data object>, ...]
+        """
+        documents: list[Data] = list(self)
+        refs = [document._data.get("settings") for document in documents]
+        settings_ids = list({ref.id for ref in refs if isinstance(ref, DBRef)})
+
+        if not settings_ids:
+            return documents
+
+        # Query the collection of the query set's database, so that
+        # settings are loaded from the same database as the data.
+        settings_collection = self._collection.database[Settings._get_collection_name()]
+        settings: dict[ObjectId, Settings] = {}
+        for son in settings_collection.find({"_id": {"$in": settings_ids}}):
+            settings[son["_id"]] = Settings._from_son(son)
+            settings[son["_id"]].bind_collection(settings_collection)
+
+        for document, ref in zip(documents, refs):
+            if isinstance(ref, DBRef) and ref.id in settings:
+                document._data["settings"] = settings[ref.id]
+
+        return documents
+
+
+class Data(ProjectDocument, Document):
     """Database model for the data document.
 
     The data document has three sub types: numeric, array and xy-plot.
@@ -96,6 +384,11 @@ class Data(Document):
     which are not subclasses of this class. Doing this avoid the issues
     with MongoEngine subclasses.
 
+    Resolving documents one at a time is slow for large queries. Use
+    ``load_data_frames`` to load many documents into polars data frames
+    instead. When documents are needed, ``Data.objects.with_settings``
+    avoids one settings query per document.
+
     Attributes:
         settings (Settings): Settings document model.
         name (str): Name of data document
@@ -108,9 +401,16 @@ class Data(Document):
         XyPlot(x=[...], y=[...])
     """
 
-    meta = {"strict": False, "db_alias": "data"}
+    # Indexes are created with dashboard.models.indexes, see Settings
+    meta = {
+        "strict": False,
+        "db_alias": "data",
+        "queryset_class": DataQuerySet,
+        "indexes": [{"fields": ["settings", "type"]}, {"fields": ["type", "name"]}, "name"],
+        "auto_create_index": False,
+    }
 
-    settings: Settings = ReferenceField(Settings, required=True, db_field="settings_id")
+    settings: Settings = ProjectReferenceField(Settings, required=True, db_field="settings_id")
     name: str = StringField(required=True)
     type: DataType = EnumField(DataType, required=True)
 
@@ -129,7 +429,7 @@ class Data(Document):
                 raise TypeError(f"Could not resolve data, unknown data type: {self.type}")
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class BaseData:
     """Base class for data specializations.
 
@@ -149,7 +449,7 @@ class BaseData:
     type: DataType
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class NumericData(BaseData):
     """Numeric data model.
 
@@ -162,20 +462,24 @@ class NumericData(BaseData):
     unit: str | None = None
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ArrayData(BaseData):
     """Array data model.
 
     Attributes:
-        value (list[float]): the list of values.
+        value (FloatArray): the array of values.
         unit (str | None): optionally, the unit of the data.
     """
 
-    value: list[float]
+    value: FloatArray
     unit: str | None = None
 
+    def __post_init__(self) -> None:
+        """Convert the values to a float64 array."""
+        self.value = _to_float_array(self.value)
+
 
-@dataclass
+@dataclass(slots=True)
 class Marker:
     """Plot marker.
 
@@ -190,28 +494,353 @@ class Marker:
     y: float
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class XyData(BaseData):
     """XY plot data model.
 
     Attributes:
-        x (list[float]): x sequence.
-        y (list[float]): y sequence.
+        x (FloatArray): x sequence.
+        y (FloatArray): y sequence.
         x_unit (str | None): Optional unit of x axis.
         y_unit (str | None): Optional unit of y axis.
-        markers (list[Marker]): List of markers
+        markers (list[Marker]): List of markers. Marker dicts, e.g.
+            from the data document, are converted to Marker objects.
     """
 
-    x: list[float]
-    y: list[float]
+    x: FloatArray
+    y: FloatArray
     x_unit: str | None = None
     y_unit: str | None = None
     markers: list[Marker] = field(default_factory=list)
 
     def __post_init__(self) -> None:
-        """Post initialize xy data.
-
-        Convert marker dicts to Marker objects.
+        """Convert the sequences to float64 arrays and the markers."""
+        self.x = _to_float_array(self.x)
+        self.y = _to_float_array(self.y)
+        # Before post_init markers may be marker dicts
+        self.markers = [
+            marker if isinstance(marker, Marker) else Marker(**marker)  # type: ignore
+            for marker in self.markers
+        ]
+
+    def to_frame(self) -> pl.DataFrame:
+        """Return a data frame with an x and a y column.
+
+        The data frame can be passed directly to ``trace``.
         """
-        # Before post_init self.markers is a list of marker dicts.
-        self.markers = [Marker(**marker) for marker in self.markers]  # type: ignore
+        return pl.DataFrame({"x": self.x, "y": self.y})
+
+
+def _to_float_array(values: Any) -> FloatArray:
+    """Convert a sequence to a contiguous float64 array.
+
+    Arrays which already are contiguous float64 arrays are not copied.
+    """
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+# Column schemas of the data frames returned by ``load_data_frames``.
+DATA_FRAME_SCHEMAS: dict[DataType, dict[str, pl.PolarsDataType]] = {
+    DataType.NUMERIC: {
+        "id": pl.Utf8,
+        "settings_id": pl.Utf8,
+        "name": pl.Utf8,
+        "value": pl.Float64,
+        "unit": pl.Utf8,
+    },
+    DataType.ARRAY: {
+        "id": pl.Utf8,
+        "settings_id": pl.Utf8,
+        "name": pl.Utf8,
+        "value": pl.List(pl.Float64),
+        "unit": pl.Utf8,
+    },
+    DataType.XY_PLOT: {
+        "id": pl.Utf8,
+        "settings_id": pl.Utf8,
+        "name": pl.Utf8,
+        "x": pl.List(pl.Float64),
+        "y": pl.List(pl.Float64),
+        "x_unit": pl.Utf8,
+        "y_unit": pl.Utf8,
+    },
+}
+
+# Field names in the db differ from the column names for these columns.
+_DB_FIELDS = {"id": "_id"}
+
+# Fields of data documents needed for the data frames
+_DATA_PROJECTION = {
+    _DB_FIELDS.get(column, column): True
+    for schema in DATA_FRAME_SCHEMAS.values()
+    for column in schema
+} | {"type": True}
+
+
+def _frame_from_documents(data_type: DataType, documents: list[dict[str, Any]]) -> pl.DataFrame:
+    """Create a data frame from raw data documents of a single type."""
+    schema = DATA_FRAME_SCHEMAS[data_type]
+    columns: dict[str, list[Any]] = {}
+
+    for column in schema:
+        db_field = _DB_FIELDS.get(column, column)
+        values = [document.get(db_field) for document in documents]
+
+        if schema[column] == pl.Utf8:
+            values = [value if value is None else str(value) for value in values]
+
+        columns[column] = values
+
+    return pl.DataFrame(columns, schema=schema)
+
+
+def _batches(cursor: Iterator[dict[str, Any]], batch_size: int) -> Iterator[list[dict[str, Any]]]:
+    """Split a cursor into lists of at most ``batch_size`` documents."""
+    while batch := list(islice(cursor, batch_size)):
+        yield batch
+
+
+def load_data_frames(
+    query: Mapping[str, Any] | None = None,
+    batch_size: int = 10_000,
+    project: str | None = None,
+) -> dict[DataType, pl.DataFrame]:
+    """Load data documents into one polars data frame per data type.
+
+    The documents are read with a raw pymongo cursor, which avoids
+    creating a MongoEngine document and a resolved data class for
+    every row. The cursor is consumed in batches, each batch is
+    converted to a data frame before the next batch is read.
+
+    Object ids are stored as hex strings in the ``id`` and
+    ``settings_id`` columns. See ``DATA_FRAME_SCHEMAS`` for the columns
+    of each data type.
+
+    Args:
+        query (Mapping[str, Any] | None): a pymongo filter used to
+            select data documents. All documents are loaded if omitted.
+        batch_size (int): the number of documents to convert at a time.
+        project (str | None): the name of the project db to load from.
+            Defaults to the project db connected to the ``data`` alias.
+
+    Returns:
+        A dict with a data frame for every data type. Data frames for
+        data types without any matching documents are empty.
+
+    Raises:
+        TypeError: a document has an unknown data type.
+
+    Examples:
+        Loading all xy data for a settings document:
+
+        >>> frames = load_data_frames({"settings_id": settings_id})
+        >>> frames[DataType.XY_PLOT]
+        shape: (..., 7)
+    """
+    queryset = Data.objects if project is None else Data.in_project(project)
+    cursor = queryset._collection.find(query or {}, _DATA_PROJECTION, batch_size=batch_size)
+
+    return _frames_from_cursor(cursor, batch_size)
+
+
+def _frames_from_cursor(
+    cursor: Iterator[dict[str, Any]], batch_size: int
+) -> dict[DataType, pl.DataFrame]:
+    """Convert raw data documents to one data frame per data type.
+
+    Raises:
+        TypeError: a document has an unknown data type.
+    """
+    chunks: dict[DataType, list[pl.DataFrame]] = {data_type: [] for data_type in DataType}
+
+    for batch in _batches(cursor, batch_size):
+        documents: dict[DataType, list[dict[str, Any]]] = {data_type: [] for data_type in DataType}
+
+        for document in batch:
+            try:
+                data_type = DataType(document.get("type"))
+            except ValueError as err:
+                raise TypeError(
+                    f"Could not load data, unknown data type: {document.get('type')}"
+                ) from err
+
+            documents[data_type].append(document)
+
+        for data_type, typed_documents in documents.items():
+            if typed_documents:
+                chunks[data_type].append(_frame_from_documents(data_type, typed_documents))
+
+    return {
+        data_type: pl.concat(frames, rechunk=True)
+        if frames
+        else pl.DataFrame(schema=DATA_FRAME_SCHEMAS[data_type])
+        for data_type, frames in chunks.items()
+    }
+
+
+class Comparison(Enum):
+    """Contains the comparisons available in setting conditions."""
+
+    EQ = "$eq"
+    NE = "$ne"
+    GT = "$gt"
+    GTE = "$gte"
+    LT = "$lt"
+    LTE = "$lte"
+
+
+@dataclass(slots=True)
+class SettingCondition:
+    """Condition on the value of a setting.
+
+    Attributes:
+        name (str): the name of the setting.
+        comparison (Comparison): how the value of the setting is
+            compared to ``value``.
+        value (Any): the value to compare with.
+        unit (str | None): the unit the setting must have, or None to
+            match any unit.
+
+    Examples:
+        The condition ``set_1_1 > 2 cm``:
+
+        >>> SettingCondition("set_1_1", Comparison.GT, 2, "cm")
+    """
+
+    name: str
+    comparison: Comparison
+    value: Any
+    unit: str | None = None
+
+
+def settings_query(
+    test_case: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    conditions: Sequence[SettingCondition] = (),
+) -> dict[str, Any]:
+    """Create a pymongo filter selecting settings documents.
+
+    Args:
+        test_case (str | None): the test case of the settings, or None
+            to match any test case.
+        start (datetime | None): the earliest time of the settings,
+            inclusive.
+        end (datetime | None): the latest time of the settings,
+            exclusive.
+        conditions (Sequence[SettingCondition]): conditions which must
+            all hold for the settings.
+
+    Raises:
+        ValueError: a setting name is not a valid field name.
+
+    Returns:
+        dict[str, Any]: The filter.
+    """
+    query: dict[str, Any] = {}
+
+    if test_case is not None:
+        query["test_case"] = test_case
+
+    if start is not None:
+        query.setdefault("time", {})["$gte"] = start
+
+    if end is not None:
+        query.setdefault("time", {})["$lt"] = end
+
+    for condition in conditions:
+        if not condition.name or condition.name.startswith("$") or "." in condition.name:
+            raise ValueError(f"Invalid setting name: {condition.name!r}")
+
+        value_query = query.setdefault(f"{condition.name}.value", {})
+        value_query[condition.comparison.value] = condition.value
+
+        if condition.unit is not None:
+            query[f"{condition.name}.unit"] = condition.unit
+
+    return query
+
+
+def query_data_frames(
+    test_case: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    conditions: Sequence[SettingCondition] = (),
+    data_type: DataType | None = None,
+    batch_size: int = 10_000,
+    project: str | None = None,
+) -> dict[DataType, pl.DataFrame]:
+    """Load the data of settings matching a query.
+
+    The settings are filtered and joined with their data by a single
+    aggregation, which runs in the db. Only the matching data is sent
+    to the server. The filters on test case and time are served by the
+    settings indexes, and the join by the ``(settings_id, type)`` index
+    of the data, see ``dashboard.models.indexes``.
+
+    Args:
+        test_case (str | None): the test case of the settings, or None
+            to match any test case.
+        start (datetime | None): the earliest time of the settings,
+            inclusive.
+        end (datetime | None): the latest time of the settings,
+            exclusive.
+        conditions (Sequence[SettingCondition]): conditions which must
+            all hold for the settings.
+        data_type (DataType | None): the type of data to load, or None
+            to load all types.
+        batch_size (int): the number of documents to convert at a time.
+        project (str | None): the name of the project db to load from.
+            Defaults to the project db connected to the ``data`` alias.
+
+    Raises:
+        ValueError: a setting name is not a valid field name.
+
+    Returns:
+        A dict with a data frame for every data type, with the columns
+        of ``DATA_FRAME_SCHEMAS``. Data frames for data types without
+        any matching documents are empty.
+
+    Examples:
+        Loading the xy data of test case T in May 2023, where setting
+        ``set_1_1`` is larger than 2 cm:
+
+        >>> over_2_cm = SettingCondition(
+        ...     "set_1_1", Comparison.GT, 2, "cm"
+        ... )
+        >>> frames = query_data_frames(
+        ...     test_case="T",
+        ...     start=datetime(2023, 5, 1),
+        ...     end=datetime(2023, 6, 1),
+        ...     conditions=[over_2_cm],
+        ...     data_type=DataType.XY_PLOT,
+        ... )
+        >>> frames[DataType.XY_PLOT]
+        shape: (..., 7)
+    """
+    data_query: dict[str, Any] = {"$expr": {"$eq": ["$settings_id", "$$settings_id"]}}
+    if data_type is not None:
+        data_query["type"] = data_type.value
+
+    pipeline: list[dict[str, Any]] = [
+        {"$match": settings_query(test_case, start, end, conditions)},
+        {"$project": {"_id": True}},
+        {
+            "$lookup": {
+                "from": Data._get_collection_name(),
+                "let": {"settings_id": "$_id"},
+                # Filtering the type in the lookup uses the
+                # (settings_id, type) index, instead of loading all data
+                # of the settings and filtering it after the join.
+                "pipeline": [{"$match": data_query}, {"$project": _DATA_PROJECTION}],
+                "as": "data",
+            }
+        },
+        {"$unwind": "$data"},
+        {"$replaceRoot": {"newRoot": "$data"}},
+    ]
+
+    queryset = Settings.objects if project is None else Settings.in_project(project)
+    cursor = queryset._collection.aggregate(pipeline, batchSize=batch_size)
+
+    return _frames_from_cursor(cursor, batch_size)
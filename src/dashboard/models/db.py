@@ -5,22 +5,169 @@ User information such as usernames, dashboards etc. are stored in the
 
 Each project is stored in its own database. These databases contain
 three collections: data, settings, and metadata.
+
+Every process uses a single pooled ``MongoClient``, see ``get_client``,
+which is shared by all mongoengine aliases and raw pymongo queries. The
+pool is configured with the environment variables below, which are all
+optional:
+
+* ``DB_MAX_POOL_SIZE``: the maximum number of connections.
+* ``DB_MIN_POOL_SIZE``: the number of connections kept open.
+* ``DB_CONNECT_TIMEOUT_MS``: the timeout when opening a connection.
+* ``DB_SERVER_SELECTION_TIMEOUT_MS``: the timeout when no server is
+  available.
+
+Project databases are queried with the ``in_project`` method of the
+project db documents, which use an alias per project, see
+``project_alias``.
+
+Project databases are found by ``list_project_dbs``. Since listing the
+collections of every database on the cluster is slow, the found
+project databases are cached in memory and in the ``project_catalog``
+collection of the user database.
 """
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import os
+import threading
 from typing import Any
 
 from dotenv import load_dotenv
 import mongoengine
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
 from pymongo.database import Database
 
 from dashboard import config
+from dashboard.cache import LRUCache
 
 load_dotenv()
 
 DB_URL_ENV_NAME = "DB_URL"
 USER_DB_NAME = "dashboard"
 
+# Time to live of the project catalog in memory and in the user db
+PROJECT_CATALOG_TTL = 60
+PROJECT_CATALOG_MAX_AGE = timedelta(hours=1)
+PROJECT_CATALOG_COLLECTION = "project_catalog"
+PROJECT_CATALOG_ID = "project_dbs"
+# The maximum number of databases checked concurrently
+MAX_DISCOVERY_WORKERS = 16
+# Databases which are never project databases
+SYSTEM_DB_NAMES = frozenset({"admin", "config", "local", USER_DB_NAME})
+
+# Prefix of the mongoengine aliases of project dbs, see project_alias
+PROJECT_ALIAS_PREFIX = "project:"
+
+POOL_OPTION_ENV_NAMES = {
+    "maxPoolSize": "DB_MAX_POOL_SIZE",
+    "minPoolSize": "DB_MIN_POOL_SIZE",
+    "connectTimeoutMS": "DB_CONNECT_TIMEOUT_MS",
+    "serverSelectionTimeoutMS": "DB_SERVER_SELECTION_TIMEOUT_MS",
+}
+
+
+class PoolStatistics(monitoring.ConnectionPoolListener):
+    """Counts connection pool events of the process client.
+
+    Events are reported by the threads of the pool, so the counts are
+    updated under a lock.
+
+    Attributes:
+        created (int): the number of connections opened.
+        closed (int): the number of connections closed.
+        checked_out (int): the number of times a connection was taken
+            from the pool.
+        checked_in (int): the number of times a connection was returned
+            to the pool.
+        failed_checkouts (int): the number of times no connection could
+            be taken from the pool, e.g. because of a timeout.
+    """
+
+    def __init__(self) -> None:
+        """Initialize all counts to zero."""
+        self.reset()
+
+    def reset(self) -> None:
+        """Set all counts to zero.
+
+        The lock is replaced rather than acquired, so the statistics
+        can be reset in a forked process, where the lock may be held by
+        a thread of the parent process.
+        """
+        self._lock = threading.Lock()
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checked_in = 0
+        self.failed_checkouts = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the counts and the open and used connections."""
+        with self._lock:
+            return {
+                "created": self.created,
+                "closed": self.closed,
+                "open": self.created - self.closed,
+                "checked_out": self.checked_out,
+                "checked_in": self.checked_in,
+                "in_use": self.checked_out - self.checked_in,
+                "failed_checkouts": self.failed_checkouts,
+            }
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        """Ignore pool creation."""
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        """Ignore pools becoming ready."""
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        """Ignore pools being cleared."""
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        """Ignore pools being closed."""
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        """Count an opened connection."""
+        with self._lock:
+            self.created += 1
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        """Ignore connections becoming ready."""
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        """Count a closed connection."""
+        with self._lock:
+            self.closed += 1
+
+    def connection_check_out_started(
+        self, event: monitoring.ConnectionCheckOutStartedEvent
+    ) -> None:
+        """Ignore started check outs."""
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        """Count a failed check out."""
+        with self._lock:
+            self.failed_checkouts += 1
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        """Count a connection taken from the pool."""
+        with self._lock:
+            self.checked_out += 1
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        """Count a connection returned to the pool."""
+        with self._lock:
+            self.checked_in += 1
+
+
+# The alias of the process client, which is registered on first use
+CLIENT_ALIAS = "process-client"
+
+_lock = threading.RLock()
+_pool_statistics = PoolStatistics()
+# Database names of the mongoengine aliases using the process client
+_aliases: dict[str, str] = {}
+
 
 def _get_db_url() -> str:
     """Find the db url from the environment."""
@@ -31,16 +178,126 @@ def _get_db_url() -> str:
     return db_url
 
 
-def _connect_mock_db(db_name: str, alias: str = "default") -> None:
-    import mongomock
+def _pool_options() -> dict[str, Any]:
+    """Read the connection pool options from the environment.
 
-    mongoengine.connect(
-        db=db_name,
-        alias=alias,
-        host="127.0.0.1",
-        mongo_client_class=mongomock.MongoClient,
-        uuidRepresentation="standard",
-    )
+    Raises:
+        ValueError: an option is not an integer.
+    """
+    options: dict[str, Any] = {}
+    for option, env_name in POOL_OPTION_ENV_NAMES.items():
+        value = os.getenv(env_name)
+        if value:
+            options[option] = int(value)
+
+    return options
+
+
+def _connection_settings() -> dict[str, Any]:
+    """Return the mongoengine connection settings of the process client.
+
+    Mongoengine shares a client between aliases with the same settings,
+    so all aliases registered with these settings use one client.
+    """
+    if config.MOCK_DB:
+        import mongomock
+
+        return {
+            "host": "127.0.0.1",
+            "mongo_client_class": mongomock.MongoClient,
+            "uuidRepresentation": "standard",
+        }
+
+    # connect=False defers opening connections and starting the
+    # monitoring threads until the first query, so a client created
+    # before a fork is only opened in the process using it.
+    return {
+        "host": _get_db_url(),
+        "uuidRepresentation": "standard",
+        "connect": False,
+        "event_listeners": [_pool_statistics],
+        **_pool_options(),
+    }
+
+
+def _connect(db_name: str, alias: str) -> None:
+    """Register a mongoengine alias using the process client.
+
+    Connecting an alias again with the same database does nothing. An
+    alias connected to another database, or by other code, is
+    disconnected first.
+    """
+    with _lock:
+        if _aliases.get(alias) == db_name:
+            return
+
+        mongoengine.disconnect(alias)
+        mongoengine.register_connection(alias, db=db_name, **_connection_settings())
+        _aliases[alias] = db_name
+
+        # Connect the client alias first, so the alias shares its client
+        if alias != CLIENT_ALIAS:
+            get_client()
+        mongoengine.get_connection(alias)
+
+
+def get_client() -> MongoClient[dict[str, Any]]:
+    """Return the client of this process.
+
+    The client is created on first use, and is shared by all aliases
+    connected by this module.
+
+    A process forked from a process with a client, e.g. a gunicorn
+    worker, keeps the client. The client opens its connections on first
+    use, and pymongo replaces the connections and monitoring threads of
+    a client opened by the parent process, so sockets are never shared
+    between processes.
+
+    Returns:
+        MongoClient: The client of this process.
+    """
+    with _lock:
+        _connect(USER_DB_NAME, CLIENT_ALIAS)
+        client: MongoClient[dict[str, Any]] = mongoengine.get_connection(CLIENT_ALIAS)
+        return client
+
+
+def disconnect() -> None:
+    """Disconnect all aliases connected by this module.
+
+    The process client is closed, and is created again on next use.
+    """
+    with _lock:
+        for alias in list(_aliases):
+            mongoengine.disconnect(alias)
+            del _aliases[alias]
+
+
+def _reset_after_fork() -> None:
+    """Reset the state inherited from the parent process.
+
+    Runs in the child right after a fork, where threads of the parent
+    may have held locks, so the locks are replaced and nothing else is
+    done. The client is reset lazily by pymongo, see ``get_client``.
+    """
+    global _lock
+
+    _lock = threading.RLock()
+    _pool_statistics.reset()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def pool_statistics() -> dict[str, int]:
+    """Return the connection pool statistics of this process.
+
+    Returns:
+        dict[str, int]: The number of connections created, closed, open,
+        checked out, checked in, in use and the number of failed check
+        outs.
+    """
+    return _pool_statistics.as_dict()
 
 
 def connect_data_db(db_name: str, alias: str = "data") -> None:
@@ -51,42 +308,106 @@ def connect_data_db(db_name: str, alias: str = "data") -> None:
         alias (str): the alias of the connection. This is only needed
             if multiple connections need to be managed.
     """
-    if config.MOCK_DB:
-        _connect_mock_db(db_name=db_name, alias=alias)
-        return
-
-    db_url = _get_db_url()
-    mongoengine.connect(
-        db=db_name,
-        alias=alias,
-        host=db_url,
-        uuidRepresentation="standard",
-    )
+    _connect(db_name, alias)
+
+
+def project_alias(db_name: str) -> str:
+    """Return the mongoengine alias of a project db.
+
+    The alias is registered on first use. All aliases share the process
+    client, so a worker can query any number of project dbs without
+    opening new connections.
+
+    Args:
+        db_name (str): the name of the project db.
+
+    Returns:
+        str: The alias of the project db.
+    """
+    alias = f"{PROJECT_ALIAS_PREFIX}{db_name}"
+    _connect(db_name, alias)
+
+    return alias
 
 
 def connect_user_db() -> None:
     """Connect to user db."""
-    if config.MOCK_DB:
-        _connect_mock_db(db_name=USER_DB_NAME)
-        return
-
-    db_url = _get_db_url()
-    mongoengine.connect(
-        db=USER_DB_NAME,
-        host=db_url,
-        uuidRepresentation="standard",
-    )
+    _connect(USER_DB_NAME, mongoengine.DEFAULT_CONNECTION_NAME)
 
 
 def _is_project_db(db: Database[dict[str, Any]]) -> bool:
     """Return True if the database matches the project db schema."""
-    collections = db.list_collection_names()
+    collections = db.list_collection_names(filter={"name": {"$regex": "^(data|settings)$"}})
     return "data" in collections and "settings" in collections
 
 
-def list_project_dbs() -> list[str]:
-    """Return a list of project dbs."""
-    db_url = _get_db_url()
-    client: MongoClient[dict[str, Any]] = MongoClient(db_url, uuidRepresentation="standard")
+def _discover_project_dbs(client: MongoClient[dict[str, Any]]) -> list[str]:
+    """List the project dbs of the cluster, checking concurrently."""
+    db_names = [name for name in client.list_database_names() if name not in SYSTEM_DB_NAMES]
+    if not db_names:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(MAX_DISCOVERY_WORKERS, len(db_names))) as executor:
+        is_project = executor.map(lambda name: _is_project_db(client[name]), db_names)
+        return [name for name, is_project_db in zip(db_names, is_project) if is_project_db]
+
+
+def _load_catalog(client: MongoClient[dict[str, Any]]) -> list[str] | None:
+    """Load the project catalog persisted in the user db.
+
+    Returns None if there is no catalog or it is older than
+    ``PROJECT_CATALOG_MAX_AGE``.
+    """
+    catalog = client[USER_DB_NAME][PROJECT_CATALOG_COLLECTION].find_one(
+        {"_id": PROJECT_CATALOG_ID}
+    )
+    if catalog is None or catalog["updated"] < datetime.now() - PROJECT_CATALOG_MAX_AGE:
+        return None
+
+    project_dbs: list[str] = catalog["project_dbs"]
+    return project_dbs
+
+
+def _save_catalog(client: MongoClient[dict[str, Any]], project_dbs: list[str]) -> None:
+    """Persist the project catalog in the user db."""
+    client[USER_DB_NAME][PROJECT_CATALOG_COLLECTION].replace_one(
+        {"_id": PROJECT_CATALOG_ID},
+        {"project_dbs": project_dbs, "updated": datetime.now()},
+        upsert=True,
+    )
+
+
+# The project catalog of this process, under the key PROJECT_CATALOG_ID
+_project_catalog: LRUCache[str, list[str]] = LRUCache(maxsize=1, ttl=PROJECT_CATALOG_TTL)
+
+
+def list_project_dbs(refresh: bool = False) -> list[str]:
+    """Return a list of project dbs.
+
+    The list is cached in memory for ``PROJECT_CATALOG_TTL`` seconds
+    and in the user db for ``PROJECT_CATALOG_MAX_AGE``. The cluster is
+    only searched for project dbs when both caches are outdated, or
+    when a refresh is requested.
+
+    Args:
+        refresh (bool): if True, search the cluster for project dbs and
+            update the caches.
+
+    Returns:
+        list[str]: The names of the project dbs.
+    """
+    client = get_client()
+
+    if not refresh:
+        if (project_dbs := _project_catalog.get(PROJECT_CATALOG_ID)) is not None:
+            return list(project_dbs)
+
+        if (project_dbs := _load_catalog(client)) is not None:
+            _project_catalog.set(PROJECT_CATALOG_ID, project_dbs)
+            return list(project_dbs)
+
+    project_dbs = _discover_project_dbs(client)
+    _save_catalog(client, project_dbs)
+    _project_catalog.set(PROJECT_CATALOG_ID, project_dbs)
 
-    return [db_name for db_name in client.list_database_names() if _is_project_db(client[db_name])]
+    return list(project_dbs)
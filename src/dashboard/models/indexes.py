@@ -0,0 +1,213 @@
+"""Index management for project dbs.
+
+The indexes of the project db documents are declared in their
+``meta``, but are not created automatically, since project dbs are
+written by test rigs and can be large. This module creates and checks
+them.
+
+``check`` reports indexes which are missing and the common queries,
+see ``QUERIES``, which would scan the whole collection.
+
+Examples:
+    Creating the indexes of one project db::
+
+        $ python -m dashboard.models.indexes ensure --project rig-7
+
+    Checking the indexes of all project dbs::
+
+        $ python -m dashboard.models.indexes check
+"""
+import argparse
+from collections.abc import Sequence
+from typing import Any
+
+from bson.objectid import ObjectId
+from mongoengine import Document
+from pymongo import IndexModel
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure
+
+from dashboard.models.data import Data, Settings
+from dashboard.models.db import list_project_dbs
+
+PROJECT_DOCUMENTS: tuple[type[Document], ...] = (Data, Settings)
+
+# Common queries of each document, as a filter and a sort. Values are
+# placeholders, only the queried fields matter.
+QUERIES: dict[type[Document], list[tuple[dict[str, Any], dict[str, int]]]] = {
+    Data: [
+        ({"settings_id": ObjectId()}, {}),
+        ({"settings_id": ObjectId(), "type": "xy_plot"}, {}),
+        ({"type": "xy_plot", "name": ""}, {}),
+        ({"name": ""}, {}),
+    ],
+    Settings: [
+        ({"test_case": ""}, {"time": -1}),
+        ({}, {"time": -1}),
+    ],
+}
+
+
+class ExplainUnsupported(Exception):
+    """Raised when the db can't explain queries, e.g. mongomock."""
+
+
+def index_models(document: type[Document]) -> list[IndexModel]:
+    """Return the indexes declared in the meta of a document."""
+    return [
+        IndexModel(
+            spec["fields"], **{key: value for key, value in spec.items() if key != "fields"}
+        )
+        for spec in document._meta["index_specs"]
+    ]
+
+
+def _collection(document: type[Document], project: str) -> Collection[dict[str, Any]]:
+    """Return the collection of a document in a project db."""
+    collection: Collection[dict[str, Any]] = document.in_project(project)._collection
+    return collection
+
+
+def ensure_indexes(project: str) -> list[str]:
+    """Create the declared indexes in a project db.
+
+    Existing indexes are left as is.
+
+    Args:
+        project (str): the name of the project db.
+
+    Returns:
+        list[str]: The names of the indexes, as ``collection.index``.
+    """
+    names = []
+    for document in PROJECT_DOCUMENTS:
+        collection = _collection(document, project)
+        created = collection.create_indexes(index_models(document))
+        names += [f"{collection.name}.{name}" for name in created]
+
+    return names
+
+
+def missing_indexes(project: str) -> list[str]:
+    """Find declared indexes which are missing in a project db.
+
+    Args:
+        project (str): the name of the project db.
+
+    Returns:
+        list[str]: The names of the missing indexes, as
+        ``collection.index``.
+    """
+    missing = []
+    for document in PROJECT_DOCUMENTS:
+        collection = _collection(document, project)
+        existing = [
+            [tuple(key) for key in index["key"]]
+            for index in collection.index_information().values()
+        ]
+
+        for model in index_models(document):
+            if list(model.document["key"].items()) not in existing:
+                missing.append(f"{collection.name}.{model.document['name']}")
+
+    return missing
+
+
+def _is_collection_scan(plan: Any) -> bool:
+    """Return True if a query plan or any of its stages is COLLSCAN."""
+    if isinstance(plan, dict):
+        return plan.get("stage") == "COLLSCAN" or any(
+            _is_collection_scan(value) for value in plan.values()
+        )
+
+    if isinstance(plan, list):
+        return any(_is_collection_scan(stage) for stage in plan)
+
+    return False
+
+
+def collection_scans(project: str) -> list[str]:
+    """Find common queries which would scan a whole collection.
+
+    Queries are explained, not run, so this is fast on large dbs.
+
+    Args:
+        project (str): the name of the project db.
+
+    Raises:
+        ExplainUnsupported: the db does not support explain.
+
+    Returns:
+        list[str]: The collection scanning queries.
+    """
+    scans = []
+    for document, queries in QUERIES.items():
+        collection = _collection(document, project)
+
+        for query_filter, sort in queries:
+            command: dict[str, Any] = {"find": collection.name, "filter": query_filter}
+            if sort:
+                command["sort"] = sort
+
+            try:
+                explained: dict[str, Any] = collection.database.command({"explain": command})
+            # Mongomock raises NotImplementedError for explain
+            except (OperationFailure, NotImplementedError) as err:
+                raise ExplainUnsupported(f"Could not explain query: {err}") from err
+
+            if _is_collection_scan(explained["queryPlanner"]["winningPlan"]):
+                fields = list(query_filter) + [f"sort {field}" for field in sort]
+                scans.append(f"{collection.name}: {', '.join(fields)}")
+
+    return scans
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run the index management command.
+
+    Args:
+        argv (Sequence[str] | None): the command line arguments.
+            Defaults to ``sys.argv``.
+
+    Returns:
+        int: The exit status, 1 if ``check`` found problems.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m dashboard.models.indexes", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("command", choices=["ensure", "check"])
+    parser.add_argument(
+        "--project",
+        action="append",
+        help="the project db to use, may be repeated. Defaults to all project dbs.",
+    )
+    args = parser.parse_args(argv)
+
+    projects = args.project or list_project_dbs(refresh=True)
+    problems = False
+
+    for project in projects:
+        if args.command == "ensure":
+            for name in ensure_indexes(project):
+                print(f"{project}: ensured {name}")
+            continue
+
+        for name in missing_indexes(project):
+            problems = True
+            print(f"{project}: missing index {name}")
+
+        try:
+            scans = collection_scans(project)
+        except ExplainUnsupported as err:
+            print(f"{project}: {err}")
+            continue
+
+        for query in scans:
+            problems = True
+            print(f"{project}: collection scan for {query}")
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
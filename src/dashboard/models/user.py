@@ -1,19 +1,53 @@
 """Models related to user database."""
 from datetime import datetime
+from functools import reduce
+import operator
+import re
 from typing import Any
 
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
 import flask_login
 from mongoengine import (
     DateTimeField,
     Document,
+    DoesNotExist,
     EmbeddedDocument,
     EmbeddedDocumentListField,
     ListField,
+    Q,
+    QuerySet,
     ReferenceField,
     StringField,
+    ValidationError,
     signals,
 )
 
+from dashboard.cache import LRUCache
+
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL = 300
+DASHBOARDS_PAGE_SIZE = 50
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def search_terms(*texts: str | None) -> list[str]:
+    """Split texts into unique lowercase words for searching.
+
+    Args:
+        texts (str | None): the texts to split. None is ignored.
+
+    Returns:
+        list[str]: The unique words of the texts, in order.
+
+    Examples:
+        >>> search_terms("Engine tests", "Tests of the engine")
+        ['engine', 'tests', 'of', 'the']
+    """
+    words = (_WORD_PATTERN.findall(text.lower()) for text in texts if text)
+    return list(dict.fromkeys(word for text_words in words for word in text_words))
+
 
 class Diagram(EmbeddedDocument):
     """Diagram database mode.
@@ -32,30 +66,284 @@ class Diagram(EmbeddedDocument):
     data = ReferenceField("Data", dbref=True)
 
 
-class Dashboard(EmbeddedDocument):
+class DashboardQuerySet(QuerySet):
+    """Query set for Dashboard documents."""
+
+    def search(self, query: str) -> "DashboardQuerySet":
+        """Filter dashboards matching a search query.
+
+        A dashboard matches if every word of the query is the start of a
+        word in its name or description, ignoring case. The words of
+        dashboards are stored in ``search_terms``, so every word of the
+        query is an anchored regex served by the ``search_terms`` index.
+
+        Args:
+            query (str): the search query.
+
+        Returns:
+            DashboardQuerySet: The matching dashboards, or all
+            dashboards if the query contains no words.
+
+        Examples:
+            >>> Dashboard.objects.owned_by(user_id).search("eng te")
+            [<Dashboard: Dashboard object>, ...]
+        """
+        terms = search_terms(query)
+        if not terms:
+            return self
+
+        queryset: DashboardQuerySet = self.filter(
+            reduce(operator.and_, (Q(search_terms__startswith=term) for term in terms))
+        )
+        return queryset
+
+    def owned_by(self, user_id: ObjectId) -> "DashboardQuerySet":
+        """Filter dashboards owned by a user, last modified first.
+
+        Args:
+            user_id (ObjectId): the id of the user.
+
+        Returns:
+            DashboardQuerySet: The dashboards owned by the user.
+        """
+        queryset: DashboardQuerySet = self.filter(owner=user_id).order_by("-modified")
+        return queryset
+
+    def shared_with(self, user_id: ObjectId) -> "DashboardQuerySet":
+        """Filter dashboards shared with a user, last modified first.
+
+        Args:
+            user_id (ObjectId): the id of the user.
+
+        Returns:
+            DashboardQuerySet: The dashboards the user is authorized to
+            access.
+        """
+        queryset: DashboardQuerySet = self.filter(authorized_users=user_id).order_by("-modified")
+        return queryset
+
+    def page(
+        self, cursor: str | None = None, limit: int = DASHBOARDS_PAGE_SIZE
+    ) -> tuple[list["Dashboard"], str | None]:
+        """Return a page of dashboards, last modified first.
+
+        Pages are found with a cursor on the modified time and id of the
+        last dashboard of the previous page, which is served by the
+        ``owner, -modified, -id`` index. Every page is equally fast to
+        load, no matter how many dashboards come before it.
+
+        Args:
+            cursor (str | None): the cursor returned with the previous
+                page, or None for the first page.
+            limit (int): the maximum number of dashboards in the page.
+
+        Raises:
+            ValueError: the cursor is invalid.
+
+        Returns:
+            tuple[list[Dashboard], str | None]: The dashboards of the
+            page and the cursor of the next page, or None if this is the
+            last page.
+
+        Examples:
+            Loading the first two pages of dashboards of a user:
+
+            >>> owned = Dashboard.objects.owned_by(user_id)
+            >>> dashboards, cursor = owned.page()
+            >>> more_dashboards, cursor = owned.page(cursor)
+        """
+        queryset = self.order_by("-modified", "-id")
+
+        if cursor is not None:
+            modified, dashboard_id = _decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(modified__lt=modified) | Q(modified=modified, id__lt=dashboard_id)
+            )
+
+        dashboards: list[Dashboard] = list(queryset.limit(limit + 1))
+        if len(dashboards) <= limit:
+            return dashboards, None
+
+        return dashboards[:limit], _encode_cursor(dashboards[limit - 1])
+
+
+def _encode_cursor(dashboard: "Dashboard") -> str:
+    """Encode the position of a dashboard as a page cursor."""
+    return f"{dashboard.modified.isoformat()}_{dashboard.id}"
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    """Decode a page cursor to a modified time and a dashboard id.
+
+    Raises:
+        ValueError: the cursor is invalid.
+    """
+    modified, _, dashboard_id = cursor.rpartition("_")
+    try:
+        return datetime.fromisoformat(modified), ObjectId(dashboard_id)
+    except InvalidId as err:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from err
+
+
+class Dashboard(Document):
     """Dashboard database model.
 
     A Dashboard stores all the data associated with reconstructing a
-    dashboard page.
+    dashboard page. Dashboards are stored in their own collection, so
+    that a dashboard is read and written without loading or rewriting
+    the user, or the other dashboards of the user.
+
+    The words of the name and description are stored in
+    ``search_terms``, see ``DashboardQuerySet.search``.
+
+    Existing dashboards should be changed with the update methods, e.g.
+    ``rename`` or ``add_diagram``, instead of ``save``. These send only
+    the changed fields as a single atomic update, so concurrent changes
+    from other requests are not overwritten.
 
     Attributes:
+        owner (User): the user who created the dashboard.
         authorized_users (list[User]): the list of users authorized to
             access the dashboard.
         diagrams (list[Diagram]): the diagrams which the dashboard
             consists of.
+        search_terms (list[str]): the words of the name and
+            description.
     """
 
+    meta = {
+        "collection": "dashboards",
+        "indexes": [
+            {"fields": ["owner", "-modified", "-id"]},
+            {"fields": ["owner", "search_terms"]},
+            "authorized_users",
+        ],
+        "queryset_class": DashboardQuerySet,
+    }
+
+    owner: "User" = ReferenceField("User", required=True)
     name: str = StringField()
     description: str = StringField()
     modified: datetime = DateTimeField()
     created: datetime = DateTimeField(required=True)
     authorized_users: list["User"] = ListField(ReferenceField("User"))
     diagrams: list[Diagram] = EmbeddedDocumentListField(Diagram)
+    search_terms: list[str] = ListField(StringField())
+
+    def clean(self) -> None:
+        """Update the search terms before the dashboard is saved."""
+        self.search_terms = search_terms(self.name, self.description)
+
+    def matches(self, query: str) -> bool:
+        """Whether the dashboard matches a search query.
+
+        Matches like ``DashboardQuerySet.search``, using the search
+        terms of the dashboard as last saved.
+
+        Args:
+            query (str): the search query.
+
+        Returns:
+            bool: True if every word of the query is the start of a
+            search term, or if the query contains no words.
+        """
+        return all(
+            any(term.startswith(word) for term in self.search_terms)
+            for word in search_terms(query)
+        )
 
     def update_modified(self) -> None:
         """Sets self.modified to datetime.now()."""
         self.modified = datetime.now()
 
+    def _modify(self, query: dict[str, Any] | None = None, **update: Any) -> None:
+        """Atomically update the dashboard and set modified to now.
+
+        The dashboard is reloaded with the updated version. Unsaved
+        changes to the dashboard are discarded.
+
+        Raises:
+            DoesNotExist: the dashboard does not exist or does not match
+                the query.
+        """
+        if not self.modify(query, set__modified=datetime.now(), **update):
+            raise DoesNotExist(f"Dashboard {self.id} does not exist or was not updated")
+
+    def touch(self) -> None:
+        """Atomically set modified to now."""
+        self._modify()
+
+    def rename(self, name: str, description: str | None = None) -> None:
+        """Atomically change the name and description.
+
+        If the description is kept, the search terms are computed from
+        the stored description. The update only matches while the
+        stored description is the one the terms were computed from, and
+        is retried with the reloaded description otherwise.
+
+        Args:
+            name (str): the new name.
+            description (str | None): the new description, or None to
+                keep the current description.
+
+        Raises:
+            DoesNotExist: the dashboard does not exist.
+        """
+        if description is not None:
+            self._modify(
+                set__name=name,
+                set__description=description,
+                set__search_terms=search_terms(name, description),
+            )
+            return
+
+        while True:
+            stored_description = self.description
+            try:
+                self._modify(
+                    {"description": stored_description},
+                    set__name=name,
+                    set__search_terms=search_terms(name, stored_description),
+                )
+                return
+            except DoesNotExist:
+                # Raises DoesNotExist if the dashboard was deleted
+                self.reload("description")
+
+    def add_diagram(self, diagram: Diagram) -> None:
+        """Atomically append a diagram.
+
+        Args:
+            diagram (Diagram): the diagram to append.
+        """
+        self._modify(push__diagrams=diagram)
+
+    def set_diagram(self, index: int, diagram: Diagram) -> None:
+        """Atomically replace the diagram at an index.
+
+        Only the diagram at the index is written, using a positional
+        update.
+
+        Args:
+            index (int): the index of the diagram to replace.
+            diagram (Diagram): the new diagram.
+
+        Raises:
+            DoesNotExist: there is no diagram at the index.
+        """
+        exists = {"__raw__": {f"diagrams.{index}": {"$exists": True}}}
+        self._modify(exists, **{f"set__diagrams__{index}": diagram})
+
+    def share(self, user: "User") -> None:
+        """Atomically authorize a user to access the dashboard.
+
+        Sharing a dashboard with a user more than once has no effect.
+
+        Args:
+            user (User): the user to share the dashboard with.
+        """
+        self._modify(add_to_set__authorized_users=user)
+
     @staticmethod
     def post_init(sender: type, document: "Dashboard", **kwargs: Any) -> None:
         """Initialize time information."""
@@ -66,24 +354,70 @@ class Dashboard(EmbeddedDocument):
 signals.post_init.connect(Dashboard.post_init, sender=Dashboard)
 
 
-class User(Document):
+class DashboardOwner:
+    """Mixin for users which can own dashboards.
+
+    Requires the class to have an ``id`` attribute with the user id.
+    """
+
+    id: ObjectId
+
+    @property
+    def dashboards(self) -> DashboardQuerySet:
+        """The dashboards owned by the user."""
+        queryset: DashboardQuerySet = Dashboard.objects.owned_by(self.id)
+        return queryset
+
+    @property
+    def shared_dashboards(self) -> DashboardQuerySet:
+        """The dashboards shared with the user."""
+        queryset: DashboardQuerySet = Dashboard.objects.shared_with(self.id)
+        return queryset
+
+    def add_dashboard(self, name: str, desc: str) -> Dashboard:
+        """Adds dashboard to mongoDB.
+
+        Only the new dashboard is written, the user is not changed.
+
+        Args:
+            name (str): Dashboard name
+            desc (str): Dashboard description
+
+        Returns:
+            Dashboard: The added dashboard.
+        """
+        added_dashboard = Dashboard(
+            owner=self.id, name=name, description=desc, created=datetime.now()
+        )
+        added_dashboard.save()
+
+        return added_dashboard
+
+
+class User(DashboardOwner, Document):
     """User database model.
 
     The current User implementation contains no account security and
     is only used for testing purposes.
 
+    Dashboards are stored in their own collection, see ``Dashboard``.
+    Users stored before dashboards were moved may still contain
+    embedded dashboards, which are ignored until they are migrated
+    with ``dashboard.migrations.embedded_dashboards``.
+
     Attributes:
         username (str): The users username, used to identify the user.
-        dashboards (list[Dashboard]): list of embedded dashboard
-            documents.
+        dashboards (DashboardQuerySet): the dashboards owned by the
+            user.
         is_authenticated (bool): True if the User is authenticated.
         is_active (bool): True if the User is active, i.e. not
             suspended or similar.
         is_anonymous (bool): Always False for User objects.
     """
 
+    meta = {"strict": False}
+
     username: str = StringField()
-    dashboards: list[Dashboard] = EmbeddedDocumentListField(Dashboard)
     _is_authenticated: bool
 
     def __init__(self, *args: Any, **kwargs: Any):
@@ -136,16 +470,97 @@ class User(Document):
         """
         return str(self.id)
 
-    def add_dashboard(self, name: str, desc: str) -> None:
-        """Adds dashboard to mongoDB.
+    @staticmethod
+    def invalidate_cache(sender: type, document: "User", **kwargs: Any) -> None:
+        """Remove a changed or deleted user from the cache."""
+        user_cache.invalidate(str(document.id))
 
-        Args:
-            name (str): Dashboard name
-            desc (str): Dashboard description
+
+# The id and username of users keyed by user id, used to authenticate
+# requests without loading the full user document. Other workers are
+# not notified when a user changes, so entries expire after a while.
+user_cache: LRUCache[str, dict[str, Any]] = LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+signals.post_save.connect(User.invalidate_cache, sender=User)
+signals.post_delete.connect(User.invalidate_cache, sender=User)
+
+
+class UserPrincipal(DashboardOwner):
+    """Lightweight user used to authenticate requests.
+
+    Flask-Login loads the user of every request, including every Dash
+    callback. A principal only holds the id and username of the user,
+    which are cached in ``user_cache``. Dashboards are queried by the
+    user id. The full ``User`` document is loaded the first time any
+    other attribute is accessed, e.g. ``save``, and is then used for
+    the rest of the request.
+
+    Attributes:
+        id (ObjectId): The id of the user.
+        username (str | None): The username of the user.
+    """
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, id: ObjectId, username: str | None) -> None:
+        """Initialize a principal from user fields."""
+        self.id = id
+        self.username = username
+        self._user: User | None = None
+
+    def get_id(self) -> str:
+        """Return user id as a string.
+
+        Required by flask-login. For more information, see
+        https://flask-login.readthedocs.io/en/latest/#your-user-class
         """
-        added_dashboard = Dashboard(name=name, description=desc, created=datetime.now())
-        self.dashboards.append(added_dashboard)
-        self.save()
+        return str(self.id)
+
+    @property
+    def user(self) -> User:
+        """The full user document, loaded on first access."""
+        if self._user is None:
+            self._user = User.objects(id=self.id).get()
+            self._user.is_authenticated = True
+
+        return self._user
+
+    def __getattr__(self, name: str) -> Any:
+        """Get attributes not held by the principal from the user.
+
+        Raises:
+            AttributeError: the attribute is private, e.g. ``_user``
+                before it is set when copying or unpickling.
+        """
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        return getattr(self.user, name)
+
+
+def load_principal(user_id: str) -> UserPrincipal | None:
+    """Load the principal of a user by id.
+
+    Args:
+        user_id (str): the id of the user.
+
+    Returns:
+        UserPrincipal | None: The principal of the user, or None if
+        there is no user with the id.
+    """
+    fields = user_cache.get(user_id)
+
+    if fields is None:
+        try:
+            fields = User.objects(id=user_id).only("username").as_pymongo().get()
+        except (DoesNotExist, ValidationError):
+            return None
+
+        user_cache.set(user_id, fields)
+
+    return UserPrincipal(fields["_id"], fields.get("username"))
 
 
 def register_user(username: str) -> User:
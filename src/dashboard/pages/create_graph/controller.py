@@ -1,36 +1,62 @@
 """The controller for create_graph."""
 
-import functools
-from io import BytesIO
+from datetime import datetime, timedelta
+import json
+import math
 from typing import Any, Callable, Tuple
 
-from dash import Input, Output, Patch, State, callback, ctx, dcc
+from dash import Input, Output, Patch, State, callback, clientside_callback, ctx, dcc
 from dash.exceptions import PreventUpdate
 import plotly.graph_objs as go
 import polars as pl
 
-from dashboard.components import trace
+from dashboard.components import trace_dict
 from dashboard.components.trace import TraceType
-from dashboard.utilities import convert_to_dataframes
+from dashboard.dataset_store import dataset_store
+from dashboard.downsampling import DownsampleMethod, downsample, target_points
+from dashboard.export import (
+    ExportFormat,
+    ExportOptions,
+    HtmlOption,
+    export_figure,
+    export_image,
+    export_key,
+    figure_cache,
+    plotlyjs_url,
+)
+from dashboard.typed_arrays import encode_typed_arrays
+
+# Store the width of the graph in pixels when the page is loaded, used
+# to decide how many points to keep when downsampling traces.
+clientside_callback(
+    """
+    function(id) {
+        const graph = document.getElementById(id);
+        return graph ? graph.offsetWidth : null;
+    }
+    """,
+    Output("graph_width", "data"),
+    Input("graph_id", "id"),
+)
 
 
 @callback(
     Output("graph_id", "figure", allow_duplicate=True),
     Input("choose_graph_type", "value"),
-    State("graph_id", "figure"),
     State("graph_selector", "value"),
-    State("graph_name", "value"),
+    State("dataset_ids", "data"),
     prevent_initial_call=True,
 )
-def patch_graph_type(
-    graph_type: str, graph_data: dict[str, list[Any]], i: int, graph_name: str
-) -> Patch:
+def patch_graph_type(graph_type: str, i: int, dataset_ids: list[str] | None) -> Patch:
     """A patched figure object that patches the graph type.
 
+    Only the type of the trace is patched, the trace data stays in the
+    browser.
+
     Args:
         graph_type (str): The new graph type
-        graph_data (_type_): Current graph data
         i (int): Graph index
+        dataset_ids (list[str] | None): Ids of the plotted data sets
 
     Returns:
         Patch: Patched figure with new graph type
@@ -40,13 +66,17 @@ def patch_graph_type(
     except ValueError as err:
         raise PreventUpdate from err
 
-    if "data" not in graph_data:
+    if not dataset_ids or i is None:
         raise PreventUpdate
 
-    data_frame = pl.DataFrame({"x": graph_data["data"][i]["x"], "y": graph_data["data"][i]["y"]})
-    color = graph_data["data"][i]["marker"]
     patched_figure = Patch()
-    patched_figure["data"][i] = trace(data_frame, trace_type, color["color"], graph_name)
+    if trace_type == TraceType.BAR:
+        patched_figure["data"][i]["type"] = "bar"
+        del patched_figure["data"][i]["mode"]
+    else:
+        patched_figure["data"][i]["type"] = "scatter"
+        patched_figure["data"][i]["mode"] = trace_type.value
+
     return patched_figure
 
 
@@ -92,6 +122,50 @@ def patch_graph_name(name: str, i: int) -> Patch:
     return patched_figure
 
 
+DOWNLOAD_BUTTON_IDS = ["download_png", "download_jpeg", "download_pdf", "download_html"]
+
+
+def plotted_datasets(dataset_ids: list[str] | None) -> dict[int, tuple[str, pl.DataFrame]]:
+    """Load the full resolution data sets of the traces of a figure.
+
+    Args:
+        dataset_ids (list[str] | None): ids of the plotted data sets,
+        in the order of the traces
+
+    Returns:
+        dict[int, tuple[str, pl.DataFrame]]: the id and data set of
+        each trace, by trace index. Data sets which are no longer
+        stored are left out.
+    """
+    datasets: dict[int, tuple[str, pl.DataFrame]] = {}
+    for i, dataset_id in enumerate(dataset_ids or []):
+        if (df := dataset_store.get(dataset_id)) is not None:
+            datasets[i] = (dataset_id, df)
+
+    return datasets
+
+
+def with_trace_data(
+    fig_dict: dict[str, Any], trace_data: dict[int, tuple[Any, Any]]
+) -> dict[str, Any]:
+    """Return a copy of a figure with the data of some traces replaced.
+
+    Args:
+        fig_dict (dict[str, Any]): figure as dictionary
+        trace_data (dict[int, tuple[Any, Any]]): the new x and y values
+        of traces, by trace index
+
+    Returns:
+        dict[str, Any]: the figure with the new trace data
+    """
+    data = list(fig_dict.get("data", []))
+    for i, (x, y) in trace_data.items():
+        if i < len(data):
+            data[i] = {**data[i], "x": x, "y": y}
+
+    return {**fig_dict, "data": data}
+
+
 @callback(
     Output("download_fig", "data"),
     Input("download_png", "n_clicks"),
@@ -99,43 +173,107 @@ def patch_graph_name(name: str, i: int) -> Patch:
     Input("download_pdf", "n_clicks"),
     Input("download_html", "n_clicks"),
     State("graph_id", "figure"),
+    State("dataset_ids", "data"),
     State("file_name", "value"),
+    State("html_export_options", "value"),
+    State("main-url", "href"),
+    background=True,
+    running=[(Output(button_id, "disabled"), True, False) for button_id in DOWNLOAD_BUTTON_IDS],
+    progress=Output("export_status", "children"),
     prevent_initial_call=True,
 )
 def download_fig(
+    set_progress: Callable[[str], None],
     png_n_clicks: int,
     jpeg_n_clicks: int,
     pdf_n_clicks: int,
     html_n_clicks: int,
     fig_dict: dict[str, Any],
+    dataset_ids: list[str] | None,
     file_name: str,
+    html_options: list[str] | None,
+    href: str,
 ) -> Any:
     """Callback for downloading figures.
 
+    Runs as a background callback, so that slow image exports do not
+    block the server. Images are exported by the processes of
+    ``export_pool``, which keep kaleido running between exports. The
+    download buttons are disabled while the figure is exported, and
+    the progress is shown in ``export_status``.
+    Exported files are cached, so downloading the same figure again
+    does not export it again.
+
+    The figure in the browser is downsampled and sliced to the zoomed
+    x range. Images show the figure as it is shown in the browser, so
+    they are exported from it. Html files can be zoomed, so they are
+    exported with the full resolution data sets of the traces.
+
     Args:
+        set_progress (Callable[[str], None]): sets the export status
         png_n_clicks (int): number of clicks
         jpeg_n_clicks (int): number of clicks
         pdf_n_clicks (int): number of clicks
         html_n_clicks (int): number of clicks
         fig_dict (dict[str, Any]): figure to download as dictionary
+        dataset_ids (list[str] | None): ids of the plotted data sets
         file_name (str): desired filename
+        html_options (list[str] | None): selected ``HtmlOption`` values
+        href (str): url of the page
 
     Returns:
         Any: The file download
     """
-    file_format = ctx.triggered_id.split("_")[1]
-    full_name = f"{file_name}.{file_format}"
+    file_format = ExportFormat(ctx.triggered_id.split("_")[1])
+    full_name = f"{file_name}.{file_format.value}"
+    options = ExportOptions()
+    key_fig = fig_dict
+
+    if file_format == ExportFormat.HTML:
+        selected = [HtmlOption(option) for option in html_options or []]
+        options = ExportOptions(
+            plotlyjs_url=plotlyjs_url(href) if HtmlOption.SLIM in selected else None,
+            compress=HtmlOption.GZIP in selected,
+        )
+        if options.compress:
+            full_name += ".gz"
+
+        datasets = plotted_datasets(dataset_ids)
+        # Data sets are never changed, so their ids identify their data
+        key_fig = with_trace_data(
+            fig_dict,
+            {i: ({"dataset_id": dataset_id},) * 2 for i, (dataset_id, _) in datasets.items()},
+        )
+        fig_dict = with_trace_data(
+            fig_dict,
+            {
+                i: (df[df.columns[0]].to_numpy(), df[df.columns[1]].to_numpy())
+                for i, (_, df) in datasets.items()
+            },
+        )
+
+    key = export_key(key_fig, file_format, options)
+    if (content := figure_cache.get(key)) is not None:
+        return dcc.send_bytes(content, full_name)
 
     try:
-        fig = go.Figure(fig_dict)
-    except ValueError as val_err:
-        raise PreventUpdate from val_err
-
-    if file_format in ("png", "jpeg", "pdf"):
-        exporter: Callable[BytesIO] = functools.partial(fig.write_image, format=file_format)
-        return dcc.send_bytes(exporter, full_name)
-    elif file_format == "html":
-        return dcc.send_string(fig.write_html, full_name)
+        if file_format.is_image:
+            set_progress("Waiting for a free export worker...")
+            content = export_image(
+                fig_dict,
+                file_format,
+                options,
+                on_start=lambda: set_progress(f"Exporting {full_name}..."),
+            )
+        else:
+            content = export_figure(fig_dict, file_format, options)
+            figure_cache.set(key, content)
+    except (ValueError, TimeoutError) as export_err:
+        raise PreventUpdate from export_err
+    finally:
+        set_progress("")
+
+    return dcc.send_bytes(content, full_name)
 
 
 @callback(
@@ -179,40 +317,202 @@ def patch_axis_names(x: str, y: str) -> Patch:
     return patched_figure
 
 
+def visible_x_range(relayout_data: dict[str, Any]) -> tuple[Any, Any] | None:
+    """Find the visible x range from graph relayout data.
+
+    Args:
+        relayout_data (dict[str, Any]): relayout data of a graph
+
+    Raises:
+        PreventUpdate: if the relayout data does not change the x range
+
+    Returns:
+        tuple[Any, Any] | None: the visible x range, or None if the
+        whole x axis is visible
+    """
+    if relayout_data.get("xaxis.autorange"):
+        return None
+
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        return relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]
+
+    if "xaxis.range" in relayout_data:
+        x0, x1 = relayout_data["xaxis.range"]
+        return x0, x1
+
+    raise PreventUpdate
+
+
+def parse_date(value: str | float) -> datetime:
+    """Parse a value of a plotly date axis range.
+
+    Plotly gives date ranges as strings without a time zone, e.g.
+    ``"2023-01-31 12:00:00.5"``, or as milliseconds since the epoch.
+
+    Args:
+        value (str | float): a date string or milliseconds
+
+    Raises:
+        PreventUpdate: if the value is not a date
+
+    Returns:
+        datetime: the date, without a time zone
+    """
+    try:
+        if isinstance(value, str):
+            return datetime.fromisoformat(value)
+        return datetime(1970, 1, 1) + timedelta(milliseconds=value)
+    except (TypeError, ValueError, OverflowError) as err:
+        raise PreventUpdate from err
+
+
+def slice_x_range(df: pl.DataFrame, x_range: tuple[Any, Any]) -> pl.DataFrame:
+    """Return the rows of a data frame within an x range.
+
+    Dates and times are shown on a date axis, where the range is given
+    as dates, see ``parse_date``. Dates are compared with the local
+    time of time zone aware columns, since plotly shows local times.
+    Other non numeric x values are shown on a category axis, where the
+    range is given in row indices.
+
+    Args:
+        df (pl.DataFrame): data frame with x values in the first column
+        x_range (tuple[Any, Any]): the x range
+
+    Returns:
+        pl.DataFrame: the rows within the x range
+    """
+    x0, x1 = x_range
+    x_col = df.columns[0]
+    dtype = df[x_col].dtype
+
+    if dtype == pl.Date:
+        x = pl.col(x_col).cast(pl.Datetime)
+        return df.filter(x.is_between(parse_date(x0), parse_date(x1)))
+
+    if dtype == pl.Datetime:
+        x = pl.col(x_col)
+        if getattr(dtype, "time_zone", None):
+            x = x.dt.replace_time_zone(None)
+        return df.filter(x.is_between(parse_date(x0), parse_date(x1)))
+
+    if not df[x_col].is_numeric():
+        start = max(math.floor(x0), 0)
+        return df.slice(start, max(math.ceil(x1) + 1 - start, 0))
+
+    return df.filter(pl.col(x_col).is_between(x0, x1))
+
+
+@callback(
+    Output("graph_id", "figure", allow_duplicate=True),
+    Input("graph_id", "relayoutData"),
+    State("dataset_ids", "data"),
+    State("graph_width", "data"),
+    prevent_initial_call=True,
+)
+def resample_on_zoom(
+    relayout_data: dict[str, Any] | None, dataset_ids: list[str] | None, graph_width: int | None
+) -> Patch:
+    """Show the points of the visible x range in full detail.
+
+    The full resolution data of the figure is sliced to the visible x
+    range and downsampled again, so that zooming in shows more detail.
+
+    Args:
+        relayout_data (dict[str, Any] | None): graph relayout data
+        dataset_ids (list[str] | None): ids of the plotted data sets
+        graph_width (int | None): width of the graph in pixels
+
+    Returns:
+        Patch: Patched figure with resampled trace data
+    """
+    if not relayout_data or not dataset_ids:
+        raise PreventUpdate
+
+    x_range = visible_x_range(relayout_data)
+    n_out = target_points(graph_width)
+    patched_figure = Patch()
+
+    for i, dataset_id in enumerate(dataset_ids):
+        df = dataset_store.get(dataset_id)
+        if df is None:
+            continue
+
+        visible = df if x_range is None else slice_x_range(df, x_range)
+        visible = downsample(visible, DownsampleMethod.LTTB, n_out)
+        patched_figure["data"][i]["x"] = encode_typed_arrays(
+            visible[visible.columns[0]].to_numpy()
+        )
+        patched_figure["data"][i]["y"] = encode_typed_arrays(
+            visible[visible.columns[1]].to_numpy()
+        )
+
+    return patched_figure
+
+
 @callback(
     Output("graph_id", "figure"),
     Output("graph_selector", "options"),
     Output("graph_selector", "value"),
     Output("graph_name", "disabled"),
-    Input("uploaded_data", "contents"),
+    Output("dataset_ids", "data"),
+    Input("uploaded_dataset_ids", "value"),
+    State("graph_width", "data"),
     prevent_initial_call=True,
 )
 def render_figure(
-    contents: list[str],
-) -> Tuple[go.Figure, list[dict[str, str | int]], int, bool]:
-    """Renders the figure using CSV-files.
+    uploaded_dataset_ids: str, graph_width: int | None
+) -> Tuple[dict[str, Any], list[dict[str, str | int]], int, bool, list[str]]:
+    """Renders the figure using uploaded CSV-files.
+
+    Large data sets are downsampled to the number of points the graph
+    can show. The full resolution data is kept in the data set store to
+    resample when zooming. Large traces are created without validation,
+    see ``trace_dict``, and numeric trace data is sent as typed arrays,
+    see ``dashboard.typed_arrays``.
+
+    Args:
+        uploaded_dataset_ids (str): JSON list of the ids of the uploaded
+        data sets
+        graph_width (int | None): width of the graph in pixels
 
     Returns:
-        dcc.Graph: Graph to be rendered
+        dict[str, Any]: Figure to be rendered
         list[dict[str: str]]: list of all the graph names
+        list[str]: ids of the plotted data sets
     """
-    created_figs: list[go.Scatter | go.Bar] = []
+    created_figs: list[dict[str, Any]] = []
     figure_names: list[dict[str, str | int]] = []
-    data_frames = convert_to_dataframes(contents)
+    try:
+        uploaded_ids = [str(dataset_id) for dataset_id in json.loads(uploaded_dataset_ids)]
+    except (TypeError, ValueError) as err:
+        raise PreventUpdate from err
+
+    dataset_ids: list[str] = []
+    data_frames: list[pl.DataFrame] = []
+    for dataset_id in uploaded_ids:
+        if (df := dataset_store.get(dataset_id)) is not None:
+            dataset_ids.append(dataset_id)
+            data_frames.append(df)
+
+    n_out = target_points(graph_width)
 
     for num, df in enumerate(data_frames):
-        loc_fig = trace(df, TraceType.LINE, "#000000", name=f"Graph {num}")
+        loc_fig = trace_dict(
+            df, TraceType.LINE, "#000000", f"Graph {num}", DownsampleMethod.LTTB, n_out
+        )
         label: str = loc_fig["name"]
         figure_names.append({"label": label, "value": num})
         created_figs.append(loc_fig)
 
-    fig = go.Figure(
-        data=created_figs,
+    # Only the layout is validated, large traces are not, see trace_dict
+    fig: dict[str, Any] = go.Figure(
         layout=go.Layout(
             plot_bgcolor="#FFFFFF",
             xaxis=go.layout.XAxis(linecolor="black", gridcolor="gray"),
             yaxis=go.layout.YAxis(linecolor="black", gridcolor="gray"),
         ),
-    )
+    ).to_plotly_json()
+    fig["data"] = created_figs
 
-    return fig, figure_names, 0, False
+    return encode_typed_arrays(fig), figure_names, 0, False, dataset_ids
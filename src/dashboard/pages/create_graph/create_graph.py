@@ -12,6 +12,7 @@ import dash_bootstrap_components as dbc
 
 from dashboard.components import button, icon, text_input
 from dashboard.components.trace import TraceType
+from dashboard.export import HtmlOption
 import dashboard.pages.create_graph.controller  # noqa: F401
 
 dash.register_page(__name__, path="/create-graph", nav_item=False)
@@ -35,25 +36,43 @@ def layout() -> Component:
             graph_window(),
             right_settings_bar(),
             dcc.Download(id="download_fig"),
+            dcc.Store(id="graph_width"),
+            dcc.Store(id="dataset_ids"),
         ],
     )
 
 
 def csv_button() -> Component:
-    """Button to upload a csv file.
+    """Button to upload a csv, Parquet or Arrow IPC file.
+
+    The files are uploaded in chunks by ``assets/upload.js``, which
+    writes the ids of the uploaded data sets to the hidden
+    ``uploaded_dataset_ids`` input.
 
     Returns:
-        A dcc.upload containg a csv-file.
+        A html.Div containing the upload button and file input.
     """
-    return dcc.Upload(
+    return html.Div(
         className="bg-menu-back duration-150 shrink flex flex-col "
         "cursor-pointer p-3 mr-2 rounded-md hover:bg-dark-purple",
-        id="uploaded_data",
-        children=button(
-            "upload", "CSV file", size=26, className="whitespace-nowrap bg-transparent"
-        ),
-        # True so multiple files can be uploaded
-        multiple=True,
+        children=[
+            button(
+                "upload",
+                "Data file",
+                size=26,
+                id="upload_button",
+                className="whitespace-nowrap bg-transparent",
+            ),
+            # multiple=True so multiple files can be uploaded
+            html.Input(
+                id="uploaded_data",
+                type="file",
+                accept=".csv,.parquet,.arrow,.ipc,.feather",
+                multiple=True,
+                className="hidden",
+            ),
+            dcc.Input(id="uploaded_dataset_ids", type="text", className="hidden"),
+        ],
     )
 
 
@@ -96,6 +115,16 @@ def download_buttons() -> html.Div:
                     download_button(icon="html", text="HTML", id="download_html"),
                 ],
             ),
+            dcc.Checklist(
+                id="html_export_options",
+                className="flex space-x-2 mt-1 text-xs",
+                options=[
+                    {"label": " Slim HTML", "value": HtmlOption.SLIM.value},
+                    {"label": " Gzip HTML", "value": HtmlOption.GZIP.value},
+                ],
+                value=[],
+            ),
+            html.P(id="export_status", className="text-xs mt-1"),
         ],
     )
 
@@ -202,6 +231,8 @@ def upload_buttons() -> html.Div:
                     ),
                 ],
             ),
+            # Upload progress and errors, written by assets/upload.js
+            html.Div(id="upload_status", className="text-xs mt-1"),
         ],
     )
 
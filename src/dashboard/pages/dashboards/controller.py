@@ -1,37 +1,178 @@
 """Dashboards controller module."""
 
 from datetime import datetime
+from typing import Any
 
-from dash import Input, Output, Patch, callback
+from dash import Input, Output, Patch, State, callback, ctx, dcc
+from dash.exceptions import PreventUpdate
 from flask_login import current_user
 
 from dashboard.components.dashboards_list_component import generate_list_row_contents
-from dashboard.components.list_component import generate_list_row
+from dashboard.components.list_component import (
+    add_page,
+    generate_list_row,
+    list_page,
+    list_window,
+    page_to_load,
+    prepend_row,
+    window_sentinels,
+)
 from dashboard.models.user import Dashboard
 
+LIST_ROWS = {"parent": "dashboards-list", "child": "list-rows"}
+LOAD_PREVIOUS = {"parent": "dashboards-list", "child": "load-previous"}
+LOAD_MORE = {"parent": "dashboards-list", "child": "load-more"}
+
+
+def dashboards_window(search: str, window: dict[str, Any]) -> dict[str, Any]:
+    """Return the data of the dashboards-window store.
+
+    The window of the list is stored with the search query its cursors
+    were issued for, so a page of a previous query is never added to
+    the list.
+    """
+    return {"search": search, "window": window}
+
+
+def list_outputs(search: str, window: dict[str, Any]) -> list[Any]:
+    """Return the values of the store and the sentinels of the list."""
+    return [dashboards_window(search, window), *window_sentinels(window)]
+
 
 @callback(
-    Output({"parent": "dashboards-list", "child": "list-rows"}, "children"),
+    Output(LIST_ROWS, "children"),
+    Output("dashboards-window", "data", allow_duplicate=True),
     Input("dashboards-add-button", "n_clicks"),
+    State("dashboards-window", "data"),
+    State("dashboards-search", "value"),
     prevent_initial_call=True,
 )
-def dashboards_add_button_clicked(n_clicks: int) -> Patch:
+def dashboards_add_button_clicked(
+    n_clicks: int, stored: dict[str, Any], search: str | None
+) -> tuple[Patch, dict[str, Any]]:
     """Add dashboard to dashboards list.
 
     Args:
         n_clicks (int): The amount of times the button was clicked.
+        stored (dict[str, Any]): The search query and window of the
+        list.
+        search (str | None): The current search query.
+
+    Raises:
+        PreventUpdate: the new dashboard does not match the search
+        query, or the first page of the list is not rendered, so it is
+        not listed.
 
     Returns:
-        List[Component]: The dashboards list rows with one more row.
+        tuple[Patch, dict[str, Any]]: A patch adding a row for the new
+        dashboard and the new window.
     """
-    new_index = len(current_user.dashboards)
     created = datetime.now()
-    added_dashboard = Dashboard(name=f"Added Dashboard #{new_index + 1}", created=created)
-    current_user.dashboards.append(added_dashboard)
-    current_user.save()
+    added_dashboard = current_user.add_dashboard(f"Added Dashboard {created:%Y-%m-%d %H:%M}", "")
+
+    search = search or ""
+    if stored["search"] != search or not added_dashboard.matches(search):
+        raise PreventUpdate
 
-    children_patch = Patch()
-    children_patch.append(
-        generate_list_row(new_index, generate_list_row_contents(created, added_dashboard))
+    # Dashboards are listed with the most recently modified first
+    prepended = prepend_row(
+        stored["window"],
+        generate_list_row(
+            str(added_dashboard.id),
+            generate_list_row_contents(added_dashboard.created, added_dashboard),
+        ),
     )
-    return children_patch
+    if prepended is None:
+        raise PreventUpdate
+
+    children_patch, window = prepended
+    return children_patch, dashboards_window(search, window)
+
+
+def dashboard_rows(dashboards: list[Dashboard]) -> list[dcc.Link]:
+    """Generate the list rows of dashboards."""
+    now = datetime.now()
+
+    return [
+        generate_list_row(str(dashboard.id), generate_list_row_contents(now, dashboard))
+        for dashboard in dashboards
+    ]
+
+
+@callback(
+    Output(LIST_ROWS, "children", allow_duplicate=True),
+    Output("dashboards-window", "data"),
+    Output(LOAD_PREVIOUS, "className"),
+    Output(LOAD_PREVIOUS, "style"),
+    Output(LOAD_MORE, "className"),
+    Output(LOAD_MORE, "style"),
+    Input(LOAD_PREVIOUS, "n_clicks"),
+    Input(LOAD_MORE, "n_clicks"),
+    State("dashboards-window", "data"),
+    State("dashboards-search", "value"),
+    prevent_initial_call=True,
+)
+def dashboards_load_page(
+    previous_clicks: int, more_clicks: int, stored: dict[str, Any], search: str | None
+) -> list[Any]:
+    """Load the page of dashboards before or after the rendered pages.
+
+    Args:
+        previous_clicks (int): The amount of times the start of the
+        list was scrolled to.
+        more_clicks (int): The amount of times the end of the list was
+        scrolled to.
+        stored (dict[str, Any]): The search query and window of the
+        list.
+        search (str | None): The current search query.
+
+    Raises:
+        PreventUpdate: there is no page to load, or the search query
+        changed since the window was stored.
+
+    Returns:
+        list[Any]: A patch adding the page to the rows, the new window,
+        and the classnames and styles of the list sentinels.
+    """
+    search = search or ""
+    if stored["search"] != search:
+        raise PreventUpdate
+
+    window = stored["window"]
+    page = page_to_load(window, forward=ctx.triggered_id == LOAD_MORE)
+    if page is None:
+        raise PreventUpdate
+
+    index, cursor = page
+    dashboards, next_cursor = current_user.dashboards.search(search).page(cursor)
+    children_patch, window = add_page(window, index, dashboard_rows(dashboards), next_cursor)
+
+    return [children_patch, *list_outputs(search, window)]
+
+
+@callback(
+    Output(LIST_ROWS, "children", allow_duplicate=True),
+    Output("dashboards-window", "data", allow_duplicate=True),
+    Output(LOAD_PREVIOUS, "className", allow_duplicate=True),
+    Output(LOAD_PREVIOUS, "style", allow_duplicate=True),
+    Output(LOAD_MORE, "className", allow_duplicate=True),
+    Output(LOAD_MORE, "style", allow_duplicate=True),
+    Input("dashboards-search", "value"),
+    prevent_initial_call=True,
+)
+def dashboards_search(search: str | None) -> list[Any]:
+    """Show the first page of dashboards matching a search query.
+
+    Args:
+        search (str | None): The search query.
+
+    Returns:
+        list[Any]: The rows of the first page of matching dashboards,
+        the new window, and the classnames and styles of the list
+        sentinels.
+    """
+    search = search or ""
+    dashboards, cursor = current_user.dashboards.search(search).page()
+    rows = dashboard_rows(dashboards)
+
+    return [[list_page(rows)], *list_outputs(search, list_window(len(rows), cursor))]
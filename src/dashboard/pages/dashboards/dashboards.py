@@ -1,12 +1,13 @@
 """Dashboard page."""
 
 import dash
-from dash import html
+from dash import dcc, html
 from flask_login import current_user
 
 from dashboard.components import button, dashboards_list_component, login_required
+from dashboard.components.list_component import list_window
 from dashboard.models.db import connect_user_db
-import dashboard.pages.dashboards.controller  # noqa: F401
+from dashboard.pages.dashboards.controller import dashboards_window
 
 dash.register_page(
     __name__,
@@ -24,20 +25,32 @@ connect_user_db()
 def layout() -> html.Div:
     """Create the dashboards page.
 
+    Only the first page of dashboards is loaded, the following pages
+    are loaded when the list is scrolled or searched, see
+    ``controller``.
+
     Returns:
         html.Div: The dashboards page.
     """
+    dashboards, cursor = current_user.dashboards.page()
+
     return html.Div(
         className="flex flex-col mx-4 py-4 h-screen max-h-screen",
         children=[
             html.H1(className="text-3xl my-8", children="Dashboards"),
-            html.Div(
-                id="search-placeholder",
+            # Typing is debounced by assets/search.js, which copies the
+            # value to the hidden dashboards-search input.
+            html.Input(
+                id="dashboards-search-input",
+                type="search",
+                placeholder="Search dashboards...",
+                autoComplete="off",
                 className=(
                     "bg-white rounded-full min-h-[40px] flex items-center pl-8 text-gray-600"
                 ),
-                children="Search placeholder...",
+                **{"data-debounce-target": "dashboards-search"},
             ),
+            dcc.Input(id="dashboards-search", type="text", value="", className="hidden"),
             html.Div(
                 className="flex justify-between my-4",
                 children=[
@@ -52,7 +65,13 @@ def layout() -> html.Div:
             ),
             html.Div(
                 className="flex grow overflow-hidden",
-                children=dashboards_list_component(current_user.dashboards, _id="dashboards-list"),
+                children=dashboards_list_component(
+                    dashboards, _id="dashboards-list", has_more=cursor is not None
+                ),
+            ),
+            dcc.Store(
+                id="dashboards-window",
+                data=dashboards_window("", list_window(len(dashboards), cursor)),
             ),
         ],
     )
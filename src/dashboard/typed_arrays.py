@@ -0,0 +1,137 @@
+"""Module for encoding numeric arrays as base64 typed arrays.
+
+Large numeric arrays are much smaller and faster to parse when sent as
+the bytes of a typed array than as a JSON list of numbers. Arrays are
+encoded as ``{"dtype": "f8", "bdata": "<base64>"}``, which is the
+typed array format of plotly.js 2.28 and later.
+
+Figures sent to ``dcc.Graph`` contain typed arrays, which are decoded
+by ``assets/typed_arrays.js`` before plotting, since Dash bundles an
+older plotly.js. Figures sent back to the server, e.g. as callback
+state, still contain typed arrays, which ``decode_typed_arrays``
+converts to numpy arrays.
+"""
+import base64
+import binascii
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+# Arrays shorter than this are kept as lists, since encoding them saves
+# little space.
+TYPED_ARRAY_MIN_LENGTH = 64
+
+# The dtypes of typed arrays created by ``encode_array``
+_DTYPES = {"i4", "f8"}
+
+_INT32_MIN = np.iinfo(np.int32).min
+_INT32_MAX = np.iinfo(np.int32).max
+
+
+def encode_array(array: npt.NDArray[Any]) -> dict[str, str]:
+    """Encode a one dimensional numeric array as a typed array.
+
+    Integers are encoded as 32 bit integers if they fit, since
+    JavaScript has no 64 bit integer typed arrays that plotly.js can
+    plot. Other numbers are encoded as 64 bit floats.
+
+    Args:
+        array (npt.NDArray[Any]): an integer or float array.
+
+    Returns:
+        dict[str, str]: The typed array.
+    """
+    if (
+        array.dtype.kind in "iu"
+        and array.size
+        and _INT32_MIN <= array.min()
+        and array.max() <= _INT32_MAX
+    ):
+        dtype = "i4"
+    else:
+        dtype = "f8"
+
+    data = np.ascontiguousarray(array, dtype=f"<{dtype}").tobytes()
+
+    return {"dtype": dtype, "bdata": base64.b64encode(data).decode()}
+
+
+def _is_numeric_list(value: list[Any] | tuple[Any, ...]) -> bool:
+    """Whether all items of a list are ints or floats."""
+    return all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in value)
+
+
+def encode_typed_arrays(value: Any, min_length: int = TYPED_ARRAY_MIN_LENGTH) -> Any:
+    """Encode the numeric arrays in a figure as typed arrays.
+
+    Args:
+        value (Any): a figure dictionary, or any value within one.
+        min_length (int): the minimum length of arrays to encode.
+
+    Returns:
+        Any: A copy of the value, where one dimensional numeric lists
+        and arrays of at least ``min_length`` items are typed arrays.
+
+    Examples:
+        Encoding the data of a figure:
+
+        >>> encode_typed_arrays({"y": np.arange(2.0)}, min_length=2)
+        {'y': {'dtype': 'f8', 'bdata': 'AAAAAAAAAAAAAAAAAADwPw=='}}
+    """
+    if isinstance(value, dict):
+        return {key: encode_typed_arrays(item, min_length) for key, item in value.items()}
+
+    if isinstance(value, np.ndarray):
+        if value.ndim == 1 and value.dtype.kind in "iuf" and len(value) >= min_length:
+            return encode_array(value)
+        # Other arrays, e.g. of dates, are serialized by plotly
+        return value
+
+    if isinstance(value, (list, tuple)):
+        if len(value) >= min_length and _is_numeric_list(value):
+            return encode_array(np.array(value))
+        return [encode_typed_arrays(item, min_length) for item in value]
+
+    return value
+
+
+def decode_array(typed_array: dict[str, str]) -> npt.NDArray[Any]:
+    """Decode a typed array created by ``encode_array``.
+
+    Raises:
+        ValueError: the value is not a valid typed array.
+    """
+    try:
+        data = base64.b64decode(typed_array["bdata"], validate=True)
+        return np.frombuffer(data, dtype=f"<{typed_array['dtype']}")
+    except (KeyError, TypeError, binascii.Error) as err:
+        raise ValueError(f"Invalid typed array: {err}") from err
+
+
+def _is_typed_array(value: dict[str, Any]) -> bool:
+    """Whether a dictionary is a typed array."""
+    return value.keys() == {"dtype", "bdata"} and value["dtype"] in _DTYPES
+
+
+def decode_typed_arrays(value: Any) -> Any:
+    """Decode the typed arrays in a figure as numpy arrays.
+
+    Args:
+        value (Any): a figure dictionary, or any value within one.
+
+    Raises:
+        ValueError: a typed array is not valid.
+
+    Returns:
+        Any: A copy of the value, where typed arrays are numpy arrays.
+    """
+    if isinstance(value, dict):
+        if _is_typed_array(value):
+            return decode_array(value)
+        return {key: decode_typed_arrays(item) for key, item in value.items()}
+
+    if isinstance(value, list):
+        return [decode_typed_arrays(item) for item in value]
+
+    return value
@@ -0,0 +1,174 @@
+"""Module with the endpoints for uploading data files.
+
+Files are uploaded in chunks, which are appended to a temporary file on
+the server. This avoids holding the whole file in memory, and lets an
+interrupted upload resume from the last received chunk.
+
+An upload is done in three steps:
+
+1. ``POST /upload/`` creates an upload and returns its id.
+2. ``PUT /upload/<upload_id>?offset=<offset>`` appends a chunk. The
+   offset must be the number of bytes received so far, which is
+   returned by every ``PUT`` and by ``GET /upload/<upload_id>``.
+3. ``POST /upload/complete`` parses uploaded files and stores them in
+   the data set store. Csv, Parquet and Arrow IPC files are supported,
+   see ``utilities.read_data_file``. It returns the ids of the stored
+   data sets.
+
+The client side of the upload is implemented in ``assets/upload.js``.
+"""
+import os
+from pathlib import Path
+import re
+import tempfile
+import time
+from typing import Any
+import uuid
+
+from flask import Blueprint, abort, jsonify, request
+from flask.typing import ResponseReturnValue
+from flask_login import login_required
+
+from dashboard.dataset_store import dataset_store
+from dashboard.utilities import map_concurrently, read_data_file
+
+UPLOAD_DIR_ENV_NAME = "UPLOAD_DIR"
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_MAX_AGE = 24 * 60 * 60
+
+# Size of the blocks read from the request stream
+_BLOCK_SIZE = 64 * 1024
+_UPLOAD_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+blueprint = Blueprint("upload", __name__, url_prefix="/upload")
+
+
+def _upload_dir() -> Path:
+    """Find the upload directory from the environment."""
+    directory = os.getenv(UPLOAD_DIR_ENV_NAME)
+    if directory:
+        return Path(directory)
+
+    return Path(tempfile.gettempdir()) / "graphit-uploads"
+
+
+def _upload_path(upload_id: str) -> Path:
+    """Return the path of an existing upload, or abort with 404."""
+    if not _UPLOAD_ID_PATTERN.fullmatch(upload_id):
+        abort(404)
+
+    path = _upload_dir() / upload_id
+    if not path.exists():
+        abort(404)
+
+    return path
+
+
+def _remove_expired_uploads() -> None:
+    """Delete uploads that were never completed."""
+    oldest = time.time() - UPLOAD_MAX_AGE
+    for path in _upload_dir().iterdir():
+        try:
+            if path.stat().st_mtime < oldest:
+                path.unlink(missing_ok=True)
+        except FileNotFoundError:
+            # Removed by another worker
+            continue
+
+
+@blueprint.post("/")
+@login_required
+def create_upload() -> ResponseReturnValue:
+    """Create a new empty upload."""
+    directory = _upload_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    _remove_expired_uploads()
+
+    upload_id = uuid.uuid4().hex
+    (directory / upload_id).touch()
+
+    return jsonify(upload_id=upload_id), 201
+
+
+def _store_file(path: Path) -> str:
+    """Parse an uploaded file, store it and delete the upload."""
+    try:
+        return dataset_store.put(read_data_file(path))
+    finally:
+        path.unlink(missing_ok=True)
+
+
+@blueprint.get("/<upload_id>")
+@login_required
+def upload_offset(upload_id: str) -> ResponseReturnValue:
+    """Return the number of bytes received for an upload."""
+    return jsonify(offset=_upload_path(upload_id).stat().st_size)
+
+
+@blueprint.put("/<upload_id>")
+@login_required
+def upload_chunk(upload_id: str) -> ResponseReturnValue:
+    """Append a chunk to an upload.
+
+    The chunk is only appended if the ``offset`` query parameter matches
+    the number of bytes received so far. Otherwise the chunk is
+    rejected with status 409, and the client should resume from the
+    returned offset.
+    """
+    path = _upload_path(upload_id)
+    offset = request.args.get("offset", type=int)
+    size = path.stat().st_size
+
+    if offset != size:
+        return jsonify(offset=size), 409
+
+    if request.content_length is not None and request.content_length > MAX_CHUNK_SIZE:
+        abort(413)
+
+    received = 0
+    with path.open("ab") as file:
+        while block := request.stream.read(_BLOCK_SIZE):
+            received += len(block)
+            if received > MAX_CHUNK_SIZE:
+                file.truncate(size)
+                abort(413)
+            file.write(block)
+
+    return jsonify(offset=size + received)
+
+
+@blueprint.post("/complete")
+@login_required
+def complete_uploads() -> ResponseReturnValue:
+    """Parse uploaded files and store them as data sets.
+
+    The request body is a JSON object with the ids of the uploads, e.g.
+    ``{"upload_ids": ["..."]}``. The uploads are parsed concurrently
+    and each upload is deleted once parsed.
+
+    The response contains the ids of the stored data sets, in the order
+    of the uploads, and an error message for every upload which could
+    not be parsed, e.g.
+    ``{"dataset_ids": ["..."], "errors": [{"upload_id": "...",
+    "error": "..."}]}``.
+
+    A body which is not such an object is rejected with status 400.
+    """
+    body: Any = request.get_json(silent=True)
+    upload_ids: Any = body.get("upload_ids") if isinstance(body, dict) else None
+    if not isinstance(upload_ids, list) or not all(
+        isinstance(upload_id, str) for upload_id in upload_ids
+    ):
+        abort(400)
+
+    paths = [_upload_path(upload_id) for upload_id in upload_ids]
+
+    dataset_ids: list[str] = []
+    errors: list[dict[str, str]] = []
+    for upload_id, result in zip(upload_ids, map_concurrently(_store_file, paths)):
+        if isinstance(result, ValueError):
+            errors.append({"upload_id": upload_id, "error": str(result)})
+        else:
+            dataset_ids.append(result)
+
+    return jsonify(dataset_ids=dataset_ids, errors=errors)
@@ -1,9 +1,42 @@
 """Module with utility functions that are reused frequently."""
-import base64
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from enum import Enum
+import os
+from pathlib import Path
+from typing import TypeVar
 
 import polars as pl
 
+T = TypeVar("T")
+R = TypeVar("R")
+
+# The maximum number of threads used to parse files concurrently.
+MAX_PARSE_WORKERS = min(8, os.cpu_count() or 1)
+
+# Errors raised by polars when parsing an invalid file.
+PARSE_ERRORS = (pl.ComputeError, pl.NoDataError, pl.SchemaError, pl.ArrowError, OSError)
+
+# The number of columns plotted by a trace, see components.trace. Other
+# columns are not read from data files.
+PLOTTED_COLUMNS = 2
+
+PARQUET_MAGIC = b"PAR1"
+IPC_MAGIC = b"ARROW1"
+
+# The continuation marker which starts Arrow IPC streams. Unlike Arrow
+# IPC files, streams can not be read by polars.
+IPC_STREAM_MAGIC = b"\xff\xff\xff\xff"
+
+
+class FileFormat(Enum):
+    """Contains the supported data file formats."""
+
+    CSV = "csv"
+    PARQUET = "parquet"
+    IPC = "ipc"
+
 
 def set_classname(class_str: str, class_to_set: str, set_: bool) -> str:
     """Add or remove a specific classname from a classname string.
@@ -122,49 +155,95 @@ def to_human_time_delta(duration: timedelta, abbreviated: bool = False) -> str:
     return "Just now"
 
 
-def convert_to_dataframes(contents: list[str]) -> list[pl.DataFrame]:
-    """Convert contents from csv files to polars dataframes.
+def detect_file_format(header: bytes) -> FileFormat:
+    """Detect the format of a data file from its first bytes.
+
+    Parquet and Arrow IPC files are recognized by their magic bytes.
+    Any other file is assumed to be a csv file.
 
     Args:
-        contents (list[str]): The string contents of the uploaded
-        csv files, each containing the file data type and data
-        seperated by a comma.
+        header (bytes): the first bytes of the file, at least
+        ``len(IPC_MAGIC)`` bytes unless the file is shorter.
+
+    Raises:
+        ValueError: the file is an Arrow IPC stream, which is not
+        supported.
 
     Returns:
-        list[pl.DataFrame]: The polars dataframes. No entry is made
-        for each file's contents that is invalid.
+        FileFormat: The format of the file.
     """
-    dataframes: list[pl.DataFrame] = []
-    for c in contents:
-        try:
-            df = convert_to_dataframe(c)
-        except ValueError:
-            continue
+    if header.startswith(PARQUET_MAGIC):
+        return FileFormat.PARQUET
+
+    if header.startswith(IPC_MAGIC):
+        return FileFormat.IPC
 
-        dataframes.append(df)
+    if header.startswith(IPC_STREAM_MAGIC):
+        raise ValueError("Arrow IPC streams are not supported, write an Arrow IPC file instead")
 
-    return dataframes
+    return FileFormat.CSV
 
 
-def convert_to_dataframe(contents: str) -> pl.DataFrame:
-    """Convert contents from csv file to polars dataframe.
+def read_data_file(path: Path) -> pl.DataFrame:
+    """Read the plotted columns of a csv, Parquet or Arrow IPC file.
+
+    Only the first ``PLOTTED_COLUMNS`` columns are read. Arrow IPC files
+    are memory mapped.
 
     Args:
-        contents (str): The string contents of the uploaded
-        csv file, containing the data type and data seperated
-        by a comma.
+        path (Path): the path of the file.
 
     Raises:
-        ValueError: If the contents of the csv file is incorrectly
-        formatted, invalid in any way or if the string contents does
-        not contain two values separated by a comma.
-        binascii.Error: If the contents data is not valid base64.
+        ValueError: the file is not a valid data file.
+
+    Returns:
+        pl.DataFrame: The plotted columns of the file.
+    """
+    try:
+        with path.open("rb") as file:
+            file_format = detect_file_format(file.read(len(IPC_MAGIC)))
+
+        if file_format == FileFormat.PARQUET:
+            lf = pl.scan_parquet(path)
+        elif file_format == FileFormat.IPC:
+            lf = pl.scan_ipc(path, memory_map=True)
+        else:
+            lf = pl.scan_csv(path)
+
+        return lf.select(lf.columns[:PLOTTED_COLUMNS]).collect()
+    except PARSE_ERRORS as err:
+        raise ValueError(f"Could not parse data file: {err}") from err
+
+
+def map_concurrently(
+    func: Callable[[T], R], items: Sequence[T], max_workers: int | None = None
+) -> list[R | ValueError]:
+    """Call a function on items concurrently in a bounded thread pool.
+
+    Polars releases the GIL while parsing, so parsing several files in
+    threads takes roughly as long as parsing the largest file.
+
+    Args:
+        func (Callable[[T], R]): the function to call on every item.
+        items (Sequence[T]): the items.
+        max_workers (int | None): the maximum number of threads to
+        use. Defaults to ``MAX_PARSE_WORKERS``.
 
     Returns:
-        pl.DataFrame: The polars dataframe if the file contents is
-        valid, else None.
+        list[R | ValueError]: The result for every item, in the order of
+        the items. If the function raised a ValueError for an item, the
+        error is returned in its place.
     """
-    content_type, contents_data = contents.split(",")
-    decoded = base64.b64decode(contents_data)
 
-    return pl.read_csv(decoded)
+    def call(item: T) -> R | ValueError:
+        try:
+            return func(item)
+        except ValueError as err:
+            return err
+
+    if len(items) <= 1:
+        return [call(item) for item in items]
+
+    max_workers = max_workers or MAX_PARSE_WORKERS
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(call, items))
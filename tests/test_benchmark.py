@@ -0,0 +1,150 @@
+"""Benchmarks of creating and serializing figures.
+
+The timings are recorded as properties of the test suite, which are
+included in the junit xml report, e.g.
+``pytest -m benchmark --junitxml=...``.
+"""
+import json
+import os
+import time
+from typing import Any, Callable
+
+import numpy as np
+import plotly.graph_objs as go
+import plotly.io as pio
+from plotly.io.json import to_json_plotly
+import polars as pl
+import pytest
+
+from dashboard import config
+from dashboard.components.trace import TraceType, trace, trace_dict
+from dashboard.dataset_store import DatasetStore
+from dashboard.models import db as db_module
+from dashboard.typed_arrays import encode_typed_arrays
+
+POINT_COUNTS = [1_000, 10_000, 100_000]
+
+# Render all points, so that the response grows with the point count
+GRAPH_WIDTH = max(POINT_COUNTS)
+
+
+def best_time(func: Callable[[], Any], repeat: int = 3) -> float:
+    """Return the shortest time of calling a function in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def figure(n: int) -> dict[str, Any]:
+    """Return a figure with a trace of n points."""
+    x = np.arange(n, dtype=np.float64)
+    return {"data": [{"type": "scatter", "x": x, "y": np.sin(x)}], "layout": {}}
+
+
+@pytest.fixture(scope="module")
+def app_client():
+    """Return a test client of the app and the graph controller."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("SECRET_KEY", os.getenv("SECRET_KEY", "benchmark"))
+        monkeypatch.setattr(config, "MOCK_DB", True)
+        monkeypatch.setattr(pio.json.config, "default_engine", pio.json.config.default_engine)
+        db_module.disconnect()
+
+        from dashboard import main
+        from dashboard.pages.create_graph import controller
+
+        monkeypatch.setattr(controller, "dataset_store", controller.dataset_store)
+
+        yield main.server.test_client(), controller
+
+        # Disconnect the dbs connected by the app, for the db tests
+        db_module.disconnect()
+
+
+def render_figure_request(dataset_id: str) -> dict[str, Any]:
+    """Return the body of a request calling ``render_figure``."""
+    outputs = [
+        ("graph_id", "figure"),
+        ("graph_selector", "options"),
+        ("graph_selector", "value"),
+        ("graph_name", "disabled"),
+        ("dataset_ids", "data"),
+    ]
+    return {
+        "output": "..{}..".format("...".join(f"{_id}.{prop}" for _id, prop in outputs)),
+        "outputs": [{"id": _id, "property": prop} for _id, prop in outputs],
+        "inputs": [
+            {"id": "uploaded_dataset_ids", "property": "value", "value": json.dumps([dataset_id])}
+        ],
+        "state": [{"id": "graph_width", "property": "data", "value": GRAPH_WIDTH}],
+        "changedPropIds": ["uploaded_dataset_ids.value"],
+    }
+
+
+@pytest.mark.benchmark
+class TestSerializationBenchmark:
+    """Benchmarks of serializing figures."""
+
+    @pytest.mark.parametrize("n", POINT_COUNTS)
+    def test_typed_arrays(self, n: int, record_testsuite_property) -> None:
+        """Compare json lists with orjson and typed arrays."""
+        fig = figure(n)
+        as_lists = {"data": [{**fig["data"][0], "x": fig["data"][0]["x"].tolist()}]}
+        as_lists["data"][0]["y"] = fig["data"][0]["y"].tolist()
+
+        plain = to_json_plotly(as_lists, engine="json")
+        typed = to_json_plotly(encode_typed_arrays(fig), engine="orjson")
+        plain_time = best_time(lambda: to_json_plotly(as_lists, engine="json"))
+        typed_time = best_time(lambda: to_json_plotly(encode_typed_arrays(fig), engine="orjson"))
+
+        record_testsuite_property(f"json_lists_{n}_seconds", plain_time)
+        record_testsuite_property(f"typed_arrays_{n}_seconds", typed_time)
+        record_testsuite_property(f"json_lists_{n}_bytes", len(plain))
+        record_testsuite_property(f"typed_arrays_{n}_bytes", len(typed))
+        assert len(typed) < len(plain)
+
+    @pytest.mark.parametrize("n", POINT_COUNTS)
+    def test_render_figure_response(
+        self, n: int, app_client, tmp_path, record_testsuite_property
+    ) -> None:
+        """Measure the response time of rendering a data set."""
+        client, controller = app_client
+        controller.dataset_store = DatasetStore(tmp_path)
+        x = np.arange(n, dtype=np.float64)
+        dataset_id = controller.dataset_store.put(pl.DataFrame({"x": x, "y": np.sin(x)}))
+        body = render_figure_request(dataset_id)
+
+        response = client.post("/_dash-update-component", json=body)
+        response_time = best_time(lambda: client.post("/_dash-update-component", json=body))
+
+        record_testsuite_property(f"render_figure_{n}_seconds", response_time)
+        record_testsuite_property(f"render_figure_{n}_bytes", len(response.data))
+        assert response.status_code == 200
+        assert b'"bdata"' in response.data
+
+
+@pytest.mark.benchmark
+class TestTraceBenchmark:
+    """Benchmarks of creating traces."""
+
+    @pytest.mark.parametrize("n", POINT_COUNTS)
+    def test_trace_dict(self, n: int, record_testsuite_property) -> None:
+        """Compare validated traces with trace dictionaries."""
+        x = np.arange(n, dtype=np.float64)
+        df = pl.DataFrame({"x": x, "y": np.sin(x)})
+
+        def validated() -> None:
+            go_trace = trace(df, TraceType.LINE, "#000000", "Graph")
+            go.Figure(data=[go_trace]).to_plotly_json()
+
+        validated_time = best_time(validated)
+        dict_time = best_time(
+            lambda: trace_dict(df, TraceType.LINE, "#000000", "Graph", validate=False)
+        )
+
+        record_testsuite_property(f"validated_trace_{n}_seconds", validated_time)
+        record_testsuite_property(f"trace_dict_{n}_seconds", dict_time)
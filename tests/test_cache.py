@@ -0,0 +1,67 @@
+"""Tests for the cache module."""
+import time
+
+import pytest
+
+from dashboard.cache import LRUCache
+
+
+@pytest.mark.test_cache
+class TestLRUCache:
+    """Tests for the LRUCache class."""
+
+    def test_get_and_set(self) -> None:
+        """Test that set values can be retrieved."""
+        cache: LRUCache[str, int] = LRUCache()
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+    def test_hits_and_misses(self) -> None:
+        """Test that hits and misses are counted."""
+        cache: LRUCache[str, int] = LRUCache()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+
+        assert cache.hits == 2
+        assert cache.misses == 1
+
+    def test_evicts_least_recently_used(self) -> None:
+        """Test that the least recently used entry is evicted."""
+        cache: LRUCache[str, int] = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert len(cache) == 2
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_ttl(self) -> None:
+        """Test that entries expire after the time to live."""
+        cache: LRUCache[str, int] = LRUCache(ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+
+    def test_invalidate_and_clear(self) -> None:
+        """Test that entries can be removed."""
+        cache: LRUCache[str, int] = LRUCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.invalidate("a")
+
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.hits == 0
+        assert cache.misses == 0
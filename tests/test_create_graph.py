@@ -0,0 +1,101 @@
+"""Tests for the create graph page."""
+from datetime import date, datetime, timedelta
+
+from dash.exceptions import PreventUpdate
+import polars as pl
+import pytest
+
+from dashboard.dataset_store import DatasetStore
+from dashboard.pages.create_graph import controller
+from dashboard.pages.create_graph.controller import (
+    plotted_datasets,
+    slice_x_range,
+    visible_x_range,
+    with_trace_data,
+)
+
+
+@pytest.mark.test_create_graph
+class TestZoom:
+    """Tests for resampling the figure when zooming."""
+
+    def test_visible_x_range(self) -> None:
+        """Test that the x range is read from relayout data."""
+        assert visible_x_range({"xaxis.range[0]": 1, "xaxis.range[1]": 2}) == (1, 2)
+        assert visible_x_range({"xaxis.range": [1, 2]}) == (1, 2)
+        assert visible_x_range({"xaxis.autorange": True}) is None
+
+    def test_visible_x_range_unchanged(self) -> None:
+        """Test that updates without a new x range are prevented."""
+        with pytest.raises(PreventUpdate):
+            visible_x_range({"yaxis.range[0]": 1, "yaxis.range[1]": 2})
+
+    def test_slice_x_range(self) -> None:
+        """Test that rows within the x range are kept."""
+        df = pl.DataFrame({"x": [1.0, 2.0, 3.0, 4.0], "y": [1.0, 4.0, 9.0, 16.0]})
+
+        assert slice_x_range(df, (1.5, 3.5))["y"].to_list() == [4.0, 9.0]
+
+    def test_slice_x_range_category_axis(self) -> None:
+        """Test that non numeric x ranges are row indices."""
+        df = pl.DataFrame({"x": ["a", "b", "c", "d"], "y": [1.0, 4.0, 9.0, 16.0]})
+
+        assert slice_x_range(df, (0.5, 1.5))["x"].to_list() == ["a", "b", "c"]
+
+    def test_slice_x_range_date_axis(self) -> None:
+        """Test that date ranges are parsed for temporal x values."""
+        times = [datetime(2023, 1, 1, hour) for hour in range(4)]
+        df = pl.DataFrame({"x": times, "y": [1.0, 4.0, 9.0, 16.0]})
+        x_range = ("2023-01-01 00:30", "2023-01-01 02:30:00.5")
+
+        assert slice_x_range(df, x_range)["y"].to_list() == [4.0, 9.0]
+        local = df.with_columns(pl.col("x").dt.replace_time_zone("Europe/Oslo"))
+        assert slice_x_range(local, x_range)["y"].to_list() == [4.0, 9.0]
+        milliseconds = (times[1] - datetime(1970, 1, 1)) / timedelta(milliseconds=1)
+        assert slice_x_range(df, (milliseconds, milliseconds))["y"].to_list() == [4.0]
+
+    def test_slice_x_range_dates(self) -> None:
+        """Test that date columns are compared with date ranges."""
+        dates = [date(2023, 1, day) for day in range(1, 5)]
+        df = pl.DataFrame({"x": dates, "y": [1.0, 4.0, 9.0, 16.0]})
+
+        assert slice_x_range(df, ("2023-01-01 12:00", "2023-01-03"))["y"].to_list() == [4.0, 9.0]
+
+    def test_slice_x_range_invalid_date(self) -> None:
+        """Test that invalid date ranges are prevented."""
+        df = pl.DataFrame({"x": [datetime(2023, 1, 1)], "y": [1.0]})
+
+        with pytest.raises(PreventUpdate):
+            slice_x_range(df, ("yesterday", "today"))
+
+
+@pytest.mark.test_create_graph
+class TestDownload:
+    """Tests for preparing figures for download."""
+
+    def test_plotted_datasets(self, tmp_path, monkeypatch) -> None:
+        """Test that stored data sets are loaded by trace index."""
+        monkeypatch.setattr(controller, "dataset_store", DatasetStore(tmp_path))
+        df = pl.DataFrame({"x": [1.0, 2.0, 3.0], "y": [1.0, 4.0, 9.0]})
+        dataset_id = controller.dataset_store.put(df)
+
+        datasets = plotted_datasets(["0" * 32, dataset_id])
+
+        assert list(datasets) == [1]
+        assert datasets[1][0] == dataset_id
+        assert datasets[1][1].frame_equal(df)
+        assert plotted_datasets(None) == {}
+
+    def test_with_trace_data(self) -> None:
+        """Test that only the data of the given traces is replaced."""
+        fig = {
+            "data": [{"name": "a", "x": [1], "y": [1]}, {"name": "b", "x": [2], "y": [2]}],
+            "layout": {"title": "title"},
+        }
+
+        replaced = with_trace_data(fig, {1: ([1, 2, 3], [1, 4, 9]), 2: ([], [])})
+
+        assert replaced["data"][0] == fig["data"][0]
+        assert replaced["data"][1] == {"name": "b", "x": [1, 2, 3], "y": [1, 4, 9]}
+        assert replaced["layout"] == fig["layout"]
+        assert fig["data"][1]["x"] == [2]
@@ -1,6 +1,8 @@
 """Test dashboards page functionality."""
 
 import pytest
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webelement import WebElement
 
 from . import helper_test_functions as helper
 from . import settings
@@ -10,6 +12,11 @@ USERNAME = "dashboards-test-user"
 PASSWORD = "password"
 
 
+def count_rows(list_rows: WebElement) -> int:
+    """Count the rendered rows of a list."""
+    return len(list_rows.find_elements(By.CSS_SELECTOR, ".list-page > a"))
+
+
 @pytest.fixture(scope="class")
 def login_session(browser_driver: DriverType) -> None:
     """Log in session."""
@@ -48,7 +55,7 @@ class TestDashboardsPage:
         dashboards_list_items_before = helper.get_element_by_css_selector(
             browser_driver, dashboards_list_items_selector
         )
-        len_before = len(dashboards_list_items_before.get_property("children"))
+        len_before = count_rows(dashboards_list_items_before)
 
         add_button = helper.get_element_by_id(browser_driver, "dashboards-add-button")
         add_button.click()
@@ -56,6 +63,6 @@ class TestDashboardsPage:
         dashboards_list_items_after = helper.get_element_by_css_selector(
             browser_driver, dashboards_list_items_selector
         )
-        len_after = len(dashboards_list_items_after.get_property("children"))
+        len_after = count_rows(dashboards_list_items_after)
 
         assert len_before == len_after - 1
@@ -2,12 +2,35 @@
 from datetime import datetime
 
 import mongoengine
+from mongoengine import connection as mongoengine_connection
+from mongoengine import document as mongoengine_document
 import mongomock
+import numpy as np
+import polars as pl
 import pytest
 
-from dashboard.models.data import ArrayData, Data, Marker, NumericData, Setting, Settings, XyData
+from dashboard import config
+from dashboard.models import db as db_module
+from dashboard.models.data import (
+    DATA_FRAME_SCHEMAS,
+    ArrayData,
+    Comparison,
+    Data,
+    DataType,
+    Marker,
+    NumericData,
+    Setting,
+    SettingCondition,
+    Settings,
+    XyData,
+    load_data_frames,
+    query_data_frames,
+    settings_cache,
+    settings_query,
+)
 
 DB_NAME = "test-db"
+BATCHED_DATA_COUNT = 5
 
 
 @pytest.fixture(scope="module")
@@ -112,6 +135,68 @@ def xy_data_default_values(client, settings):
     ).inserted_id
 
 
+@pytest.fixture(scope="module")
+def batched_data(client):
+    """Return name of data documents with one settings document each."""
+    db = client[DB_NAME]
+    name = "Batched data"
+
+    for i in range(BATCHED_DATA_COUNT):
+        settings_id = (
+            db["settings"]
+            .insert_one({"test_case": f"Batched test case {i}", "time": datetime.now()})
+            .inserted_id
+        )
+        db["data"].insert_one(
+            {"settings_id": settings_id, "name": name, "type": "numeric", "value": i}
+        )
+
+    return name
+
+
+@pytest.fixture(scope="module")
+def queried_data(client):
+    """Return test case of settings of 1 to 4 cm in May 2023."""
+    db = client[DB_NAME]
+    test_case = "Queried test case"
+
+    for day in range(1, 5):
+        settings_id = (
+            db["settings"]
+            .insert_one(
+                {
+                    "test_case": test_case,
+                    "time": datetime(2023, 5, day),
+                    "length": {"value": day, "unit": "cm"},
+                }
+            )
+            .inserted_id
+        )
+        db["data"].insert_many(
+            [
+                {"settings_id": settings_id, "name": "Length", "type": "numeric", "value": day},
+                {"settings_id": settings_id, "name": "Lengths", "type": "array", "value": [day]},
+            ]
+        )
+
+    return test_case
+
+
+@pytest.fixture
+def find_counter(monkeypatch):
+    """Count the number of find queries sent to mongomock."""
+    counter = {"find": 0}
+    find = mongomock.collection.Collection.find
+
+    def counting_find(self, *args, **kwargs):
+        counter["find"] += 1
+        return find(self, *args, **kwargs)
+
+    monkeypatch.setattr(mongomock.collection.Collection, "find", counting_find)
+
+    return counter
+
+
 @pytest.mark.test_data_db
 class TestDataDb:
     """Contains tests for testing data db."""
@@ -152,6 +237,39 @@ class TestDataDb:
         xy = data_obj.resolve()
 
         assert isinstance(xy.markers[0], Marker)
+        assert xy.markers is xy.markers
+
+    def test_markers_init(self):
+        """Test xy data is created with marker dicts or markers."""
+        marker = Marker(text="marker", x=1.0, y=1.0)
+        xy = XyData(
+            data=None,
+            id=None,
+            settings=None,
+            name="xy",
+            type=DataType.XY_PLOT,
+            x=[1.0],
+            y=[1.0],
+            markers=[{"text": "marker", "x": 1.0, "y": 1.0}, marker],
+        )
+
+        assert xy.markers == [marker, marker]
+
+    def test_xy_arrays(self, xy_data):
+        """Test xy sequences are float64 arrays."""
+        xy = Data.objects.get(id=xy_data).resolve()
+
+        assert isinstance(xy.x, np.ndarray)
+        assert xy.x.dtype == np.float64
+        assert xy.y.flags["C_CONTIGUOUS"]
+        assert xy.to_frame()["y"].to_list() == [1.0, 4.0, 9.0]
+
+    def test_array_values(self, array_data):
+        """Test array values are a float64 array."""
+        array = Data.objects.get(id=array_data).resolve()
+
+        assert isinstance(array.value, np.ndarray)
+        assert array.value.dtype == np.float64
 
     def test_settings(self, settings):
         """Test settings model."""
@@ -164,3 +282,365 @@ class TestDataDb:
         assert isinstance(settings.settings["set_1_1"], Setting)
         assert isinstance(settings.settings["set_1_2"], Setting)
         assert isinstance(settings.settings["set_2_1"], Setting)
+
+    def test_load_data_frames(self, settings, numeric_data, array_data, xy_data):
+        """Test data documents are loaded into typed data frames."""
+        frames = load_data_frames({"_id": {"$in": [numeric_data, array_data, xy_data]}})
+
+        for data_type, schema in DATA_FRAME_SCHEMAS.items():
+            assert frames[data_type].schema == schema
+            assert frames[data_type].height == 1
+
+        assert frames[DataType.NUMERIC]["value"][0] == 3.14
+        assert frames[DataType.ARRAY]["value"][0].to_list() == [1.6180, 2.7182, 3.1415]
+        assert frames[DataType.XY_PLOT]["y"][0].to_list() == [1.0, 4.0, 9.0]
+        assert frames[DataType.XY_PLOT]["settings_id"][0] == str(settings)
+
+    def test_load_data_frames_batches(self, numeric_data, array_data, xy_data):
+        """Test the result does not depend on the batch size."""
+        query = {"_id": {"$in": [numeric_data, array_data, xy_data]}}
+        frames = load_data_frames(query)
+        batched_frames = load_data_frames(query, batch_size=1)
+
+        for data_type in DataType:
+            assert frames[data_type].frame_equal(batched_frames[data_type])
+
+    def test_load_data_frames_empty(self):
+        """Test empty data frames are returned if nothing matches."""
+        frames = load_data_frames({"name": "Missing data"})
+
+        for data_type in DataType:
+            assert isinstance(frames[data_type], pl.DataFrame)
+            assert frames[data_type].is_empty()
+
+    def test_with_settings(self, batched_data):
+        """Test settings are dereferenced by with_settings."""
+        documents = Data.objects(name=batched_data).with_settings()
+
+        assert len(documents) == BATCHED_DATA_COUNT
+        assert all(isinstance(document.settings, Settings) for document in documents)
+        assert {document.settings.test_case for document in documents} == {
+            f"Batched test case {i}" for i in range(BATCHED_DATA_COUNT)
+        }
+
+    def test_with_settings_shares_settings(self, settings, numeric_data, array_data):
+        """Test data with the same settings share a Settings object."""
+        documents = Data.objects(id__in=[numeric_data, array_data]).with_settings()
+
+        assert documents[0].settings is documents[1].settings
+        assert documents[0].settings.id == settings
+
+    def test_with_settings_query_count(self, batched_data, find_counter):
+        """Test with_settings needs two queries instead of N + 1."""
+        for document in Data.objects(name=batched_data):
+            document.settings.test_case
+
+        assert find_counter["find"] == BATCHED_DATA_COUNT + 1
+
+        find_counter["find"] = 0
+        for document in Data.objects(name=batched_data).with_settings():
+            document.settings.test_case
+
+        assert find_counter["find"] == 2
+
+    def test_settings_cache(self, settings):
+        """Test parsed settings are cached by db and id."""
+        settings_cache.clear()
+        first = Settings.objects.get(id=settings)
+        second = Settings.objects.get(id=settings)
+
+        assert second.settings == first.settings
+        assert second.settings is not first.settings
+        assert settings_cache.misses == 1
+        assert settings_cache.hits == 1
+
+    def test_settings_cache_copies(self, settings):
+        """Test changing loaded settings does not change the cache."""
+        settings_cache.clear()
+        first = Settings.objects.get(id=settings)
+        first.settings["set_1_1"].value = 10
+
+        second = Settings.objects.get(id=settings)
+
+        assert second.settings["set_1_1"].value == 1
+        assert settings_cache.hits == 1
+
+    @pytest.mark.parametrize("method", ["update", "modify"])
+    def test_settings_cache_invalidated_on_update(self, settings, method):
+        """Test cached settings are invalidated by query set updates."""
+        settings_cache.clear()
+        Settings.objects.get(id=settings).settings
+
+        getattr(Settings.objects(id=settings), method)(__raw__={"$set": {"set_1_1.value": 5}})
+        updated = Settings.objects.get(id=settings).settings["set_1_1"].value
+        Settings.objects(id=settings).update(__raw__={"$set": {"set_1_1.value": 1}})
+
+        assert updated == 5
+
+    def test_settings_cache_invalidated_on_save(self, settings):
+        """Test cached settings are invalidated when saved."""
+        settings_cache.clear()
+
+        document = Settings.objects.get(id=settings)
+        document.settings
+        document.save()
+        Settings.objects.get(id=settings).settings
+
+        assert settings_cache.hits == 0
+        assert settings_cache.misses == 2
+
+
+def _substitute(value, variables):
+    """Replace the ``$$name`` variables in a value of a pipeline."""
+    if isinstance(value, dict):
+        return {key: _substitute(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, variables) for item in value]
+    if isinstance(value, str) and value.startswith("$$"):
+        return variables[value[2:]]
+    return value
+
+
+@pytest.fixture
+def pipeline_lookup(monkeypatch):
+    """Run ``$lookup`` stages with a ``pipeline`` in mongomock.
+
+    Mongomock only implements lookups by ``localField``, so the
+    pipeline of the lookup is run for every document. The aggregated
+    pipelines are returned.
+    """
+    pipelines = []
+    aggregate = mongomock.collection.Collection.aggregate
+
+    def lookup_aggregate(self, pipeline, **kwargs):
+        pipelines.append(pipeline)
+        index = next(
+            (i for i, stage in enumerate(pipeline) if "pipeline" in stage.get("$lookup", {})),
+            None,
+        )
+        if index is None:
+            return aggregate(self, pipeline, **kwargs)
+
+        lookup = pipeline[index]["$lookup"]
+        joined = []
+        for document in aggregate(self, pipeline[:index]):
+            variables = {name: document[path[1:]] for name, path in lookup["let"].items()}
+            lookup_pipeline = _substitute(lookup["pipeline"], variables)
+            document[lookup["as"]] = list(
+                aggregate(self.database[lookup["from"]], lookup_pipeline)
+            )
+            joined.append(document)
+
+        if not joined:
+            return iter([])
+        results = self.database["lookup_results"]
+        results.insert_many(joined)
+        rest = index + 1
+        documents = list(aggregate(results, pipeline[rest:], **kwargs))
+        results.drop()
+        return iter(documents)
+
+    monkeypatch.setattr(mongomock.collection.Collection, "aggregate", lookup_aggregate)
+
+    return pipelines
+
+
+@pytest.mark.test_data_db
+@pytest.mark.usefixtures("pipeline_lookup")
+class TestQueryDataFrames:
+    """Tests for querying data by its settings."""
+
+    def test_settings_query(self):
+        """Test the filter created for settings."""
+        query = settings_query(
+            test_case="Test case",
+            start=datetime(2023, 5, 1),
+            end=datetime(2023, 6, 1),
+            conditions=[
+                SettingCondition("length", Comparison.GT, 2, "cm"),
+                SettingCondition("length", Comparison.LTE, 4),
+            ],
+        )
+
+        assert query == {
+            "test_case": "Test case",
+            "time": {"$gte": datetime(2023, 5, 1), "$lt": datetime(2023, 6, 1)},
+            "length.value": {"$gt": 2, "$lte": 4},
+            "length.unit": "cm",
+        }
+
+    @pytest.mark.parametrize("name", ["", "$where", "length.value"])
+    def test_settings_query_invalid_name(self, name):
+        """Test that invalid setting names are rejected."""
+        with pytest.raises(ValueError):
+            settings_query(conditions=[SettingCondition(name, Comparison.EQ, 1)])
+
+    def test_query_by_test_case(self, queried_data):
+        """Test that only data of the test case is loaded."""
+        frames = query_data_frames(test_case=queried_data)
+
+        assert frames[DataType.NUMERIC]["value"].sort().to_list() == [1, 2, 3, 4]
+        assert frames[DataType.ARRAY].height == 4
+        assert frames[DataType.XY_PLOT].is_empty()
+
+    def test_query_by_time_range(self, queried_data):
+        """Test that the start is inclusive and the end exclusive."""
+        frames = query_data_frames(
+            test_case=queried_data,
+            start=datetime(2023, 5, 2),
+            end=datetime(2023, 5, 4),
+            data_type=DataType.NUMERIC,
+        )
+
+        assert frames[DataType.NUMERIC]["value"].sort().to_list() == [2, 3]
+
+    def test_query_by_setting(self, queried_data):
+        """Test filtering on the value and unit of a setting."""
+        frames = query_data_frames(
+            test_case=queried_data,
+            conditions=[SettingCondition("length", Comparison.GT, 2, "cm")],
+            data_type=DataType.NUMERIC,
+        )
+        other_unit = query_data_frames(
+            test_case=queried_data,
+            conditions=[SettingCondition("length", Comparison.GT, 2, "mm")],
+        )
+
+        assert frames[DataType.NUMERIC]["value"].sort().to_list() == [3, 4]
+        assert frames[DataType.ARRAY].is_empty()
+        assert all(frame.is_empty() for frame in other_unit.values())
+
+    def test_query_type_in_lookup(self, queried_data, pipeline_lookup):
+        """Test that the data type is filtered by the lookup."""
+        query_data_frames(test_case=queried_data, data_type=DataType.NUMERIC)
+
+        lookup = next(stage["$lookup"] for stage in pipeline_lookup[0] if "$lookup" in stage)
+        assert lookup["pipeline"][0]["$match"]["type"] == "numeric"
+
+    def test_query_schema(self, queried_data):
+        """Test that queried and loaded data have the same columns."""
+        frames = query_data_frames(test_case=queried_data)
+
+        for data_type, frame in frames.items():
+            assert frame.columns == list(DATA_FRAME_SCHEMAS[data_type])
+
+
+@pytest.fixture
+def projects(monkeypatch: pytest.MonkeyPatch):
+    """Create two project dbs on a mock process client."""
+    monkeypatch.setattr(config, "MOCK_DB", True)
+    db_module.disconnect()
+    client = db_module.get_client()
+
+    for project in ["rig-1", "rig-2"]:
+        settings_id = (
+            client[project]["settings"]
+            .insert_one({"test_case": project, "time": datetime.now()})
+            .inserted_id
+        )
+        client[project]["data"].insert_one(
+            {"settings_id": settings_id, "name": project, "type": "numeric", "value": 1.0}
+        )
+
+    yield ["rig-1", "rig-2"]
+
+    for project in ["rig-1", "rig-2"]:
+        client.drop_database(project)
+    db_module.disconnect()
+
+
+@pytest.mark.test_data_db
+class TestProjects:
+    """Tests for querying several project dbs."""
+
+    def test_in_project(self, projects):
+        """Test that each query uses its own project db."""
+        for project in projects:
+            documents = Data.in_project(project).with_settings()
+
+            assert [document.name for document in documents] == [project]
+            assert documents[0].settings.test_case == project
+
+    def test_in_project_dereferences_settings(self, projects):
+        """Test that settings are dereferenced from the project db."""
+        for project in projects:
+            document = Data.in_project(project).get()
+
+            assert document.settings.test_case == project
+            assert document.settings._get_db().name == project
+
+    def test_in_project_writes(self, projects):
+        """Test that loaded documents are written to their project."""
+        client = db_module.get_client()
+        document = Data.in_project("rig-1").get()
+
+        document.name = "saved"
+        document.save()
+        document.modify(set__name="modified")
+        client["rig-1"]["data"].update_one({}, {"$set": {"name": "reloaded"}})
+        document.reload()
+        settings = document.settings
+        settings.test_case = "saved"
+        settings.save()
+
+        assert document.name == "reloaded"
+        assert client["rig-1"]["settings"].find_one()["test_case"] == "saved"
+        assert client["rig-2"]["data"].find_one()["name"] == "rig-2"
+        assert Data.objects(name__in=["saved", "modified", "reloaded"]).count() == 0
+
+        document.delete()
+        assert client["rig-1"]["data"].count_documents({}) == 0
+        assert client["rig-2"]["data"].count_documents({}) == 1
+
+    def test_in_project_without_data_alias(self, projects, monkeypatch):
+        """Test that project dbs are queried without the data alias."""
+        get_db = mongoengine_connection.get_db
+
+        def get_project_db(alias: str = mongoengine_connection.DEFAULT_CONNECTION_NAME):
+            assert alias != "data"
+            return get_db(alias)
+
+        monkeypatch.setattr(mongoengine_document, "get_db", get_project_db)
+        monkeypatch.setattr(Data, "_collection", None)
+
+        assert Data.in_project("rig-1").count() == 1
+
+    def test_settings_cache_per_project(self, projects):
+        """Test that equal settings ids are cached apart per project."""
+        client = db_module.get_client()
+        settings_cache.clear()
+        settings = client["rig-1"]["settings"].find_one()
+        client["rig-2"]["settings"].delete_many({})
+        client["rig-2"]["settings"].insert_one({**settings, "length": {"value": 2}})
+
+        first = Settings.in_project("rig-1").get()
+        second = Settings.in_project("rig-2").get()
+
+        assert first.id == second.id
+        assert "length" not in first.settings
+        assert second.settings["length"].value == 2
+
+    def test_aliases_share_client(self, projects):
+        """Test that project aliases use the process client."""
+        for project in projects:
+            Data.in_project(project).count()
+
+        connections = {
+            id(mongoengine_connection.get_connection(alias)) for alias in db_module._aliases
+        }
+        assert connections == {id(db_module.get_client())}
+
+    def test_load_data_frames_in_project(self, projects):
+        """Test that data frames are loaded from a project db."""
+        frames = load_data_frames(project="rig-2")
+
+        assert frames[DataType.NUMERIC]["name"].to_list() == ["rig-2"]
+
+    @pytest.mark.usefixtures("pipeline_lookup")
+    def test_query_data_frames_in_project(self, projects):
+        """Test that data is queried from a project db."""
+        frames = query_data_frames(test_case="rig-1", project="rig-1")
+        other = query_data_frames(test_case="rig-1", project="rig-2")
+
+        assert frames[DataType.NUMERIC]["name"].to_list() == ["rig-1"]
+        assert other[DataType.NUMERIC].is_empty()
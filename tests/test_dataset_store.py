@@ -0,0 +1,61 @@
+"""Tests for the data set store."""
+import os
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from dashboard.dataset_store import DatasetStore
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> DatasetStore:
+    """Return a data set store using a temporary directory."""
+    return DatasetStore(tmp_path / "datasets")
+
+
+@pytest.fixture
+def data_frame() -> pl.DataFrame:
+    """Return an example data frame."""
+    return pl.DataFrame({"x": [1.0, 2.0, 3.0], "y": [1.0, 4.0, 9.0]})
+
+
+@pytest.mark.test_dataset_store
+class TestDatasetStore:
+    """Tests for the DatasetStore class."""
+
+    def test_put_and_get(self, store: DatasetStore, data_frame: pl.DataFrame) -> None:
+        """Test that stored data frames can be loaded."""
+        dataset_id = store.put(data_frame)
+
+        assert store.get(dataset_id).frame_equal(data_frame)
+
+    def test_shared_between_stores(self, store: DatasetStore, data_frame: pl.DataFrame) -> None:
+        """Test that data sets are read from disk by other workers."""
+        dataset_id = store.put(data_frame)
+        other_worker = DatasetStore(store.directory)
+
+        assert other_worker.get(dataset_id).frame_equal(data_frame)
+
+    def test_missing_and_invalid_ids(self, store: DatasetStore) -> None:
+        """Test that unknown and invalid ids are not found."""
+        assert store.get("0" * 32) is None
+        assert store.get("../secret") is None
+
+    def test_delete(self, store: DatasetStore, data_frame: pl.DataFrame) -> None:
+        """Test that deleted data sets can not be loaded."""
+        dataset_id = store.put(data_frame)
+        store.delete(dataset_id)
+
+        assert store.get(dataset_id) is None
+
+    def test_remove_expired(self, store: DatasetStore, data_frame: pl.DataFrame) -> None:
+        """Test that old data sets are removed."""
+        old_id = store.put(data_frame)
+        new_id = store.put(data_frame)
+        os.utime(store.directory / f"{old_id}.arrow", (0, 0))
+
+        store.remove_expired()
+
+        assert store.get(old_id) is None
+        assert store.get(new_id) is not None
@@ -0,0 +1,158 @@
+"""Tests for the database connection management."""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from mongoengine import connection as mongoengine_connection
+import pytest
+
+from dashboard import config
+from dashboard.models import db
+
+ALIAS = "test-db-alias"
+
+
+@pytest.fixture(autouse=True)
+def mock_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Use a fresh mock process client in every test."""
+    monkeypatch.setattr(config, "MOCK_DB", True)
+    db.disconnect()
+    db._project_catalog.clear()
+    yield
+    for db_name in db.get_client().list_database_names():
+        db.get_client().drop_database(db_name)
+    db.disconnect()
+
+
+@pytest.mark.test_db
+class TestConnectionManagement:
+    """Tests for sharing a client per process."""
+
+    def test_client_reused(self) -> None:
+        """Test that the same client is returned in a process."""
+        assert db.get_client() is db.get_client()
+
+    def test_alias_uses_process_client(self) -> None:
+        """Test that mongoengine aliases use the process client."""
+        db.connect_data_db("project", alias=ALIAS)
+
+        assert mongoengine_connection.get_connection(ALIAS) is db.get_client()
+        assert mongoengine_connection.get_db(ALIAS).name == "project"
+
+    def test_reconnect_other_db(self) -> None:
+        """Test that connecting an alias to another db switches db."""
+        db.connect_data_db("project", alias=ALIAS)
+        db.connect_data_db("other", alias=ALIAS)
+
+        assert mongoengine_connection.get_connection(ALIAS) is db.get_client()
+        assert mongoengine_connection.get_db(ALIAS).name == "other"
+
+    def test_disconnect(self) -> None:
+        """Test that disconnecting unregisters the aliases."""
+        db.connect_data_db("project", alias=ALIAS)
+        client = db.get_client()
+
+        db.disconnect()
+
+        with pytest.raises(mongoengine_connection.ConnectionFailure):
+            mongoengine_connection.get_connection(ALIAS)
+        assert db.get_client() is not client
+
+    def test_reset_after_fork(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a forked process resets the inherited state."""
+        monkeypatch.setattr(db, "_lock", db._lock)
+        monkeypatch.setattr(db, "_pool_statistics", db.PoolStatistics())
+        client = db.get_client()
+        lock = db._lock
+        db._pool_statistics.connection_created(None)
+        # A thread of the parent process may hold the lock
+        lock.acquire()
+
+        db._reset_after_fork()
+
+        assert db._lock is not lock
+        assert db.pool_statistics()["created"] == 0
+        assert db.get_client() is client
+        lock.release()
+
+    def test_pool_options(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that pool options are read from the environment."""
+        monkeypatch.setenv("DB_MAX_POOL_SIZE", "20")
+        monkeypatch.delenv("DB_MIN_POOL_SIZE", raising=False)
+
+        options = db._pool_options()
+
+        assert options["maxPoolSize"] == 20
+        assert "minPoolSize" not in options
+
+    def test_pool_statistics(self) -> None:
+        """Test that pool events are counted."""
+        statistics = db.PoolStatistics()
+        statistics.connection_created(None)
+        statistics.connection_checked_out(None)
+
+        assert statistics.as_dict()["open"] == 1
+        assert statistics.as_dict()["in_use"] == 1
+
+    def test_pool_statistics_threads(self) -> None:
+        """Test that events reported by several threads are counted."""
+        statistics = db.PoolStatistics()
+
+        def check_out(_: int) -> None:
+            for _ in range(1000):
+                statistics.connection_checked_out(None)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(check_out, range(4)))
+
+        assert statistics.as_dict()["checked_out"] == 4000
+
+
+def create_project_db(name: str) -> None:
+    """Create a database with the project db collections."""
+    project_db = db.get_client()[name]
+    project_db["data"].insert_one({})
+    project_db["settings"].insert_one({})
+
+
+@pytest.mark.test_db
+class TestListProjectDbs:
+    """Tests for the project catalog."""
+
+    def test_project_dbs_found(self) -> None:
+        """Test that only dbs with data and settings are found."""
+        create_project_db("project-a")
+        create_project_db("project-b")
+        db.get_client()["other"]["data"].insert_one({})
+
+        assert sorted(db.list_project_dbs()) == ["project-a", "project-b"]
+
+    def test_catalog_cached(self) -> None:
+        """Test that the catalog is cached until refreshed."""
+        create_project_db("project-a")
+        db.list_project_dbs()
+        create_project_db("project-b")
+
+        assert db.list_project_dbs() == ["project-a"]
+        assert sorted(db.list_project_dbs(refresh=True)) == ["project-a", "project-b"]
+
+    def test_catalog_persisted(self) -> None:
+        """Test that the catalog is loaded from the user db."""
+        create_project_db("project-a")
+        db.list_project_dbs()
+        db._project_catalog.clear()
+        create_project_db("project-b")
+
+        assert db.list_project_dbs() == ["project-a"]
+
+    def test_old_catalog_ignored(self) -> None:
+        """Test that an outdated persisted catalog is not used."""
+        create_project_db("project-a")
+        db.get_client()[db.USER_DB_NAME][db.PROJECT_CATALOG_COLLECTION].insert_one(
+            {
+                "_id": db.PROJECT_CATALOG_ID,
+                "project_dbs": [],
+                "updated": datetime.now() - db.PROJECT_CATALOG_MAX_AGE - timedelta(minutes=1),
+            }
+        )
+
+        assert db.list_project_dbs() == ["project-a"]
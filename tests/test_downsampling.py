@@ -0,0 +1,84 @@
+"""Tests for the downsampling module."""
+import numpy as np
+import polars as pl
+import pytest
+
+from dashboard.components.trace import TraceType, trace
+from dashboard.downsampling import (
+    DownsampleMethod,
+    downsample,
+    lttb_indices,
+    min_max_indices,
+    target_points,
+)
+
+N_POINTS = 10_000
+N_OUT = 100
+
+
+@pytest.fixture
+def data_frame() -> pl.DataFrame:
+    """Return a data frame with a noisy sine wave and a single peak."""
+    x = np.linspace(0, 10, N_POINTS)
+    y = np.sin(x) + np.random.default_rng(0).normal(0, 0.1, N_POINTS)
+    y[N_POINTS // 3] = 100
+
+    return pl.DataFrame({"x": x, "y": y})
+
+
+@pytest.mark.test_downsampling
+class TestDownsampling:
+    """Tests for the downsampling functions."""
+
+    def test_target_points(self) -> None:
+        """Test that the target point count depends on the width."""
+        assert target_points(500) < target_points(1000)
+        assert target_points(None) == target_points()
+
+    def test_lttb_indices(self, data_frame: pl.DataFrame) -> None:
+        """Test that LTTB keeps n_out points including the ends."""
+        indices = lttb_indices(data_frame["x"].to_numpy(), data_frame["y"].to_numpy(), N_OUT)
+
+        assert len(indices) == N_OUT
+        assert indices[0] == 0
+        assert indices[-1] == N_POINTS - 1
+        assert np.all(np.diff(indices) > 0)
+
+    def test_min_max_indices(self, data_frame: pl.DataFrame) -> None:
+        """Test that min-max keeps the extremes of every bucket."""
+        y = data_frame["y"].to_numpy()
+        indices = min_max_indices(y, N_OUT)
+
+        assert len(indices) <= N_OUT + 2
+        assert np.argmax(y) in indices
+        assert np.argmin(y) in indices
+
+    @pytest.mark.parametrize("method", [DownsampleMethod.LTTB, DownsampleMethod.MIN_MAX])
+    def test_downsample_keeps_peaks(self, data_frame: pl.DataFrame, method) -> None:
+        """Test that downsampling keeps the peak and the kept rows."""
+        downsampled = downsample(data_frame, method, N_OUT, keep=[1, 2])
+
+        assert downsampled.height <= N_OUT + 4
+        assert downsampled["y"].max() == 100
+        assert data_frame["x"][1] in downsampled["x"]
+        assert data_frame["x"][2] in downsampled["x"]
+
+    def test_downsample_small_data_frame(self, data_frame: pl.DataFrame) -> None:
+        """Test that data frames with few rows are not downsampled."""
+        small = data_frame.head(N_OUT)
+
+        assert downsample(small, DownsampleMethod.LTTB, N_OUT) is small
+        assert downsample(data_frame, DownsampleMethod.NONE, N_OUT) is data_frame
+
+    def test_downsample_non_numeric_x(self, data_frame: pl.DataFrame) -> None:
+        """Test that the row index is used for non numeric x values."""
+        df = data_frame.with_columns(pl.col("x").cast(pl.Utf8))
+        downsampled = downsample(df, DownsampleMethod.LTTB, N_OUT)
+
+        assert downsampled.height <= N_OUT + 2
+
+    def test_trace_downsampling(self, data_frame: pl.DataFrame) -> None:
+        """Test that traces are downsampled."""
+        tr = trace(data_frame, TraceType.LINE, "#000000", "Graph", DownsampleMethod.LTTB, N_OUT)
+
+        assert len(tr.x) <= N_OUT + 2
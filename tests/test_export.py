@@ -0,0 +1,203 @@
+"""Tests for exporting figures."""
+import gzip
+
+import diskcache
+from flask import Flask
+import pytest
+
+from dashboard import export
+from dashboard.export import (
+    ExportFormat,
+    ExportOptions,
+    ExportPool,
+    export_figure,
+    export_image,
+    export_key,
+    export_slot,
+    plotlyjs_url,
+)
+from dashboard.typed_arrays import encode_typed_arrays
+
+FIGURE = {"data": [{"type": "scatter", "x": [1, 2, 3], "y": [1, 4, 9]}]}
+LARGE_FIGURE = {"data": [{"type": "scatter", "x": list(range(1000)), "y": list(range(1000))}]}
+PLOTLYJS_URL = "https://graphit.example/export/plotly.min.js"
+
+
+@pytest.fixture
+def export_cache(tmp_path, monkeypatch):
+    """Use an empty export cache."""
+    cache = diskcache.Cache(tmp_path)
+    monkeypatch.setattr(export, "export_cache", cache)
+
+    yield cache
+
+    cache.close()
+
+
+@pytest.fixture
+def export_pool(export_cache, tmp_path, monkeypatch):
+    """Run an export pool with an empty queue and figure cache."""
+    queue = diskcache.Deque(directory=str(tmp_path / "queue"))
+    figures = diskcache.Cache(tmp_path / "figures")
+    monkeypatch.setattr(export, "export_queue", queue)
+    monkeypatch.setattr(export, "figure_cache", figures)
+    # Html is exported without kaleido, so the browser is not started
+    monkeypatch.setattr(export, "_warm_kaleido", lambda: None)
+    pool = ExportPool(max_workers=1)
+    pool.start()
+
+    yield pool
+
+    pool.shutdown()
+    figures.close()
+
+
+@pytest.mark.test_export
+class TestExport:
+    """Tests for exporting figures."""
+
+    def test_export_html(self) -> None:
+        """Test that figures are exported to html."""
+        content = export_figure(FIGURE, ExportFormat.HTML)
+
+        assert content.startswith(b"<html>")
+        assert b"[1,4,9]" in content
+
+    def test_export_typed_arrays(self) -> None:
+        """Test that figures with typed arrays are exported."""
+        content = export_figure(encode_typed_arrays(LARGE_FIGURE), ExportFormat.HTML)
+
+        assert b'"x":[0,1,2,3,' in content
+
+    def test_export_invalid_figure(self) -> None:
+        """Test that invalid figures are rejected."""
+        with pytest.raises(ValueError):
+            export_figure({"data": [{"type": "unknown"}]}, ExportFormat.HTML)
+
+    def test_image_formats(self) -> None:
+        """Test that only html is exported without kaleido."""
+        assert [file_format.is_image for file_format in ExportFormat] == [
+            True,
+            True,
+            True,
+            False,
+        ]
+
+    def test_export_slots(self, export_cache, monkeypatch) -> None:
+        """Test that all semaphores share the configured slots."""
+        monkeypatch.setenv(export.EXPORT_WORKERS_ENV_NAME, "2")
+
+        with export_slot():
+            with export_slot():
+                assert export_cache.get(export._EXPORT_SLOTS_KEY) == 0
+
+        assert export_cache.get(export._EXPORT_SLOTS_KEY) == 2
+
+    def test_export_key_ignores_key_order(self) -> None:
+        """Test that equal figures have the same key."""
+        reordered = {"data": [{"y": [1, 4, 9], "x": [1, 2, 3], "type": "scatter"}]}
+
+        assert export_key(reordered, ExportFormat.PNG) == export_key(FIGURE, ExportFormat.PNG)
+
+    def test_export_key_differs(self) -> None:
+        """Test that the key depends on the figure, format and size."""
+        other = {"data": [{"type": "scatter", "x": [1, 2, 3], "y": [1, 4, 8]}]}
+        keys = {
+            export_key(FIGURE, ExportFormat.PNG),
+            export_key(other, ExportFormat.PNG),
+            export_key(FIGURE, ExportFormat.PDF),
+            export_key(FIGURE, ExportFormat.PNG, ExportOptions(width=800)),
+            export_key(FIGURE, ExportFormat.PNG, ExportOptions(height=800)),
+        }
+
+        assert len(keys) == 5
+
+    def test_figure_cache_evicts_least_recently_used(self) -> None:
+        """Test the eviction settings of the figure cache."""
+        assert export.figure_cache.eviction_policy == "least-recently-used"
+        assert export.figure_cache.size_limit == export.DEFAULT_FIGURE_CACHE_SIZE
+
+    def test_export_pool(self, export_pool) -> None:
+        """Test that queued figures are exported by the pool."""
+        content = export_image(FIGURE, ExportFormat.HTML)
+        key = export_key(FIGURE, ExportFormat.HTML)
+
+        assert content.startswith(b"<html>")
+        assert export.figure_cache.get(key) == content
+        assert export._EXPORT_STARTED_KEY.format(key) in export.export_cache
+        assert export.export_cache.get(export._EXPORT_SLOTS_KEY) == 2
+
+    def test_export_pool_reuses_processes(self, export_pool) -> None:
+        """Test that the processes are kept between exports."""
+        other = {"data": [{"type": "scatter", "x": [1, 2, 3], "y": [1, 4, 8]}]}
+        export_image(FIGURE, ExportFormat.HTML)
+        executor = export_pool._executor
+        export_image(other, ExportFormat.HTML)
+
+        assert export_pool._executor is executor
+
+    def test_export_pool_invalid_figure(self, export_pool) -> None:
+        """Test that failed exports are reported."""
+        with pytest.raises(ValueError):
+            export_image({"data": [{"type": "unknown"}]}, ExportFormat.HTML)
+
+    def test_export_timeout(self, export_pool, monkeypatch) -> None:
+        """Test that waiting for an export is given up."""
+        export_pool.shutdown()
+        monkeypatch.setattr(export, "EXPORT_TIMEOUT", 0)
+
+        with pytest.raises(TimeoutError):
+            export_image(FIGURE, ExportFormat.HTML)
+
+
+@pytest.mark.test_export
+class TestSlimHtml:
+    """Tests for exporting slim html files."""
+
+    def test_slim_html(self) -> None:
+        """Test that plotly.js is loaded from the url."""
+        full = export_figure(LARGE_FIGURE, ExportFormat.HTML)
+        slim = export_figure(
+            LARGE_FIGURE, ExportFormat.HTML, ExportOptions(plotlyjs_url=PLOTLYJS_URL)
+        )
+
+        assert f'<script src="{PLOTLYJS_URL}"></script>'.encode() in slim
+        assert b'"dtype":"i4"' in slim
+        assert len(slim) < len(full) / 100
+
+    def test_slim_html_escapes_script(self) -> None:
+        """Test that strings in the figure can not end the script."""
+        figure = {"data": [], "layout": {"title": {"text": "</script><script>"}}}
+
+        slim = export_figure(figure, ExportFormat.HTML, ExportOptions(plotlyjs_url=PLOTLYJS_URL))
+
+        assert b"</script><script>" not in slim
+
+    def test_gzip(self) -> None:
+        """Test that compressed files are the same every time."""
+        options = ExportOptions(plotlyjs_url=PLOTLYJS_URL, compress=True)
+        content = export_figure(LARGE_FIGURE, ExportFormat.HTML, options)
+
+        assert content == export_figure(LARGE_FIGURE, ExportFormat.HTML, options)
+        assert gzip.decompress(content) == export_figure(
+            LARGE_FIGURE, ExportFormat.HTML, ExportOptions(plotlyjs_url=PLOTLYJS_URL)
+        )
+
+    def test_plotlyjs_url(self, monkeypatch) -> None:
+        """Test that plotly.js is served by the app by default."""
+        monkeypatch.delenv(export.PLOTLYJS_URL_ENV_NAME, raising=False)
+        assert plotlyjs_url("https://graphit.example/create-graph") == PLOTLYJS_URL
+
+        monkeypatch.setenv(export.PLOTLYJS_URL_ENV_NAME, "/static/plotly.min.js")
+        assert plotlyjs_url("https://graphit.example/create-graph") == "/static/plotly.min.js"
+
+    def test_serve_plotlyjs(self) -> None:
+        """Test that the app serves plotly.js."""
+        app = Flask(__name__)
+        app.register_blueprint(export.blueprint)
+
+        response = app.test_client().get("/export/plotly.min.js")
+
+        assert response.status_code == 200
+        assert response.data.startswith(b"/**\n* plotly.js")
+        response.close()
@@ -0,0 +1,60 @@
+"""Tests for the project db index management."""
+import pytest
+
+from dashboard import config
+from dashboard.models import db, indexes
+
+PROJECT = "rig-indexes"
+
+
+@pytest.fixture(autouse=True)
+def project(monkeypatch: pytest.MonkeyPatch):
+    """Create a project db on a mock process client."""
+    monkeypatch.setattr(config, "MOCK_DB", True)
+    db.disconnect()
+    client = db.get_client()
+    client[PROJECT]["data"].insert_one({"name": "data"})
+    client[PROJECT]["settings"].insert_one({"test_case": "test"})
+
+    yield PROJECT
+
+    client.drop_database(PROJECT)
+    db.disconnect()
+
+
+@pytest.mark.test_indexes
+class TestIndexes:
+    """Tests for creating and checking indexes."""
+
+    def test_ensure_indexes(self) -> None:
+        """Test that all declared indexes are created."""
+        assert len(indexes.missing_indexes(PROJECT)) == 5
+
+        created = indexes.ensure_indexes(PROJECT)
+
+        assert "data.settings_id_1_type_1" in created
+        assert "settings.test_case_1_time_-1" in created
+        assert indexes.missing_indexes(PROJECT) == []
+
+    def test_collection_scan_plans(self) -> None:
+        """Test that collection scans are found in nested plans."""
+        index_plan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}
+        or_plan = {"stage": "OR", "inputStages": [index_plan, {"stage": "COLLSCAN"}]}
+
+        assert not indexes._is_collection_scan(index_plan)
+        assert indexes._is_collection_scan(or_plan)
+
+    def test_explain_unsupported(self) -> None:
+        """Test that a db which can't explain queries is reported."""
+        with pytest.raises(indexes.ExplainUnsupported):
+            indexes.collection_scans(PROJECT)
+
+    def test_check_command(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that check fails until the indexes are ensured."""
+        assert indexes.main(["check", "--project", PROJECT]) == 1
+        output = capsys.readouterr().out
+        assert "missing index data.name_1" in output
+        assert f"{PROJECT}: Could not explain query" in output
+
+        assert indexes.main(["ensure", "--project", PROJECT]) == 0
+        assert indexes.main(["check", "--project", PROJECT]) == 0
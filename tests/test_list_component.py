@@ -5,9 +5,16 @@ from dash import dcc, html
 import pytest
 
 from dashboard.components.list_component import (
+    MAX_RENDERED_PAGES,
+    add_page,
     generate_list_rows,
     generate_list_titles,
     list_component,
+    list_page,
+    list_window,
+    page_to_load,
+    prepend_row,
+    window_sentinels,
 )
 
 LIST_TITLES = ["Title", "Last edited at", "Created at"]
@@ -76,3 +83,110 @@ class TestListComponent:
             raise AssertionError("Can create dashboards_list_component of faulty dimensions")
         except IndexError:
             assert True
+
+    def test_row_ids(self) -> None:
+        """Test that rows are indexed by the given row ids."""
+        rows = generate_list_rows(LIST_ROWS, ["a", "b", "c"])
+
+        assert [row.id["index"] for row in rows] == ["a", "b", "c"]
+
+    def test_sentinel_hidden_without_more_rows(self) -> None:
+        """Test that the sentinel is hidden without more rows."""
+        previous = list_component(LIST_TITLES, LIST_ROWS, "id", has_more=True).children[1]
+        assert "hidden" in previous.className
+        assert previous.id == {"parent": "id", "child": "load-previous"}
+
+        sentinel = list_component(LIST_TITLES, LIST_ROWS, "id").children[-1]
+        assert "hidden" in sentinel.className
+
+        sentinel = list_component(LIST_TITLES, LIST_ROWS, "id", has_more=True).children[-1]
+        assert "hidden" not in sentinel.className
+        assert sentinel.id == {"parent": "id", "child": "load-more"}
+
+
+def apply_patch(children: list, patch) -> list:
+    """Apply the list operations of a patch to a copy of children."""
+    children = list(children)
+    for operation in patch.to_plotly_json()["operations"]:
+        location, value = operation["location"], operation["params"].get("value")
+        match operation["operation"], location:
+            case "Append", []:
+                children.append(value)
+            case "Prepend", []:
+                children.insert(0, value)
+            case "Delete", [index]:
+                del children[index]
+            case "Prepend", [index, "props", "children"]:
+                page = children[index]
+                children[index] = list_page([value, *page.children])
+            case _:
+                raise AssertionError(f"Unexpected operation {operation}")
+
+    return children
+
+
+def page_rows(page: int) -> list[dcc.Link]:
+    """Return two rows of a page."""
+    return generate_list_rows([["a"], ["b"]], [f"{page}a", f"{page}b"])
+
+
+def rendered_ids(children: list) -> list[str]:
+    """Return the row ids of the rendered pages."""
+    return [row.id["index"] for page in children for row in page.children]
+
+
+@pytest.mark.test_list_component
+class TestListWindow:
+    """Tests for rendering a window of the pages of a list."""
+
+    PAGE_COUNT = 6
+
+    def load(self, window: dict, children: list, forward: bool) -> tuple[dict, list]:
+        """Load the next or previous page of the list."""
+        page = page_to_load(window, forward)
+        assert page is not None
+        index, cursor = page
+        assert cursor == (None if index == 0 else f"cursor-{index}")
+
+        next_cursor = f"cursor-{index + 1}" if index + 1 < self.PAGE_COUNT else None
+        patch, window = add_page(window, index, page_rows(index), next_cursor)
+
+        return window, apply_patch(children, patch)
+
+    def test_scroll_down_and_up(self) -> None:
+        """Test that a window of pages is rendered when scrolling."""
+        window = list_window(2, "cursor-1")
+        children = [list_page(page_rows(0))]
+
+        for _ in range(self.PAGE_COUNT - 1):
+            window, children = self.load(window, children, forward=True)
+            assert len(children) <= MAX_RENDERED_PAGES
+
+        assert page_to_load(window, forward=True) is None
+        assert rendered_ids(children) == ["3a", "3b", "4a", "4b", "5a", "5b"]
+        previous_class, previous_style, more_class, _ = window_sentinels(window)
+        assert "hidden" not in previous_class
+        assert previous_style == {"height": "15.0rem"}
+        assert "hidden" in more_class
+
+        for _ in range(self.PAGE_COUNT - MAX_RENDERED_PAGES):
+            window, children = self.load(window, children, forward=False)
+
+        assert page_to_load(window, forward=False) is None
+        assert rendered_ids(children) == ["0a", "0b", "1a", "1b", "2a", "2b"]
+        previous_class, _, more_class, more_style = window_sentinels(window)
+        assert "hidden" in previous_class
+        assert "hidden" not in more_class
+        assert more_style == {"height": "15.0rem"}
+
+    def test_prepend_row(self) -> None:
+        """Test that rows are prepended to a rendered first page."""
+        window = list_window(2, "cursor-1")
+        children = [list_page(page_rows(0))]
+        row = generate_list_rows([["new"]], ["new"])[0]
+
+        patch, prepended = prepend_row(window, row)
+
+        assert rendered_ids(apply_patch(children, patch))[:2] == ["new", "0a"]
+        assert prepended["counts"] == [3]
+        assert prepend_row({**window, "first": 1}, row) is None
@@ -0,0 +1,95 @@
+"""Tests for the database migrations."""
+from datetime import datetime
+
+import mongoengine
+import mongomock
+import pymongo
+import pytest
+
+from dashboard.migrations import dashboard_search_terms
+from dashboard.migrations.embedded_dashboards import migrate
+from dashboard.models.user import User
+
+
+@pytest.fixture
+def connection() -> pymongo.MongoClient:
+    """Connect mongoengine to mongomock and return client."""
+    conn = mongoengine.connect(
+        db="dashboard",
+        host="mongodb://localhost",
+        mongo_client_class=mongomock.MongoClient,
+        uuidRepresentation="standard",
+    )
+    yield conn
+    conn.drop_database("dashboard")
+    mongoengine.disconnect()
+
+
+@pytest.mark.test_migrations
+class TestEmbeddedDashboards:
+    """Tests for moving embedded dashboards to their own collection."""
+
+    def test_migrate(self, connection: pymongo.MongoClient):
+        """Test that embedded dashboards are moved."""
+        db = connection["dashboard"]
+        created = datetime(2023, 5, 1)
+        modified = datetime(2023, 5, 2)
+        user_id = (
+            db["user"]
+            .insert_one(
+                {
+                    "username": "embedded-user",
+                    "dashboards": [
+                        {"name": "first", "created": created},
+                        {"name": "second", "created": created, "modified": modified},
+                    ],
+                }
+            )
+            .inserted_id
+        )
+
+        assert migrate(db) == 2
+        # Migrating again does nothing
+        assert migrate(db) == 0
+
+        user = User.objects(id=user_id).get()
+        assert sorted(dashboard.name for dashboard in user.dashboards) == ["first", "second"]
+        assert user.dashboards.search("sec").count() == 1
+        assert "dashboards" not in db["user"].find_one({"_id": user_id})
+        stored = {dashboard["name"]: dashboard for dashboard in db["dashboards"].find()}
+        assert stored["first"]["modified"] == created
+        assert stored["second"]["modified"] == modified
+
+    def test_resume_migration(self, connection: pymongo.MongoClient):
+        """Test that a partially migrated user is not copied twice."""
+        db = connection["dashboard"]
+        dashboard = {"name": "first", "created": datetime(2023, 5, 1)}
+        user_id = db["user"].insert_one({"dashboards": [dashboard]}).inserted_id
+        migrate(db)
+        db["user"].update_one(
+            {"_id": user_id}, {"$set": {"dashboards": [db["dashboards"].find_one()]}}
+        )
+
+        migrate(db)
+
+        assert db["dashboards"].count_documents({}) == 1
+
+
+@pytest.mark.test_migrations
+class TestDashboardSearchTerms:
+    """Tests for adding search terms to dashboards."""
+
+    def test_migrate(self, connection: pymongo.MongoClient):
+        """Test that dashboards without search terms get them."""
+        db = connection["dashboard"]
+        db["dashboards"].insert_many(
+            [
+                {"name": "Engine tests", "description": "Temperature"},
+                {"name": "Brake tests", "search_terms": ["brake", "tests"]},
+            ]
+        )
+
+        assert dashboard_search_terms.migrate(db) == 1
+
+        dashboard = db["dashboards"].find_one({"name": "Engine tests"})
+        assert dashboard["search_terms"] == ["engine", "tests", "temperature"]
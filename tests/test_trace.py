@@ -0,0 +1,73 @@
+"""Tests for the trace component."""
+import importlib
+import json
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+import polars as pl
+import pytest
+
+from dashboard.components.trace import TraceType, trace_dict
+from dashboard.downsampling import DownsampleMethod
+
+# The trace module, since dashboard.components.trace is the function
+trace_module = importlib.import_module("dashboard.components.trace")
+
+
+@pytest.fixture
+def data_frame() -> pl.DataFrame:
+    """Return a data frame with numeric x and y columns."""
+    x = np.arange(100, dtype=np.float64)
+    return pl.DataFrame({"x": x, "y": np.sin(x)})
+
+
+@pytest.mark.test_trace
+class TestTraceDict:
+    """Tests for creating traces as figure dictionaries."""
+
+    @pytest.mark.parametrize("trace_type", list(TraceType))
+    def test_same_as_validated(self, data_frame: pl.DataFrame, trace_type: TraceType) -> None:
+        """Test that traces are the same with and without validation."""
+        validated = trace_dict(data_frame, trace_type, "#000000", "Graph", validate=True)
+        created = trace_dict(data_frame, trace_type, "#000000", "Graph", validate=False)
+
+        assert json.loads(to_json_plotly(created)) == json.loads(to_json_plotly(validated))
+
+    def test_category_x(self, data_frame: pl.DataFrame) -> None:
+        """Test that non numeric columns are kept."""
+        df = data_frame.with_columns(pl.col("x").cast(pl.Int64).cast(pl.Utf8))
+
+        created = trace_dict(df, TraceType.BAR, "#000000", "Graph", validate=False)
+
+        assert created["x"].tolist() == [str(i) for i in range(100)]
+
+    def test_validate_small_traces(self, data_frame: pl.DataFrame, monkeypatch) -> None:
+        """Test that only traces up to the maximum size are checked."""
+        validated = []
+
+        def counting_trace(*args):
+            validated.append(args)
+            return trace_module.go.Scatter()
+
+        monkeypatch.setattr(trace_module, "trace", counting_trace)
+        monkeypatch.setattr(trace_module, "VALIDATED_TRACE_MAX_POINTS", 50)
+
+        trace_dict(data_frame.head(50), TraceType.LINE, "#000000", "Graph")
+        trace_dict(data_frame, TraceType.LINE, "#000000", "Graph")
+        trace_dict(data_frame, TraceType.LINE, "#000000", "Graph", DownsampleMethod.LTTB, 50)
+
+        assert len(validated) == 2
+
+    def test_downsampling(self, data_frame: pl.DataFrame) -> None:
+        """Test that traces are downsampled before they are created."""
+        created = trace_dict(
+            data_frame,
+            TraceType.LINE,
+            "#000000",
+            "Graph",
+            DownsampleMethod.LTTB,
+            10,
+            validate=False,
+        )
+
+        assert len(created["x"]) <= 12
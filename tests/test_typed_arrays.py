@@ -0,0 +1,81 @@
+"""Tests for encoding typed arrays."""
+import base64
+
+import numpy as np
+import pytest
+
+from dashboard.typed_arrays import decode_typed_arrays, encode_array, encode_typed_arrays
+
+
+def decode(typed_array: dict[str, str]) -> list[float]:
+    """Decode a typed array to a list."""
+    data = base64.b64decode(typed_array["bdata"])
+    return np.frombuffer(data, dtype=f"<{typed_array['dtype']}").tolist()
+
+
+@pytest.mark.test_typed_arrays
+class TestTypedArrays:
+    """Tests for encoding typed arrays."""
+
+    def test_encode_floats(self) -> None:
+        """Test that floats are encoded as 64 bit floats."""
+        typed_array = encode_array(np.array([1.5, np.nan, -2.0]))
+
+        assert typed_array["dtype"] == "f8"
+        assert decode(typed_array)[::2] == [1.5, -2.0]
+
+    def test_encode_integers(self) -> None:
+        """Test that integers are encoded as 32 bit ints if they fit."""
+        assert encode_array(np.array([1, 2, 3]))["dtype"] == "i4"
+        assert encode_array(np.array([1, 2**40]))["dtype"] == "f8"
+        assert decode(encode_array(np.array([1, 2**40]))) == [1.0, 2.0**40]
+
+    def test_encode_figure(self) -> None:
+        """Test that only long numeric arrays are encoded."""
+        figure = {
+            "data": [
+                {
+                    "x": list(range(4)),
+                    "y": np.arange(4.0),
+                    "text": ["a", "b", "c", "d"],
+                    "customdata": [1, None, 2, 3],
+                    "marker": {"color": [0.5, 1.0, 1.5, 2]},
+                }
+            ],
+            "layout": {"xaxis": {"range": [0, 1]}},
+        }
+
+        encoded = encode_typed_arrays(figure, min_length=4)
+        trace = encoded["data"][0]
+
+        assert decode(trace["x"]) == [0, 1, 2, 3]
+        assert decode(trace["y"]) == [0.0, 1.0, 2.0, 3.0]
+        assert decode(trace["marker"]["color"]) == [0.5, 1.0, 1.5, 2.0]
+        assert trace["text"] == ["a", "b", "c", "d"]
+        assert trace["customdata"] == [1, None, 2, 3]
+        assert encoded["layout"] == {"xaxis": {"range": [0, 1]}}
+
+    def test_booleans_not_encoded(self) -> None:
+        """Test that lists of booleans are kept as lists."""
+        assert encode_typed_arrays([True, False], min_length=1) == [True, False]
+
+    def test_other_arrays_not_encoded(self) -> None:
+        """Test that non numeric numpy arrays are kept as arrays."""
+        dates = np.array(["2023-05-01", "2023-05-02"], dtype="datetime64[ns]")
+
+        assert encode_typed_arrays({"x": dates}, min_length=1)["x"] is dates
+
+    def test_decode(self) -> None:
+        """Test that decoding typed arrays restores the values."""
+        figure = {"data": [{"x": np.arange(100), "y": np.linspace(0, 1, 100), "name": "a"}]}
+
+        decoded = decode_typed_arrays(encode_typed_arrays(figure))
+
+        assert decoded["data"][0]["x"].tolist() == list(range(100))
+        assert decoded["data"][0]["y"].tolist() == np.linspace(0, 1, 100).tolist()
+        assert decoded["data"][0]["name"] == "a"
+
+    def test_decode_invalid(self) -> None:
+        """Test that invalid typed arrays are rejected."""
+        with pytest.raises(ValueError):
+            decode_typed_arrays({"dtype": "f8", "bdata": "not base64!"})
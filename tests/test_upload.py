@@ -0,0 +1,136 @@
+"""Tests for the upload endpoints."""
+from pathlib import Path
+import threading
+from typing import Any
+
+from flask import Flask
+from flask.testing import FlaskClient
+from flask_login import LoginManager
+import pytest
+
+from dashboard import upload, utilities
+from dashboard.dataset_store import DatasetStore
+
+CSV_CONTENTS = b"x,y\n1,3\n2,5\n3,7\n4,8\n"
+
+
+@pytest.fixture
+def store(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> DatasetStore:
+    """Use temporary upload and data set directories."""
+    store = DatasetStore(tmp_path / "datasets")
+    monkeypatch.setenv(upload.UPLOAD_DIR_ENV_NAME, str(tmp_path / "uploads"))
+    monkeypatch.setattr(upload, "dataset_store", store)
+
+    return store
+
+
+@pytest.fixture
+def client(store: DatasetStore) -> FlaskClient:
+    """Return a test client for an app with the upload endpoints."""
+    app = Flask(__name__)
+    app.config["LOGIN_DISABLED"] = True
+    LoginManager(app)
+    app.register_blueprint(upload.blueprint)
+
+    return app.test_client()
+
+
+def upload_file(client: FlaskClient, contents: bytes, chunk_size: int = 8) -> str:
+    """Upload a file in chunks and return the upload id."""
+    upload_id: str = client.post("/upload/").json["upload_id"]
+
+    for offset in range(0, len(contents), chunk_size):
+        chunk = contents[offset:][:chunk_size]
+        response = client.put(f"/upload/{upload_id}?offset={offset}", data=chunk)
+        assert response.status_code == 200
+
+    return upload_id
+
+
+@pytest.mark.test_upload
+class TestUpload:
+    """Tests for the chunked upload endpoints."""
+
+    def test_chunked_upload(self, client: FlaskClient, store: DatasetStore) -> None:
+        """Test that a file uploaded in chunks is stored."""
+        upload_id = upload_file(client, CSV_CONTENTS)
+
+        assert client.get(f"/upload/{upload_id}").json["offset"] == len(CSV_CONTENTS)
+
+        dataset_ids = client.post("/upload/complete", json={"upload_ids": [upload_id]}).json[
+            "dataset_ids"
+        ]
+        df = store.get(dataset_ids[0])
+
+        assert df is not None
+        assert df.columns == ["x", "y"]
+        assert df["y"].to_list() == [3, 5, 7, 8]
+
+    def test_wrong_offset(self, client: FlaskClient) -> None:
+        """Test that chunks with the wrong offset are rejected."""
+        upload_id = client.post("/upload/").json["upload_id"]
+        client.put(f"/upload/{upload_id}?offset=0", data=b"x,y\n")
+
+        response = client.put(f"/upload/{upload_id}?offset=0", data=b"x,y\n")
+
+        assert response.status_code == 409
+        assert response.json["offset"] == 4
+
+    def test_unknown_upload(self, client: FlaskClient) -> None:
+        """Test that unknown and invalid upload ids are not found."""
+        assert client.get(f"/upload/{'0' * 32}").status_code == 404
+        assert client.get("/upload/..%2Fsecret").status_code == 404
+
+    @pytest.mark.parametrize(
+        "body",
+        [{"upload_ids": [1]}, {"upload_ids": "id"}, {}, ["id"], "not json"],
+    )
+    def test_invalid_complete_body(self, client: FlaskClient, body: Any) -> None:
+        """Test that completing with an invalid body is rejected."""
+        if isinstance(body, str):
+            response = client.post("/upload/complete", data=body)
+        else:
+            response = client.post("/upload/complete", json=body)
+
+        assert response.status_code == 400
+
+    def test_invalid_file_skipped(self, client: FlaskClient) -> None:
+        """Test that files which can not be parsed are skipped."""
+        upload_id = upload_file(client, b"")
+
+        response = client.post("/upload/complete", json={"upload_ids": [upload_id]})
+
+        assert response.json["dataset_ids"] == []
+        assert response.json["errors"][0]["upload_id"] == upload_id
+
+    def test_multiple_files(self, client: FlaskClient, store: DatasetStore) -> None:
+        """Test that several files are stored in upload order."""
+        upload_ids = [
+            upload_file(client, CSV_CONTENTS),
+            upload_file(client, b""),
+            upload_file(client, b"a,b\n1,2\n"),
+        ]
+
+        response = client.post("/upload/complete", json={"upload_ids": upload_ids})
+        frames = [store.get(dataset_id) for dataset_id in response.json["dataset_ids"]]
+
+        assert [df.columns for df in frames if df is not None] == [["x", "y"], ["a", "b"]]
+        assert [error["upload_id"] for error in response.json["errors"]] == [upload_ids[1]]
+
+    def test_files_parsed_concurrently(
+        self, client: FlaskClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the uploaded files are parsed at the same time."""
+        upload_ids = [upload_file(client, CSV_CONTENTS) for _ in range(2)]
+        barrier = threading.Barrier(2, timeout=5)
+        read_data_file = upload.read_data_file
+
+        def wait_for_other_file(path: Path):
+            barrier.wait()
+            return read_data_file(path)
+
+        monkeypatch.setattr(upload, "read_data_file", wait_for_other_file)
+        monkeypatch.setattr(utilities, "MAX_PARSE_WORKERS", 2)
+        response = client.post("/upload/complete", json={"upload_ids": upload_ids})
+
+        assert len(response.json["dataset_ids"]) == 2
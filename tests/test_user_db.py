@@ -1,15 +1,27 @@
 """Test user db."""
-from datetime import datetime
+import copy
+from datetime import datetime, timedelta
+import pickle
 
 from flask import Flask
 from flask.ctx import RequestContext
 from flask_login import LoginManager, current_user
 import mongoengine
+from mongoengine import DoesNotExist
 import mongomock
 import pymongo
 import pytest
 
-from dashboard.models.user import Dashboard, User, login_user
+from dashboard.models.user import (
+    Dashboard,
+    Diagram,
+    User,
+    UserPrincipal,
+    load_principal,
+    login_user,
+    search_terms,
+    user_cache,
+)
 
 
 @pytest.fixture(autouse=True)
@@ -21,8 +33,8 @@ def connection():
         mongo_client_class=mongomock.MongoClient,
         uuidRepresentation="standard",
     )
-
-    return conn
+    yield conn
+    conn.drop_database("dashboard")
 
 
 @pytest.fixture
@@ -30,8 +42,7 @@ def example_user():
     """Example user."""
     username = "fixture-user"
     user = login_user(username)
-    user.dashboards.append(Dashboard(created=datetime.now()))
-    user.save()
+    Dashboard(owner=user, created=datetime.now()).save()
 
     return user
 
@@ -114,12 +125,249 @@ class TestUserDb:
         been created and saved.
         """
         db = connection["dashboard"]
-        queried_user = db["user"].find_one({"username": example_user.username})
-        assert queried_user is not None
-        queried_dashboard = queried_user["dashboards"][0]
+        queried_dashboard = db["dashboards"].find_one({"owner": example_user.id})
+        assert queried_dashboard is not None
 
         odm_user = login_user(example_user.username)
         odm_dashboard = odm_user.dashboards[0]
 
         assert queried_dashboard["created"] == odm_dashboard.created
         assert queried_dashboard["modified"] == odm_dashboard.modified
+
+
+@pytest.mark.test_user_db
+class TestDashboards:
+    """Tests for the dashboards collection."""
+
+    def test_add_dashboard(self, ctx: RequestContext, example_user: User):
+        """Test that adding a dashboard does not change the user."""
+        added = example_user.add_dashboard("name", "description")
+
+        assert added.owner.id == example_user.id
+        assert example_user.dashboards.count() == 2
+        assert "dashboards" not in User.objects(id=example_user.id).as_pymongo().get()
+
+    def test_dashboards_ordered_by_modified(self, ctx: RequestContext, example_user: User):
+        """Test that the most recently modified dashboard is first."""
+        added = example_user.add_dashboard("name", "description")
+        added.modified = datetime.now() + timedelta(minutes=1)
+        added.save()
+
+        assert [dashboard.id for dashboard in example_user.dashboards][0] == added.id
+
+    def test_shared_dashboards(self, ctx: RequestContext, example_user: User):
+        """Test that dashboards are shared with authorized users."""
+        other_user = User(username="other-user").save()
+        dashboard = other_user.add_dashboard("shared", "description")
+        dashboard.share(example_user)
+        dashboard.share(example_user)
+
+        assert [shared.id for shared in example_user.shared_dashboards] == [dashboard.id]
+        assert other_user.shared_dashboards.count() == 0
+
+
+@pytest.mark.test_user_db
+class TestDashboardPages:
+    """Tests for loading dashboards in pages."""
+
+    def test_pages(self, ctx: RequestContext, example_user: User):
+        """Test that pages contain every dashboard once, in order."""
+        modified = datetime(2023, 5, 1)
+        for i in range(6):
+            # Pairs of dashboards are modified at the same time
+            time = modified + timedelta(days=i // 2)
+            Dashboard(owner=example_user, created=time, modified=time).save()
+
+        pages = []
+        dashboards, cursor = example_user.dashboards.page(limit=3)
+        pages.append(dashboards)
+        while cursor is not None:
+            dashboards, cursor = example_user.dashboards.page(cursor, limit=3)
+            pages.append(dashboards)
+
+        paged = [dashboard.id for page in pages for dashboard in page]
+        expected = [
+            dashboard.id
+            for dashboard in Dashboard.objects(owner=example_user.id).order_by("-modified", "-id")
+        ]
+        assert paged == expected
+        assert [len(page) for page in pages] == [3, 3, 1]
+
+    def test_invalid_cursor(self, ctx: RequestContext, example_user: User):
+        """Test that invalid cursors raise ValueError."""
+        with pytest.raises(ValueError):
+            example_user.dashboards.page("not a cursor")
+
+
+@pytest.mark.test_user_db
+class TestDashboardSearch:
+    """Tests for searching dashboards."""
+
+    def test_search_terms(self):
+        """Test that texts are split into unique lowercase words."""
+        assert search_terms("Engine tests", None, "engine-2") == ["engine", "tests", "2"]
+
+    def test_search(self, ctx: RequestContext, example_user: User):
+        """Test that every query word must start a dashboard word."""
+        engine = example_user.add_dashboard("Engine tests", "Temperature")
+        example_user.add_dashboard("Brake tests", "Pressure")
+
+        def search(query: str) -> list[str]:
+            return [dashboard.name for dashboard in example_user.dashboards.search(query)]
+
+        assert search("eng") == ["Engine tests"]
+        assert search("TEST temp") == ["Engine tests"]
+        assert sorted(search("tests")) == ["Brake tests", "Engine tests"]
+        assert search("ngine") == []
+        assert search("engine pressure") == []
+        assert engine.search_terms == ["engine", "tests", "temperature"]
+
+    def test_matches(self, ctx: RequestContext, example_user: User):
+        """Test that dashboards match queries like searches."""
+        dashboard = example_user.add_dashboard("Engine tests", "Temperature")
+
+        for query in ["eng", "TEST temp", "ngine", "engine pressure", ""]:
+            found = example_user.dashboards.search(query).filter(id=dashboard.id).count() == 1
+            assert dashboard.matches(query) == found
+
+    def test_search_after_rename(self, ctx: RequestContext, example_user: User):
+        """Test that renamed dashboards are found by the new name."""
+        dashboard = example_user.add_dashboard("Engine tests", "Temperature")
+
+        dashboard.rename("Brake tests")
+
+        assert example_user.dashboards.search("engine").count() == 0
+        assert example_user.dashboards.search("brake temp").count() == 1
+
+
+@pytest.mark.test_user_db
+class TestDashboardUpdates:
+    """Tests for the atomic dashboard updates."""
+
+    def test_rename(self, ctx: RequestContext, example_user: User):
+        """Test that renaming updates the name and modified time."""
+        dashboard = example_user.add_dashboard("name", "description")
+        created = dashboard.created
+
+        dashboard.rename("new name")
+        stored = Dashboard.objects(id=dashboard.id).get()
+
+        assert stored.name == dashboard.name == "new name"
+        assert stored.description == "description"
+        assert stored.modified == dashboard.modified
+        assert stored.modified >= created.replace(microsecond=0)
+
+    def test_concurrent_updates(self, ctx: RequestContext, example_user: User):
+        """Test that updates from other copies are not overwritten."""
+        dashboard = example_user.add_dashboard("name", "description")
+        other_copy = Dashboard.objects(id=dashboard.id).get()
+
+        dashboard.add_diagram(Diagram())
+        other_copy.rename("new name")
+
+        stored = Dashboard.objects(id=dashboard.id).get()
+        assert stored.name == "new name"
+        assert len(stored.diagrams) == 1
+
+    def test_rename_keeps_concurrent_description(self, ctx: RequestContext, example_user: User):
+        """Test that renaming a stale copy keeps the new description."""
+        dashboard = example_user.add_dashboard("name", "description")
+        other_copy = Dashboard.objects(id=dashboard.id).get()
+
+        dashboard.rename("name", "Engine temperature")
+        other_copy.rename("new name")
+
+        stored = Dashboard.objects(id=dashboard.id).get()
+        assert stored.name == "new name"
+        assert stored.description == "Engine temperature"
+        assert stored.search_terms == ["new", "name", "engine", "temperature"]
+
+    def test_rename_deleted(self, ctx: RequestContext, example_user: User):
+        """Test that renaming deleted dashboards raises DoesNotExist."""
+        dashboard = example_user.add_dashboard("name", "description")
+        Dashboard.objects(id=dashboard.id).delete()
+
+        with pytest.raises(DoesNotExist):
+            dashboard.rename("new name")
+
+    def test_set_diagram(self, ctx: RequestContext, example_user: User):
+        """Test that a diagram is replaced at its index."""
+        dashboard = example_user.add_dashboard("name", "description")
+        dashboard.add_diagram(Diagram())
+        dashboard.add_diagram(Diagram())
+
+        dashboard.set_diagram(1, Diagram())
+
+        assert len(Dashboard.objects(id=dashboard.id).get().diagrams) == 2
+        with pytest.raises(DoesNotExist):
+            dashboard.set_diagram(2, Diagram())
+
+
+@pytest.mark.test_user_db
+class TestLoadPrincipal:
+    """Tests for loading user principals."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Clear the user cache before every test."""
+        user_cache.clear()
+
+    def test_principal_fields(self, ctx: RequestContext, example_user: User):
+        """Test that the principal has the id and username."""
+        principal = load_principal(str(example_user.id))
+
+        assert isinstance(principal, UserPrincipal)
+        assert principal.id == example_user.id
+        assert principal.username == example_user.username
+        assert principal.is_authenticated
+
+    def test_principal_is_cached(self, ctx: RequestContext, example_user: User):
+        """Test that principals are loaded from the cache."""
+        load_principal(str(example_user.id))
+        load_principal(str(example_user.id))
+
+        assert user_cache.hits == 1
+        assert user_cache.misses == 1
+
+    def test_cache_invalidated_on_save(self, ctx: RequestContext, example_user: User):
+        """Test that saving a user updates the cached principal."""
+        load_principal(str(example_user.id))
+        example_user.username = "renamed-user"
+        example_user.save()
+
+        principal = load_principal(str(example_user.id))
+
+        assert principal is not None
+        assert principal.username == "renamed-user"
+
+    def test_user_loaded_lazily(self, ctx: RequestContext, example_user: User):
+        """Test that the full user is loaded on attribute access."""
+        principal = load_principal(str(example_user.id))
+        assert principal is not None
+
+        principal.save()
+
+        assert principal._user is not None
+        assert principal._user.id == example_user.id
+
+    def test_principal_copy(self, ctx: RequestContext, example_user: User):
+        """Test that principals are copied without loading the user."""
+        principal = load_principal(str(example_user.id))
+
+        copied = copy.copy(principal)
+        unpickled = pickle.loads(pickle.dumps(principal))
+
+        assert copied.id == unpickled.id == example_user.id
+        assert unpickled._user is None
+
+    def test_private_attribute(self):
+        """Test that private attributes are not taken from the user."""
+        principal = UserPrincipal.__new__(UserPrincipal)
+
+        with pytest.raises(AttributeError):
+            principal._user
+
+    def test_missing_user(self):
+        """Test that no principal is loaded for unknown ids."""
+        assert load_principal("000000000000000000000000") is None
+        assert load_principal("not-an-id") is None
@@ -1,10 +1,18 @@
 """Tests for the utilities module."""
 from datetime import datetime, timedelta
+import io
+from pathlib import Path
 
+import polars as pl
 import pytest
 
 from dashboard.utilities import (
+    IPC_STREAM_MAGIC,
+    FileFormat,
+    detect_file_format,
+    map_concurrently,
     pluralize,
+    read_data_file,
     set_classname,
     singularize,
     to_human_time_delta,
@@ -95,3 +103,76 @@ class TestToHumanTimeDelta:
         assert to_human_time_delta(an_hour_ago, abbreviated=True) == "1 h"
         a_year_ago = timedelta(days=365)
         assert to_human_time_delta(a_year_ago, abbreviated=True) == "1 y"
+
+
+@pytest.mark.test_utilities
+class TestMapConcurrently:
+    """Tests for the map_concurrently function."""
+
+    def test_order_is_preserved(self) -> None:
+        """Test that the results are in the order of the items."""
+        assert map_concurrently(lambda i: i * 2, list(range(20))) == list(range(0, 40, 2))
+
+    def test_errors_are_reported(self) -> None:
+        """Test that ValueErrors are returned in their position."""
+        results = map_concurrently(int, ["1", "not a number", "3"])
+
+        assert results[0] == 1
+        assert isinstance(results[1], ValueError)
+        assert results[2] == 3
+
+    def test_map_concurrently_without_items(self) -> None:
+        """Test that no items give no results."""
+        assert map_concurrently(str, []) == []
+
+
+DATA_FRAME = pl.DataFrame({"x": [1.0, 2.0, 3.0], "y": [4.0, 5.0, 6.0], "z": ["a", "b", "c"]})
+
+
+def to_bytes(file_format: FileFormat) -> bytes:
+    """Write DATA_FRAME in a file format."""
+    buffer = io.BytesIO()
+    if file_format == FileFormat.PARQUET:
+        DATA_FRAME.write_parquet(buffer)
+    elif file_format == FileFormat.IPC:
+        DATA_FRAME.write_ipc(buffer)
+    else:
+        DATA_FRAME.write_csv(buffer)
+
+    return buffer.getvalue()
+
+
+@pytest.mark.test_utilities
+class TestReadDataFile:
+    """Tests for reading csv, Parquet and Arrow IPC files."""
+
+    @pytest.mark.parametrize("file_format", list(FileFormat))
+    def test_detect_file_format(self, file_format: FileFormat) -> None:
+        """Test that the format is detected from the first bytes."""
+        assert detect_file_format(to_bytes(file_format)) == file_format
+
+    @pytest.mark.parametrize("file_format", list(FileFormat))
+    def test_read_data_file(self, file_format: FileFormat, tmp_path: Path) -> None:
+        """Test that only the plotted columns are read from a file."""
+        path = tmp_path / "data"
+        path.write_bytes(to_bytes(file_format))
+
+        df = read_data_file(path)
+
+        assert df.frame_equal(DATA_FRAME.select(["x", "y"]))
+
+    def test_invalid_file(self, tmp_path: Path) -> None:
+        """Test that invalid files raise ValueError."""
+        path = tmp_path / "data"
+        path.write_bytes(b"PAR1 not parquet")
+
+        with pytest.raises(ValueError):
+            read_data_file(path)
+
+    def test_ipc_stream(self, tmp_path: Path) -> None:
+        """Test that Arrow IPC streams are rejected, not read as csv."""
+        path = tmp_path / "data"
+        path.write_bytes(IPC_STREAM_MAGIC + b"\x10\x00\x00\x00 schema")
+
+        with pytest.raises(ValueError, match="IPC stream"):
+            read_data_file(path)